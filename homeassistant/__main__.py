@@ -18,6 +18,8 @@ from homeassistant.const import (
     RESTART_EXIT_CODE,
 )
 
+STARTUP_TIMELINE_FILE = 'startup_timeline.json'
+
 
 def set_loop() -> None:
     """Attempt to use uvloop."""
@@ -149,6 +151,11 @@ def get_arguments() -> argparse.Namespace:
         '--log-no-color',
         action='store_true',
         help="Disable color logs")
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='Write the setup timeline of all components to '
+             'CONFIG/{} after startup'.format(STARTUP_TIMELINE_FILE))
     parser.add_argument(
         '--runner',
         action='store_true',
@@ -298,6 +305,29 @@ async def setup_and_run_hass(config_dir: str,
             EVENT_HOMEASSISTANT_START, open_browser
         )
 
+    if args.profile_startup:
+        @core.callback
+        def write_timeline(_: Any) -> None:
+            """Write the startup timeline and print its critical path."""
+            from homeassistant.setup import async_get_setup_timeline
+            from homeassistant.util.json import save_json
+
+            timeline = async_get_setup_timeline(hass).as_dict()
+            path = hass.config.path(STARTUP_TIMELINE_FILE)
+            hass.async_add_executor_job(save_json, path, timeline)
+
+            setups = {setup['name']: setup for setup in timeline['setups']}
+            print('Writing startup timeline to', path)
+            print('Critical path:')
+            for name in timeline['critical_path']:
+                setup = setups[name]
+                print('  {:<40} {:>8.3f}s - {:>8.3f}s'.format(
+                    name, setup['start'], setup['end']))
+
+        # Registered right away, async_run fires the start event before
+        # any callback scheduled from here would run.
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, write_timeline)
+
     return await hass.async_run()
 
 
@@ -2,8 +2,10 @@
 import asyncio
 from collections import OrderedDict
 from datetime import timedelta
+import hashlib
 import hmac
 from logging import getLogger
+import os
 from typing import Any, Dict, List, Optional  # noqa: F401
 
 from homeassistant.auth.const import ACCESS_TOKEN_EXPIRATION
@@ -38,6 +40,12 @@ class AuthStore:
         self._perm_lookup = None  # type: Optional[PermissionLookup]
         self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY,
                                                  private=True)
+        # Refresh tokens by id and by keyed hash of the token. The hash key
+        # is random per instance, so the position of a token in the index
+        # tells an attacker nothing about its value.
+        self._refresh_tokens = {}  # type: Dict[str, models.RefreshToken]
+        self._token_index = {}  # type: Dict[bytes, models.RefreshToken]
+        self._token_index_key = os.urandom(32)
 
     async def async_get_groups(self) -> List[models.Group]:
         """Retrieve all users."""
@@ -134,6 +142,8 @@ class AuthStore:
             assert self._users is not None
 
         self._users.pop(user.id)
+        for refresh_token in user.refresh_tokens.values():
+            self._async_unindex_refresh_token(refresh_token)
         self._async_schedule_save()
 
     async def async_update_user(
@@ -215,6 +225,7 @@ class AuthStore:
 
         refresh_token = models.RefreshToken(**kwargs)
         user.refresh_tokens[refresh_token.id] = refresh_token
+        self._async_index_refresh_token(refresh_token)
 
         self._async_schedule_save()
         return refresh_token
@@ -228,6 +239,7 @@ class AuthStore:
 
         for user in self._users.values():
             if user.refresh_tokens.pop(refresh_token.id, None):
+                self._async_unindex_refresh_token(refresh_token)
                 self._async_schedule_save()
                 break
 
@@ -238,12 +250,7 @@ class AuthStore:
             await self._async_load()
             assert self._users is not None
 
-        for user in self._users.values():
-            refresh_token = user.refresh_tokens.get(token_id)
-            if refresh_token is not None:
-                return refresh_token
-
-        return None
+        return self._refresh_tokens.get(token_id)
 
     async def async_get_refresh_token_by_token(
             self, token: str) -> Optional[models.RefreshToken]:
@@ -252,12 +259,12 @@ class AuthStore:
             await self._async_load()
             assert self._users is not None
 
-        found = None
+        found = self._token_index.get(self._token_digest(token))
 
-        for user in self._users.values():
-            for refresh_token in user.refresh_tokens.values():
-                if hmac.compare_digest(refresh_token.token, token):
-                    found = refresh_token
+        # The index is only a hint, the token itself is compared in
+        # constant time.
+        if found is None or not hmac.compare_digest(found.token, token):
+            return None
 
         return found
 
@@ -437,10 +444,33 @@ class AuthStore:
                 last_used_ip=rt_dict.get('last_used_ip'),
             )
             users[rt_dict['user_id']].refresh_tokens[token.id] = token
+            self._async_index_refresh_token(token)
 
         self._groups = groups
         self._users = users
 
+    def _token_digest(self, token: str) -> bytes:
+        """Return the keyed hash of a token."""
+        return hmac.new(self._token_index_key, token.encode(),
+                        hashlib.sha256).digest()
+
+    @callback
+    def _async_index_refresh_token(
+            self, refresh_token: models.RefreshToken) -> None:
+        """Add a refresh token to the lookup indexes."""
+        self._refresh_tokens[refresh_token.id] = refresh_token
+        self._token_index[self._token_digest(refresh_token.token)] = \
+            refresh_token
+
+    @callback
+    def _async_unindex_refresh_token(
+            self, refresh_token: models.RefreshToken) -> None:
+        """Remove a refresh token from the lookup indexes."""
+        self._refresh_tokens.pop(refresh_token.id, None)
+        digest = self._token_digest(refresh_token.token)
+        if self._token_index.get(digest) is refresh_token:
+            del self._token_index[digest]
+
     @callback
     def _async_schedule_save(self) -> None:
         """Save users."""
@@ -10,10 +10,12 @@ from typing import Any, Optional, Dict
 import voluptuous as vol
 
 from homeassistant import (
-    core, config as conf_util, config_entries, components as core_components)
+    core, config as conf_util, config_entries, components as core_components,
+    loader)
 from homeassistant.components import persistent_notification
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
-from homeassistant.setup import async_setup_component
+from homeassistant.setup import (
+    async_get_setup_timeline, async_setup_component)
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.package import async_get_user_site, is_virtual_env
 from homeassistant.util.yaml import clear_secret_cache
@@ -78,6 +80,7 @@ async def async_from_config_dict(config: Dict[str, Any],
     This method is a coroutine.
     """
     start = time()
+    timeline = async_get_setup_timeline(hass)
 
     if enable_log:
         async_enable_logging(hass, verbose, log_rotate_days, log_file,
@@ -103,6 +106,9 @@ async def async_from_config_dict(config: Dict[str, Any],
     await hass.async_add_executor_job(
         conf_util.process_ha_config_upgrade, hass)
 
+    # Cached metadata lets dependencies be resolved without imports
+    await loader.async_load_manifests(hass)
+
     hass.config.skip_pip = skip_pip
     if skip_pip:
         _LOGGER.warning("Skipping pip installation of required modules. "
@@ -111,8 +117,9 @@ async def async_from_config_dict(config: Dict[str, Any],
     # Make a copy because we are mutating it.
     config = OrderedDict(config)
 
-    # Merge packages
-    conf_util.merge_packages_config(
+    # Merge packages. Manifests are read from disk, so do it in the executor
+    await hass.async_add_executor_job(
+        conf_util.merge_packages_config,
         hass, config, core_config.get(conf_util.CONF_PACKAGES, {}))
 
     hass.config_entries = config_entries.ConfigEntries(hass, config)
@@ -150,6 +157,9 @@ async def async_from_config_dict(config: Dict[str, Any],
 
     await hass.async_block_till_done()
 
+    await loader.async_save_manifests(hass)
+
+    timeline.async_startup_done()
     stop = time()
     _LOGGER.info("Home Assistant initialized in %.2fs", stop-start)
 
@@ -16,11 +16,11 @@ import voluptuous as vol
 from homeassistant.bootstrap import DATA_LOGGING
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import (
-    EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED, HTTP_BAD_REQUEST,
-    HTTP_CREATED, HTTP_NOT_FOUND, MATCH_ALL, URL_API, URL_API_COMPONENTS,
-    URL_API_CONFIG, URL_API_DISCOVERY_INFO, URL_API_ERROR_LOG, URL_API_EVENTS,
-    URL_API_SERVICES, URL_API_STATES, URL_API_STATES_ENTITY, URL_API_STREAM,
-    URL_API_TEMPLATE, __version__)
+    CONTENT_TYPE_JSON, EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED,
+    HTTP_BAD_REQUEST, HTTP_CREATED, HTTP_NOT_FOUND, MATCH_ALL, URL_API,
+    URL_API_COMPONENTS, URL_API_CONFIG, URL_API_DISCOVERY_INFO,
+    URL_API_ERROR_LOG, URL_API_EVENTS, URL_API_SERVICES, URL_API_STATES,
+    URL_API_STATES_ENTITY, URL_API_STREAM, URL_API_TEMPLATE, __version__)
 import homeassistant.core as ha
 from homeassistant.auth.permissions.const import POLICY_READ
 from homeassistant.exceptions import (
@@ -28,7 +28,7 @@ from homeassistant.exceptions import (
 from homeassistant.helpers import template
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSONEncoder, async_get_json_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,6 +91,8 @@ class APIEventStream(HomeAssistantView):
         stop_obj = object()
         to_write = asyncio.Queue(loop=hass.loop)
 
+        json_cache = async_get_json_cache(hass)
+
         restrict = request.query.get('restrict')
         if restrict:
             restrict = restrict.split(',') + [EVENT_HOMEASSISTANT_STOP]
@@ -108,7 +110,11 @@ class APIEventStream(HomeAssistantView):
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=JSONEncoder)
+                try:
+                    data = json_cache.event_json(event)
+                except ValueError:
+                    # Out of range floats are only valid for the stream
+                    data = json.dumps(event, cls=JSONEncoder)
 
             await to_write.put(data)
 
@@ -198,7 +204,16 @@ class APIStatesView(HomeAssistantView):
             state for state in request.app['hass'].states.async_all()
             if not user or entity_perm(state.entity_id, 'read')
         ]
-        return self.json(states)
+        try:
+            body = '[{}]'.format(', '.join(
+                state.as_json() for state in states))
+        except (ValueError, TypeError):
+            # The view reports states that can't be encoded
+            return self.json(states)
+        response = web.Response(
+            body=body.encode('UTF-8'), content_type=CONTENT_TYPE_JSON)
+        response.enable_compression()
+        return response
 
 
 class APIEntityStateView(HomeAssistantView):
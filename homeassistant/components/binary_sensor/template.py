@@ -8,7 +8,7 @@ import logging
 
 import voluptuous as vol
 
-from homeassistant.core import callback
+from homeassistant.core import callback, split_entity_id
 from homeassistant.components.binary_sensor import (
     BinarySensorDevice, ENTITY_ID_FORMAT, PLATFORM_SCHEMA,
     DEVICE_CLASSES_SCHEMA)
@@ -16,11 +16,10 @@ from homeassistant.const import (
     ATTR_FRIENDLY_NAME, ATTR_ENTITY_ID, CONF_VALUE_TEMPLATE,
     CONF_ICON_TEMPLATE, CONF_ENTITY_PICTURE_TEMPLATE,
     CONF_SENSORS, CONF_DEVICE_CLASS, EVENT_HOMEASSISTANT_START, MATCH_ALL)
-from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.event import (
-    async_track_state_change, async_track_same_state)
+    async_track_render_info, async_track_state_change, async_track_same_state)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -55,43 +54,13 @@ async def async_setup_platform(hass, config, async_add_entities,
         icon_template = device_config.get(CONF_ICON_TEMPLATE)
         entity_picture_template = device_config.get(
             CONF_ENTITY_PICTURE_TEMPLATE)
-        entity_ids = set()
-        manual_entity_ids = device_config.get(ATTR_ENTITY_ID)
-
-        invalid_templates = []
-
-        for tpl_name, template in (
-                (CONF_VALUE_TEMPLATE, value_template),
-                (CONF_ICON_TEMPLATE, icon_template),
-                (CONF_ENTITY_PICTURE_TEMPLATE, entity_picture_template),
-        ):
-            if template is None:
-                continue
-            template.hass = hass
+        # Without entity ids the states accessed by the templates are tracked
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
 
-            if manual_entity_ids is not None:
-                continue
-
-            template_entity_ids = template.extract_entities()
-            if template_entity_ids == MATCH_ALL:
-                entity_ids = MATCH_ALL
-                # Cut off _template from name
-                invalid_templates.append(tpl_name[:-9])
-            elif entity_ids != MATCH_ALL:
-                entity_ids |= set(template_entity_ids)
-
-        if manual_entity_ids is not None:
-            entity_ids = manual_entity_ids
-        elif entity_ids != MATCH_ALL:
-            entity_ids = list(entity_ids)
-
-        if invalid_templates:
-            _LOGGER.warning(
-                'Template binary sensor %s has no entity ids configured to'
-                ' track nor were we able to extract the entities to track'
-                ' from the %s template(s). This entity will only be able'
-                ' to be updated manually.',
-                device, ', '.join(invalid_templates))
+        for template in (value_template, icon_template,
+                         entity_picture_template):
+            if template is not None:
+                template.hass = hass
 
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         device_class = device_config.get(CONF_DEVICE_CLASS)
@@ -133,27 +102,92 @@ class BinarySensorTemplate(BinarySensorDevice):
         self._entities = entity_ids
         self._delay_on = delay_on
         self._delay_off = delay_off
+        self._render_infos = ()
+        self._remove_listener = None
+        self._removed = False
+        self._untracked_warned = False
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        @callback
-        def template_bsensor_state_listener(entity, old_state, new_state):
-            """Handle the target device state changes."""
-            self.async_check_state()
-
         @callback
         def template_bsensor_startup(event):
             """Update template on startup."""
-            if self._entities != MATCH_ALL:
-                # Track state change only for valid templates
-                async_track_state_change(
-                    self.hass, self._entities, template_bsensor_state_listener)
+            if self._entities is not None:
+                self._remove_listener = async_track_state_change(
+                    self.hass, self._entities,
+                    self._async_template_bsensor_state_listener)
 
             self.async_check_state()
 
         self.hass.bus.async_listen_once(
             EVENT_HOMEASSISTANT_START, template_bsensor_startup)
 
+    async def async_will_remove_from_hass(self):
+        """Remove the state listener."""
+        self._removed = True
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+
+    @callback
+    def _async_template_bsensor_state_listener(self, entity, old_state,
+                                               new_state):
+        """Handle the target device state changes."""
+        self.async_check_state()
+
+    @callback
+    def _async_track_renders(self, render_infos):
+        """Track the states accessed by the last render of the templates."""
+        if self._entities is not None or self._removed:
+            return
+
+        self._async_warn_untracked(render_infos)
+
+        self._render_infos = render_infos
+        if self._remove_listener is not None:
+            self._remove_listener()
+        self._remove_listener = async_track_render_info(
+            self.hass, render_infos,
+            self._async_template_bsensor_state_listener)
+
+    @callback
+    def _async_warn_untracked(self, render_infos):
+        """Warn once about templates that did not access any states."""
+        if self._untracked_warned:
+            return
+
+        untracked = [
+            name for name, template in (
+                ('value', self._template),
+                ('icon', self._icon_template),
+                ('entity_picture', self._entity_picture_template))
+            for render_info in render_infos
+            if render_info.template is template and not (
+                render_info.entities or render_info.domains or
+                render_info.all_states)]
+
+        if untracked:
+            self._untracked_warned = True
+            _LOGGER.warning(
+                'Template binary sensor %s has no entity ids configured to '
+                'track nor were we able to extract the entities to track '
+                'from the %s template(s). These templates are only rendered '
+                'again when the entity is updated.',
+                split_entity_id(self.entity_id)[1], ', '.join(untracked))
+
+    def _tracked_entity_ids(self):
+        """Return the entity ids that can change the state."""
+        if self._entities is not None:
+            return self._entities
+
+        entity_ids = set()
+        for render_info in self._render_infos:
+            if render_info.all_states or render_info.domains:
+                return MATCH_ALL
+            entity_ids |= render_info.entities
+
+        return list(entity_ids)
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -187,10 +221,22 @@ class BinarySensorTemplate(BinarySensorDevice):
     @callback
     def _async_render(self):
         """Get the state of template."""
+        render_infos = []
+        state = self._async_render_state(render_infos)
+        self._async_track_renders(render_infos)
+        return state
+
+    @callback
+    def _async_render_state(self, render_infos):
+        """Render the templates and add their RenderInfo to render_infos."""
         state = None
-        try:
-            state = (self._template.async_render().lower() == 'true')
-        except TemplateError as ex:
+        render_info = self._template.async_render_to_info()
+        render_infos.append(render_info)
+
+        if render_info.exception is None:
+            state = render_info.result.lower() == 'true'
+        else:
+            ex = render_info.exception
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
                 # Common during HA startup - so just a warning
@@ -205,20 +251,25 @@ class BinarySensorTemplate(BinarySensorDevice):
             if template is None:
                 continue
 
-            try:
-                setattr(self, property_name, template.async_render())
-            except TemplateError as ex:
-                friendly_property_name = property_name[1:].replace('_', ' ')
-                if ex.args and ex.args[0].startswith(
-                        "UndefinedError: 'None' has no attribute"):
-                    # Common during HA startup - so just a warning
-                    _LOGGER.warning('Could not render %s template %s,'
-                                    ' the state is unknown.',
-                                    friendly_property_name, self._name)
-                else:
-                    _LOGGER.error('Could not render %s template %s: %s',
-                                  friendly_property_name, self._name, ex)
-                return state
+            render_info = template.async_render_to_info()
+            render_infos.append(render_info)
+
+            if render_info.exception is None:
+                setattr(self, property_name, render_info.result)
+                continue
+
+            ex = render_info.exception
+            friendly_property_name = property_name[1:].replace('_', ' ')
+            if ex.args and ex.args[0].startswith(
+                    "UndefinedError: 'None' has no attribute"):
+                # Common during HA startup - so just a warning
+                _LOGGER.warning('Could not render %s template %s,'
+                                ' the state is unknown.',
+                                friendly_property_name, self._name)
+            else:
+                _LOGGER.error('Could not render %s template %s: %s',
+                              friendly_property_name, self._name, ex)
+            return state
 
         return state
 
@@ -245,7 +296,8 @@ class BinarySensorTemplate(BinarySensorDevice):
 
         period = self._delay_on if state else self._delay_off
         async_track_same_state(
-            self.hass, period, set_state, entity_ids=self._entities,
+            self.hass, period, set_state,
+            entity_ids=self._tracked_entity_ids(),
             async_check_same_func=lambda *args: self._async_render() == state)
 
     async def async_update(self):
@@ -24,6 +24,7 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.util.async_ import run_coroutine_threadsafe
 
 DOMAIN = 'group'
+DATA_EXPANDED = 'group_expanded'
 
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
 
@@ -131,6 +132,9 @@ def expand_entity_ids(hass, entity_ids):
     Async friendly.
     """
     found_ids = []
+    # Membership of found_ids, which is a list to keep the order
+    found = set()
+
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
             continue
@@ -142,18 +146,15 @@ def expand_entity_ids(hass, entity_ids):
             domain, _ = ha.split_entity_id(entity_id)
 
             if domain == DOMAIN:
-                child_entities = get_entity_ids(hass, entity_id)
-                if entity_id in child_entities:
-                    child_entities = list(child_entities)
-                    child_entities.remove(entity_id)
-                found_ids.extend(
-                    ent_id for ent_id
-                    in expand_entity_ids(hass, child_entities)
-                    if ent_id not in found_ids)
+                child_entities, _ = _expand_group(hass, entity_id)
+                for ent_id in child_entities:
+                    if ent_id not in found:
+                        found.add(ent_id)
+                        found_ids.append(ent_id)
 
-            else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+            elif entity_id not in found:
+                found.add(entity_id)
+                found_ids.append(entity_id)
 
         except AttributeError:
             # Raised by split_entity_id if entity_id is not a string
@@ -162,6 +163,59 @@ def expand_entity_ids(hass, entity_ids):
     return found_ids
 
 
+def _expand_group(hass, entity_id):
+    """Return the expanded members of a group and the groups it contains.
+
+    Expansions are cached with the member lists of all groups they went
+    through, and expanded again once one of those member lists changed.
+
+    Async friendly.
+    """
+    cache = hass.data.get(DATA_EXPANDED)
+    if cache is None:
+        cache = hass.data[DATA_EXPANDED] = {}
+
+    cached = cache.get(entity_id)
+
+    if cached is not None:
+        for group_id, members in cached[1]:
+            current = get_entity_ids(hass, group_id)
+            if current is not members and current != members:
+                break
+        else:
+            return cached
+
+    child_entities = get_entity_ids(hass, entity_id)
+    groups = [(entity_id, child_entities)]
+
+    if entity_id in child_entities:
+        child_entities = list(child_entities)
+        child_entities.remove(entity_id)
+
+    expanded = []
+    found = set()
+
+    for child_id in child_entities:
+        if not isinstance(child_id, str):
+            continue
+
+        child_id = child_id.lower()
+
+        if ha.split_entity_id(child_id)[0] == DOMAIN:
+            nested, nested_groups = _expand_group(hass, child_id)
+            groups.extend(nested_groups)
+        else:
+            nested = (child_id,)
+
+        for ent_id in nested:
+            if ent_id not in found:
+                found.add(ent_id)
+                expanded.append(ent_id)
+
+    cached = cache[entity_id] = (tuple(expanded), tuple(groups))
+    return cached
+
+
 @bind_hass
 def get_entity_ids(hass, entity_id, domain_filter=None):
     """Get members of this group.
@@ -365,6 +419,10 @@ class Group(Entity):
         self._order = order
         self._assumed_state = False
         self._async_unsub_state_changed = None
+        # Flags (on, assumed state) by member, None until counted
+        self._members = None
+        self._on_count = 0
+        self._assumed_count = 0
 
     @staticmethod
     def create_group(hass, name, entity_ids=None, user_defined=True,
@@ -388,7 +446,7 @@ class Group(Entity):
         """
         group = Group(
             hass, name,
-            order=len(hass.states.async_entity_ids(DOMAIN)),
+            order=hass.states.async_entity_ids_count(DOMAIN),
             visible=visible, icon=icon, view=view, control=control,
             user_defined=user_defined, entity_ids=entity_ids, mode=mode
         )
@@ -478,6 +536,7 @@ class Group(Entity):
         await self.async_stop()
         self.tracking = tuple(ent_id.lower() for ent_id in entity_ids)
         self.group_on, self.group_off = None, None
+        self._members = None
 
         await self.async_update_ha_state(True)
         self.async_start()
@@ -528,7 +587,7 @@ class Group(Entity):
         if self._async_unsub_state_changed is None:
             return
 
-        self._async_update_group_state(new_state)
+        self._async_update_group_state(new_state, entity_id)
         await self.async_update_ha_state()
 
     @property
@@ -545,65 +604,82 @@ class Group(Entity):
         return states
 
     @callback
-    def _async_update_group_state(self, tr_state=None):
-        """Update group state.
+    def _async_count_members(self):
+        """Count the members that are on and that have an assumed state.
 
-        Optionally you can provide the only state changed since last update
-        allowing this method to take shortcuts.
+        This method must be run in the event loop.
+        """
+        self._members = {}
+        self._on_count = self._assumed_count = 0
+
+        for state in self._tracking_states:
+            self._async_update_member(state.entity_id, state)
+
+    @callback
+    def _async_update_member(self, entity_id, state):
+        """Update the counters with the new state of a member.
 
         This method must be run in the event loop.
         """
-        # To store current states of group entities. Might not be needed.
-        states = None
-        gr_state = self._state
-        gr_on = self.group_on
-        gr_off = self.group_off
+        flags = self._members.pop(entity_id, None)
+
+        if flags is not None:
+            self._on_count -= flags[0]
+            self._assumed_count -= flags[1]
+
+        if state is None:
+            return
+
+        flags = self._members[entity_id] = (
+            state.state == self.group_on,
+            bool(state.attributes.get(ATTR_ASSUMED_STATE)))
+        self._on_count += flags[0]
+        self._assumed_count += flags[1]
+
+    @callback
+    def _async_update_group_state(self, tr_state=None, entity_id=None):
+        """Update group state.
+
+        Optionally you can provide the only state changed since last update,
+        or the entity_id of the member that was removed. The counters of the
+        group are then updated from that member only.
 
+        This method must be run in the event loop.
+        """
         # We have not determined type of group yet
-        if gr_on is None:
-            if tr_state is None:
-                states = self._tracking_states
+        if self.group_on is None:
+            gr_on = gr_off = None
 
-                for state in states:
-                    gr_on, gr_off = \
-                        _get_group_on_off(state.state)
+            if tr_state is None:
+                for state in self._tracking_states:
+                    gr_on, gr_off = _get_group_on_off(state.state)
                     if gr_on is not None:
                         break
             else:
                 gr_on, gr_off = _get_group_on_off(tr_state.state)
 
-            if gr_on is not None:
-                self.group_on, self.group_off = gr_on, gr_off
+            # We cannot determine state of the group
+            if gr_on is None:
+                return
 
-        # We cannot determine state of the group
-        if gr_on is None:
-            return
-
-        # pylint: disable=too-many-boolean-expressions
-        if tr_state is None or ((gr_state == gr_on and
-                                 tr_state.state == gr_off) or
-                                (gr_state == gr_off and
-                                 tr_state.state == gr_on) or
-                                tr_state.state not in (gr_on, gr_off)):
-            if states is None:
-                states = self._tracking_states
-
-            if self.mode(state.state == gr_on for state in states):
-                self._state = gr_on
-            else:
-                self._state = gr_off
+            self.group_on, self.group_off = gr_on, gr_off
+            # Members were not counted as on before
+            self._members = None
 
-        elif tr_state.state in (gr_on, gr_off):
-            self._state = tr_state.state
+        if self._members is None or (tr_state is None and entity_id is None):
+            self._async_count_members()
+        elif tr_state is not None:
+            self._async_update_member(tr_state.entity_id, tr_state)
+        else:
+            self._async_update_member(entity_id, None)
 
-        if tr_state is None or self._assumed_state and \
-           not tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            if states is None:
-                states = self._tracking_states
+        count = len(self._members)
 
-            self._assumed_state = self.mode(
-                state.attributes.get(ATTR_ASSUMED_STATE) for state
-                in states)
+        if self.mode is all:
+            group_is_on = self._on_count == count
+            self._assumed_state = self._assumed_count == count
+        else:
+            group_is_on = self._on_count > 0
+            self._assumed_state = self._assumed_count > 0
 
-        elif tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            self._assumed_state = True
+        self._state = self.group_on if group_is_on else self.group_off
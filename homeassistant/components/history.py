@@ -4,21 +4,28 @@ Provide pre-made queries on top of the recorder component.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/history/
 """
+import asyncio
 from collections import defaultdict
 from datetime import timedelta
-from itertools import groupby
+import heapq
+from itertools import chain, groupby
+import json
 import logging
 import time
 
+from aiohttp import web
+from aiohttp.hdrs import CONTENT_TYPE
 import voluptuous as vol
 
 from homeassistant.const import (
-    HTTP_BAD_REQUEST, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE)
+    HTTP_BAD_REQUEST, CONTENT_TYPE_JSON, CONF_DOMAINS, CONF_ENTITIES,
+    CONF_EXCLUDE, CONF_INCLUDE)
 import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
 from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.helpers.config_validation as cv
 
 _LOGGER = logging.getLogger(__name__)
@@ -37,6 +44,21 @@ CONFIG_SCHEMA = vol.Schema({
 SIGNIFICANT_DOMAINS = ('thermostat', 'climate')
 IGNORE_DOMAINS = ('zone', 'scene',)
 
+# Periods longer than this are served from statistics where available
+STATISTICS_MIN_RANGE = timedelta(days=1)
+# Periods up to this use the 5 minute statistics, longer ones hourly
+SHORT_TERM_STATISTICS_MAX_RANGE = timedelta(days=7)
+# The end of a period is always served from the recorded states
+RAW_WINDOW = timedelta(hours=1)
+
+# Response formats of the history period view
+FORMAT_STREAM = 'stream'
+FORMAT_COLUMNAR = 'columnar'
+# Rows fetched per round trip when streaming states from the database
+STREAM_YIELD_PER = 1000
+# Characters of JSON collected before they are written to the response
+STREAM_CHUNK_SIZE = 65536
+
 
 def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
                            filters=None, include_start_time_state=True):
@@ -46,21 +68,20 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    For long periods, numeric entities are served from the statistics
+    compiled by the recorder, except for the end of the period.
     """
     timer_start = time.perf_counter()
     from homeassistant.components.recorder.models import States
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
-
-        if filters:
-            query = filters.apply(query, entity_ids)
+        statistics, statistics_end, statistics_starts = _get_statistics(
+            hass, session, start_time, end_time, entity_ids, filters)
 
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+        query = _filter_significant_states(
+            session.query(States), start_time, end_time, entity_ids,
+            filters, statistics_end, statistics_starts)
 
         query = query.order_by(States.last_updated)
 
@@ -69,6 +90,10 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
             if (_is_significant(state) and
                 not state.attributes.get(ATTR_HIDDEN, False)))
 
+        if statistics:
+            states = heapq.merge(
+                statistics, states, key=lambda state: state.last_updated)
+
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
         _LOGGER.debug(
@@ -79,6 +104,278 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
         include_start_time_state)
 
 
+def stream_significant_states(hass, write, start_time, end_time=None,
+                              entity_ids=None, filters=None,
+                              include_start_time_state=True, columnar=False):
+    """Write the significant states of a period as JSON, entity by entity.
+
+    Rows are read with a server side cursor and their attributes are copied
+    as stored, so neither the rows nor State objects are kept in memory.
+    The JSON text is passed in chunks to write.
+
+    The result is a list with the states of each entity, ordered by entity
+    id. In the columnar format each entity is an object with the arrays
+    last_changed and states, and attributes as [index, attributes] pairs
+    for the states where they changed.
+    """
+    from homeassistant.components.recorder.models import (
+        States, StateAttributes)
+
+    start_states = {}
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            state.last_changed = start_time
+            state.last_updated = start_time
+            start_states[state.entity_id] = state
+
+    writer = _ChunkWriter(write)
+    writer.add('[')
+
+    with session_scope(hass=hass) as session:
+        statistics, statistics_end, statistics_starts = _get_statistics(
+            hass, session, start_time, end_time, entity_ids, filters)
+
+        native_states = defaultdict(list)
+        for state in statistics:
+            native_states[state.entity_id].append(state)
+        for entity_id, state in start_states.items():
+            native_states[entity_id].insert(0, state)
+
+        query = session.query(
+            States.entity_id, States.domain, States.state,
+            States.last_changed, States.last_updated, States.context_id,
+            States.context_user_id, States.attributes,
+            StateAttributes.shared_attrs,
+        ).outerjoin(
+            StateAttributes,
+            States.attributes_id == StateAttributes.attributes_id)
+
+        query = _filter_significant_states(
+            query, start_time, end_time, entity_ids, filters,
+            statistics_end, statistics_starts)
+
+        rows = query.order_by(
+            States.entity_id, States.last_updated).yield_per(STREAM_YIELD_PER)
+
+        # Entities that only have start states or statistics are written
+        # in order between the entities that have rows.
+        pending = sorted(native_states, reverse=True)
+        first = True
+
+        for entity_id, group in groupby(rows, lambda row: row.entity_id):
+            items = (item for item in map(_row_to_item, group)
+                     if item is not None)
+            while pending and pending[-1] < entity_id:
+                other_id = pending.pop()
+                first = _write_entity(
+                    writer, other_id, _native_items(native_states[other_id]),
+                    columnar, first)
+
+            if pending and pending[-1] == entity_id:
+                pending.pop()
+                items = heapq.merge(
+                    _native_items(native_states[entity_id]), items,
+                    key=lambda item: item[0])
+
+            first = _write_entity(writer, entity_id, items, columnar, first)
+
+        while pending:
+            other_id = pending.pop()
+            first = _write_entity(
+                writer, other_id, _native_items(native_states[other_id]),
+                columnar, first)
+
+    writer.add(']')
+    writer.flush()
+
+
+class _ChunkWriter:
+    """Collect JSON text and pass it on in chunks."""
+
+    def __init__(self, write):
+        """Initialize the writer."""
+        self._write = write
+        self._parts = []
+        self._size = 0
+
+    def add(self, text):
+        """Add text, writing the collected text once a chunk is full."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= STREAM_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write the collected text."""
+        if self._parts:
+            self._write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
+def _row_to_item(row):
+    """Convert a row of the states table to an item to stream.
+
+    Returns None if the state should not be in the history.
+    """
+    shared_attrs = row.shared_attrs
+    if shared_attrs is None:
+        shared_attrs = row.attributes
+
+    # Attributes are only decoded when they are needed for filtering
+    if row.domain == 'script' or '"{}"'.format(ATTR_HIDDEN) in shared_attrs:
+        attributes = json.loads(shared_attrs)
+        if attributes.get(ATTR_HIDDEN, False) or (
+                row.domain == 'script' and
+                not attributes.get(script.ATTR_CAN_CANCEL)):
+            return None
+
+    last_updated = dt_util.as_utc(row.last_updated)
+    return (last_updated, row.state, shared_attrs,
+            dt_util.as_utc(row.last_changed).isoformat(),
+            last_updated.isoformat(), row.context_id, row.context_user_id)
+
+
+def _native_items(states):
+    """Convert State objects to items to stream."""
+    for state in states:
+        yield (state.last_updated, state.state,
+               json.dumps(dict(state.attributes), cls=JSONEncoder),
+               state.last_changed.isoformat(),
+               state.last_updated.isoformat(), state.context.id,
+               state.context.user_id)
+
+
+def _write_entity(writer, entity_id, items, columnar, first):
+    """Write the states of an entity, unless it has none.
+
+    Returns the value of first for the next entity.
+    """
+    dumps = json.dumps
+
+    items = iter(items)
+    head = next(items, None)
+    if head is None:
+        return first
+    items = chain((head,), items)
+
+    if not first:
+        writer.add(',')
+
+    if not columnar:
+        writer.add('[')
+        for idx, (_, state, shared_attrs, last_changed, last_updated,
+                  context_id, user_id) in enumerate(items):
+            writer.add(
+                '{}{{"entity_id": {}, "state": {}, "attributes": {}, '
+                '"last_changed": "{}", "last_updated": "{}", '
+                '"context": {{"id": {}, "user_id": {}}}}}'.format(
+                    ',' if idx else '', dumps(entity_id), dumps(state),
+                    shared_attrs, last_changed, last_updated,
+                    dumps(context_id), dumps(user_id)))
+        writer.add(']')
+        return False
+
+    last_changed_list = []
+    states = []
+    attributes = []
+    previous_attrs = None
+    for idx, (_, state, shared_attrs, last_changed, *_) in enumerate(items):
+        last_changed_list.append('"{}"'.format(last_changed))
+        states.append(dumps(state))
+        if shared_attrs != previous_attrs:
+            attributes.append('[{}, {}]'.format(idx, shared_attrs))
+            previous_attrs = shared_attrs
+
+    writer.add(
+        '{{"entity_id": {}, "last_changed": [{}], "states": [{}], '
+        '"attributes": [{}]}}'.format(
+            dumps(entity_id), ', '.join(last_changed_list),
+            ', '.join(states), ', '.join(attributes)))
+    return False
+
+
+def _filter_significant_states(query, start_time, end_time, entity_ids,
+                               filters, statistics_end, statistics_starts):
+    """Filter a query of the states table on significant states."""
+    from homeassistant.components.recorder.models import States
+
+    query = query.filter(
+        (States.domain.in_(SIGNIFICANT_DOMAINS) |
+         (States.last_changed == States.last_updated)) &
+        (States.last_updated > start_time))
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    if statistics_starts:
+        from sqlalchemy import or_
+
+        # Skip the states that are covered by statistics
+        query = query.filter(
+            (States.last_updated >= statistics_end) |
+            ~or_(*(States.entity_id.in_(ids) &
+                   (States.last_updated >= stat_start)
+                   for stat_start, ids in statistics_starts.items())))
+
+    return query
+
+
+def _get_statistics(hass, session, start_time, end_time, entity_ids,
+                    filters):
+    """Return the states of a period that are served from statistics.
+
+    Returns the states ordered by time, the end of the statistics, and
+    the entity ids grouped by the start of their statistics.
+    """
+    from homeassistant.components.recorder.models import (
+        Statistics, StatisticsShortTerm)
+    from homeassistant.components.recorder.statistics import period_start
+
+    if end_time is None:
+        end_time = dt_util.utcnow()
+
+    period = end_time - start_time
+    if period <= STATISTICS_MIN_RANGE:
+        return [], None, {}
+
+    if period <= SHORT_TERM_STATISTICS_MAX_RANGE:
+        model = StatisticsShortTerm
+    else:
+        model = Statistics
+
+    statistics_end = period_start(model, end_time - RAW_WINDOW)
+
+    query = session.query(model).filter(
+        (model.start >= start_time) & (model.start < statistics_end))
+
+    if filters:
+        query = filters.apply(query, entity_ids, model)
+    elif entity_ids is not None:
+        query = query.filter(model.entity_id.in_(entity_ids))
+
+    statistics = []
+    statistics_starts = defaultdict(list)
+    # Attributes of the entities with statistics, None if hidden
+    attributes = {}
+    for row in query.order_by(model.start):
+        if row.entity_id not in attributes:
+            current = hass.states.get(row.entity_id)
+            attributes[row.entity_id] = current.attributes if current else {}
+            if attributes[row.entity_id].get(ATTR_HIDDEN, False):
+                attributes[row.entity_id] = None
+            else:
+                statistics_starts[row.start].append(row.entity_id)
+
+        if attributes[row.entity_id] is not None:
+            statistics.append(row.to_native(attributes[row.entity_id]))
+
+    return statistics, statistics_end, statistics_starts
+
+
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
@@ -313,6 +610,14 @@ class HistoryPeriodView(HomeAssistantView):
 
         hass = request.app['hass']
 
+        response_format = request.query.get('format')
+        if response_format in (FORMAT_STREAM, FORMAT_COLUMNAR):
+            return await self._stream(
+                request, start_time, end_time, entity_ids,
+                include_start_time_state, response_format == FORMAT_COLUMNAR)
+        if response_format is not None:
+            return self.json_message('Invalid format', HTTP_BAD_REQUEST)
+
         result = await hass.async_add_job(
             get_significant_states, hass, start_time, end_time,
             entity_ids, self.filters, include_start_time_state)
@@ -338,6 +643,35 @@ class HistoryPeriodView(HomeAssistantView):
 
         return await hass.async_add_job(self.json, result)
 
+    async def _stream(self, request, start_time, end_time, entity_ids,
+                      include_start_time_state, columnar):
+        """Stream the history as chunked JSON, ordered by entity id."""
+        hass = request.app['hass']
+
+        response = web.StreamResponse(
+            headers={CONTENT_TYPE: CONTENT_TYPE_JSON})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        def write(text):
+            """Write a chunk from the executor thread."""
+            asyncio.run_coroutine_threadsafe(
+                response.write(text.encode('UTF-8')), hass.loop).result()
+
+        try:
+            await hass.async_add_job(
+                stream_significant_states, hass, write, start_time, end_time,
+                entity_ids, self.filters, include_start_time_state, columnar)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error streaming the history")
+            # The status is sent already, so the connection is closed
+            # before the last chunk to show the body is incomplete
+            request.transport.close()
+            return response
+
+        await response.write_eof()
+        return response
+
 
 class Filters:
     """Container for the configured include and exclude filters."""
@@ -349,7 +683,7 @@ class Filters:
         self.included_entities = []
         self.included_domains = []
 
-    def apply(self, query, entity_ids=None):
+    def apply(self, query, entity_ids=None, model=None):
         """Apply the include/exclude filter on domains and entities on query.
 
         Following rules apply:
@@ -359,43 +693,48 @@ class Filters:
           entities and domains from all the entities in the system.
         * if include and exclude is defined - select the entities specified in
           the include and filter out the ones from the exclude list.
+
+        The filter applies to the states table unless another model with
+        entity_id and domain columns is given.
         """
-        from homeassistant.components.recorder.models import States
+        if model is None:
+            from homeassistant.components.recorder.models import States
+            model = States
 
         # specific entities requested - do not in/exclude anything
         if entity_ids is not None:
-            return query.filter(States.entity_id.in_(entity_ids))
-        query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
+            return query.filter(model.entity_id.in_(entity_ids))
+        query = query.filter(~model.domain.in_(IGNORE_DOMAINS))
 
         filter_query = None
         # filter if only excluded domain is configured
         if self.excluded_domains and not self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.entity_id.in_(self.included_entities)
+                filter_query &= model.entity_id.in_(self.included_entities)
         # filter if only included domain is configured
         elif not self.excluded_domains and self.included_domains:
-            filter_query = States.domain.in_(self.included_domains)
+            filter_query = model.domain.in_(self.included_domains)
             if self.included_entities:
-                filter_query |= States.entity_id.in_(self.included_entities)
+                filter_query |= model.entity_id.in_(self.included_entities)
         # filter if included and excluded domain is configured
         elif self.excluded_domains and self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~model.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= (States.domain.in_(self.included_domains) |
-                                 States.entity_id.in_(self.included_entities))
+                filter_query &= (model.domain.in_(self.included_domains) |
+                                 model.entity_id.in_(self.included_entities))
             else:
-                filter_query &= (States.domain.in_(self.included_domains) & ~
-                                 States.domain.in_(self.excluded_domains))
+                filter_query &= (model.domain.in_(self.included_domains) & ~
+                                 model.domain.in_(self.excluded_domains))
         # no domain filter just included entities
         elif not self.excluded_domains and not self.included_domains and \
                 self.included_entities:
-            filter_query = States.entity_id.in_(self.included_entities)
+            filter_query = model.entity_id.in_(self.included_entities)
         if filter_query is not None:
             query = query.filter(filter_query)
         # finally apply excluded entities filter if configured
         if self.excluded_entities:
-            query = query.filter(~States.entity_id.in_(self.excluded_entities))
+            query = query.filter(~model.entity_id.in_(self.excluded_entities))
         return query
 
 
@@ -5,7 +5,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/logbook/
 """
 from datetime import timedelta
-from itertools import groupby
+from itertools import groupby, islice
 import logging
 
 import voluptuous as vol
@@ -42,6 +42,9 @@ DOMAIN = 'logbook'
 
 GROUP_BY_MINUTES = 15
 
+# Events read from the database per round trip
+EVENTS_YIELD_PER = 1000
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         CONF_EXCLUDE: vol.Schema({
@@ -144,6 +147,16 @@ class LogbookView(HomeAssistantView):
         else:
             period = int(period)
 
+        limit = request.query.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                return self.json_message('Invalid limit', HTTP_BAD_REQUEST)
+
+            if limit < 0:
+                return self.json_message('Invalid limit', HTTP_BAD_REQUEST)
+
         entity_id = request.query.get('entity')
         start_day = dt_util.as_utc(datetime) - timedelta(days=period - 1)
         end_day = start_day + timedelta(days=period)
@@ -151,8 +164,12 @@ class LogbookView(HomeAssistantView):
 
         def json_events():
             """Fetch events and generate JSON."""
-            return self.json(list(
-                _get_events(hass, self.config, start_day, end_day, entity_id)))
+            entries = _get_events(
+                hass, self.config, start_day, end_day, entity_id)
+            try:
+                return self.json(list(islice(entries, limit)))
+            finally:
+                entries.close()
 
         return await hass.async_add_job(json_events)
 
@@ -341,43 +358,8 @@ def humanify(hass, events):
                 }
 
 
-def _get_related_entity_ids(session, entity_filter):
-    from homeassistant.components.recorder.models import States
-    from homeassistant.components.recorder.util import \
-        RETRIES, QUERY_RETRY_WAIT
-    from sqlalchemy.exc import SQLAlchemyError
-    import time
-
-    timer_start = time.perf_counter()
-
-    query = session.query(States).with_entities(States.entity_id).distinct()
-
-    for tryno in range(0, RETRIES):
-        try:
-            result = [
-                row.entity_id for row in query
-                if entity_filter(row.entity_id)]
-
-            if _LOGGER.isEnabledFor(logging.DEBUG):
-                elapsed = time.perf_counter() - timer_start
-                _LOGGER.debug(
-                    'fetching %d distinct domain/entity_id pairs took %fs',
-                    len(result),
-                    elapsed)
-
-            return result
-        except SQLAlchemyError as err:
-            _LOGGER.error("Error executing query: %s", err)
-
-            if tryno == RETRIES - 1:
-                raise
-            else:
-                time.sleep(QUERY_RETRY_WAIT)
-
-
-def _generate_filter_from_config(config):
-    from homeassistant.helpers.entityfilter import generate_filter
-
+def _get_filter_lists(config):
+    """Return the included and excluded domains and entities of config."""
     excluded_entities = []
     excluded_domains = []
     included_entities = []
@@ -392,40 +374,95 @@ def _generate_filter_from_config(config):
         included_entities = include.get(CONF_ENTITIES, [])
         included_domains = include.get(CONF_DOMAINS, [])
 
-    return generate_filter(included_domains, included_entities,
-                           excluded_domains, excluded_entities)
+    return (included_domains, included_entities,
+            excluded_domains, excluded_entities)
+
+
+def _generate_filter_from_config(config):
+    from homeassistant.helpers.entityfilter import generate_filter
+
+    return generate_filter(*_get_filter_lists(config))
+
+
+def _generate_sql_filter_from_config(config):
+    """Return the entity filter of config as a condition on states.
+
+    Mirrors the cases of generate_filter. Returns None if all entities
+    pass.
+    """
+    from homeassistant.components.recorder.models import States
+    from sqlalchemy import false
+
+    include_d, include_e, exclude_d, exclude_e = _get_filter_lists(config)
+
+    def in_(column, values):
+        """Return a condition that column is one of values."""
+        return column.in_(values) if values else false()
+
+    domain_included = in_(States.domain, include_d)
+    domain_excluded = in_(States.domain, exclude_d)
+    entity_included = in_(States.entity_id, include_e)
+    entity_excluded = in_(States.entity_id, exclude_e)
+
+    have_include = bool(include_d or include_e)
+    have_exclude = bool(exclude_d or exclude_e)
+
+    if not have_include and not have_exclude:
+        return None
+
+    if have_include and not have_exclude:
+        return entity_included | domain_included
+
+    if not have_include and have_exclude:
+        return ~entity_excluded & ~domain_excluded
+
+    if include_d:
+        return (domain_included & ~entity_excluded) | \
+            (~domain_included & entity_included)
+
+    if exclude_d:
+        return (domain_excluded & entity_included) | \
+            (~domain_excluded & ~entity_excluded)
+
+    return entity_included
 
 
 def _get_events(hass, config, start_day, end_day, entity_id=None):
-    """Get events for a period of time."""
+    """Get events for a period of time.
+
+    Returns a generator of logbook entries, which reads the events from
+    the database while it is consumed.
+    """
     from homeassistant.components.recorder.models import Events, States
-    from homeassistant.components.recorder.util import (
-        execute, session_scope)
+    from homeassistant.components.recorder.util import session_scope
 
     entities_filter = _generate_filter_from_config(config)
 
     with session_scope(hass=hass) as session:
+        state_filter = States.last_updated == States.last_changed
         if entity_id is not None:
-            entity_ids = [entity_id.lower()]
+            state_filter &= States.entity_id == entity_id.lower()
         else:
-            entity_ids = _get_related_entity_ids(session, entities_filter)
+            entity_condition = _generate_sql_filter_from_config(config)
+            if entity_condition is not None:
+                state_filter &= entity_condition
 
         query = session.query(Events).order_by(Events.time_fired) \
             .outerjoin(States, (Events.event_id == States.event_id)) \
             .filter(Events.event_type.in_(ALL_EVENT_TYPES)) \
             .filter((Events.time_fired > start_day)
                     & (Events.time_fired < end_day)) \
-            .filter(((States.last_updated == States.last_changed) &
-                     States.entity_id.in_(entity_ids))
-                    | (States.state_id.is_(None)))
+            .filter(state_filter | (States.state_id.is_(None)))
 
-        events = execute(query)
+        events = map(Events.to_native, query.yield_per(EVENTS_YIELD_PER))
 
-    return humanify(hass, _exclude_events(events, entities_filter))
+        yield from humanify(hass, _exclude_events(
+            (event for event in events if event is not None),
+            entities_filter))
 
 
 def _exclude_events(events, entities_filter):
-    filtered_events = []
+    """Filter out the events that should not be in the logbook."""
     for event in events:
         domain, entity_id = None, None
 
@@ -487,9 +524,7 @@ def _exclude_events(events, entities_filter):
             entity_id = "%s." % (domain, )
 
         if not entity_id or entities_filter(entity_id):
-            filtered_events.append(event)
-
-    return filtered_events
+            yield event
 
 
 def _entry_message_from_state(domain, state):
@@ -5,6 +5,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/mqtt/
 """
 import asyncio
+from collections import deque
 from itertools import groupby
 import json
 import logging
@@ -12,14 +13,17 @@ from operator import attrgetter
 import os
 import socket
 import ssl
+import threading
 import time
-from typing import Any, Callable, List, Optional, Union, cast  # noqa: F401
+from typing import (  # noqa: F401
+    Any, Callable, Dict, List, Optional, Union, cast)
 
 import attr
 import requests.certs
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components import websocket_api
 from homeassistant.const import (
     CONF_PASSWORD, CONF_PAYLOAD, CONF_PORT, CONF_PROTOCOL, CONF_USERNAME,
     CONF_VALUE_TEMPLATE, EVENT_HOMEASSISTANT_STOP, CONF_NAME)
@@ -105,6 +109,14 @@ ATTR_DISCOVERY_HASH = 'discovery_hash'
 
 MAX_RECONNECT_WAIT = 300  # seconds
 
+# Maximum number of received messages waiting for the event loop
+MESSAGE_BUFFER_SIZE = 10000
+
+WS_TYPE_MESSAGE_BUFFER = 'mqtt/message_buffer'
+SCHEMA_WS_MESSAGE_BUFFER = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): WS_TYPE_MESSAGE_BUFFER,
+})
+
 
 def valid_topic(value: Any) -> str:
     """Validate that this is a valid topic name/filter."""
@@ -537,6 +549,10 @@ async def async_setup_entry(hass, entry):
 
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_mqtt)
 
+    hass.components.websocket_api.async_register_command(
+        WS_TYPE_MESSAGE_BUFFER, websocket_message_buffer,
+        SCHEMA_WS_MESSAGE_BUFFER)
+
     async def async_publish_service(call: ServiceCall):
         """Handle MQTT publish service calls."""
         msg_topic = call.data[ATTR_TOPIC]  # type: str
@@ -579,6 +595,185 @@ class Subscription:
     encoding = attr.ib(type=str, default='utf-8')
 
 
+class _TrieNode:
+    """Node of a subscription trie for one topic level."""
+
+    __slots__ = ('children', 'subscriptions')
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children = {}  # type: Dict[str, _TrieNode]
+        self.subscriptions = []  # type: List[Subscription]
+
+
+class SubscriptionTrie:
+    """Subscriptions organized by topic level, including wildcards.
+
+    Matching a topic walks the levels of the topic instead of testing
+    every subscription, following the rules of paho's MQTTMatcher.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root = _TrieNode()
+
+    def add(self, subscription: Subscription) -> None:
+        """Add a subscription."""
+        node = self._root
+        for level in subscription.topic.split('/'):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TrieNode()
+            node = child
+        node.subscriptions.append(subscription)
+
+    def remove(self, subscription: Subscription) -> None:
+        """Remove a subscription and the nodes that are no longer used."""
+        path = []
+        node = self._root
+        for level in subscription.topic.split('/'):
+            path.append((node, level))
+            node = node.children[level]
+        node.subscriptions.remove(subscription)
+
+        for parent, level in reversed(path):
+            child = parent.children[level]
+            if child.subscriptions or child.children:
+                break
+            del parent.children[level]
+
+    def matches(self, topic: str) -> List[Subscription]:
+        """Return the subscriptions that match a topic."""
+        levels = topic.split('/')
+        # Wildcards don't match the first level of $ topics
+        normal = not topic.startswith('$')
+        result = []  # type: List[Subscription]
+        nodes = [self._root]
+
+        for idx, level in enumerate(levels):
+            wildcards = normal or idx > 0
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                if wildcards and '#' in children:
+                    result.extend(children['#'].subscriptions)
+                if level in children:
+                    next_nodes.append(children[level])
+                if wildcards and '+' in children:
+                    next_nodes.append(children['+'])
+            nodes = next_nodes
+            if not nodes:
+                return result
+
+        for node in nodes:
+            result.extend(node.subscriptions)
+            # A multi level wildcard also matches its parent level
+            if '#' in node.children:
+                result.extend(node.children['#'].subscriptions)
+
+        return result
+
+
+class MessageBuffer:
+    """Bounded buffer handing received messages to the event loop.
+
+    The paho thread appends messages and only schedules a drain on the event
+    loop if none is pending yet, so a burst of messages costs a single loop
+    wakeup instead of one per message.
+
+    When the buffer is full the oldest message is dropped. Bursts are mostly
+    retained topics replayed after a (re)connect, for which the newest
+    message is the one that matters.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 handler: Callable[[Any], None],
+                 size: int = MESSAGE_BUFFER_SIZE) -> None:
+        """Initialize the buffer."""
+        self._loop = loop
+        self._handler = handler
+        self.size = size
+        self._lock = threading.Lock()
+        # (time queued, message)
+        self._messages = deque()  # type: deque
+        self._drain_scheduled = False
+        self._dropped_since_drain = 0
+        self.peak_depth = 0
+        self.dropped = 0
+        self.drains = 0
+        self.messages = 0
+        self.last_drain_latency = 0.0
+        self.max_drain_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of messages waiting for the event loop."""
+        return len(self._messages)
+
+    def put(self, msg) -> None:
+        """Add a message to the buffer.
+
+        This method is thread-safe.
+        """
+        with self._lock:
+            if len(self._messages) >= self.size:
+                self._messages.popleft()
+                self.dropped += 1
+                self._dropped_since_drain += 1
+
+            self._messages.append((time.monotonic(), msg))
+            self.peak_depth = max(self.peak_depth, len(self._messages))
+
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+
+        self._loop.call_soon_threadsafe(self._async_drain)
+
+    @callback
+    def _async_drain(self) -> None:
+        """Handle all buffered messages."""
+        with self._lock:
+            messages = self._messages
+            self._messages = deque()
+            self._drain_scheduled = False
+            dropped = self._dropped_since_drain
+            self._dropped_since_drain = 0
+
+        if dropped:
+            _LOGGER.warning(
+                "MQTT message buffer is full, dropped %s oldest messages",
+                dropped)
+
+        if not messages:
+            return
+
+        latency = time.monotonic() - messages[0][0]
+        self.last_drain_latency = latency
+        self.max_drain_latency = max(self.max_drain_latency, latency)
+        self.drains += 1
+        self.messages += len(messages)
+
+        for _, msg in messages:
+            try:
+                self._handler(msg)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling message on %s", msg.topic)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the state of the buffer for monitoring."""
+        return {
+            'size': self.size,
+            'depth': self.depth,
+            'peak_depth': self.peak_depth,
+            'dropped': self.dropped,
+            'drains': self.drains,
+            'messages': self.messages,
+            'last_drain_latency': self.last_drain_latency,
+            'max_drain_latency': self.max_drain_latency,
+        }
+
+
 @attr.s(slots=True, frozen=True)
 class Message:
     """MQTT Message."""
@@ -608,6 +803,9 @@ class MQTT:
         self.port = port
         self.keepalive = keepalive
         self.subscriptions = []  # type: List[Subscription]
+        self._subscription_trie = SubscriptionTrie()
+        self.message_buffer = MessageBuffer(
+            hass.loop, self._mqtt_handle_message)
         self.birth_message = birth_message
         self._mqttc = None  # type: mqtt.Client
         self._paho_lock = asyncio.Lock(loop=hass.loop)
@@ -697,6 +895,7 @@ class MQTT:
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._subscription_trie.add(subscription)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -706,6 +905,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._subscription_trie.remove(subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -764,25 +964,33 @@ class MQTT:
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
         """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        self.message_buffer.put(msg)
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
         _LOGGER.debug("Received message on %s: %s", msg.topic, msg.payload)
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
+        # Payload per encoding, None if it can't be decoded
+        payloads = {}  # type: Dict[Optional[str], SubscribePayloadType]
 
-            payload = msg.payload  # type: SubscribePayloadType
-            if subscription.encoding is not None:
+        for subscription in self._subscription_trie.matches(msg.topic):
+            encoding = subscription.encoding
+            if encoding in payloads:
+                payload = payloads[encoding]
+            elif encoding is None:
+                payload = payloads[encoding] = msg.payload
+            else:
                 try:
-                    payload = msg.payload.decode(subscription.encoding)
+                    payload = msg.payload.decode(encoding)
                 except (AttributeError, UnicodeDecodeError):
                     _LOGGER.warning(
                         "Can't decode payload %s on %s with encoding %s",
-                        msg.payload, msg.topic, subscription.encoding)
-                    continue
+                        msg.payload, msg.topic, encoding)
+                    payload = None
+                payloads[encoding] = payload
+
+            if payload is None:
+                continue
 
             self.hass.async_run_job(
                 subscription.callback, msg.topic, payload, msg.qos)
@@ -812,6 +1020,13 @@ class MQTT:
             tries += 1
 
 
+@callback
+def websocket_message_buffer(hass, connection, msg):
+    """Return the state of the buffer of received messages."""
+    connection.send_message(websocket_api.result_message(
+        msg['id'], hass.data[DATA_MQTT].message_buffer.as_dict()))
+
+
 def _raise_on_error(result_code: int) -> None:
     """Raise error if error result."""
     if result_code != 0:
@@ -821,18 +1036,6 @@ def _raise_on_error(result_code: int) -> None:
             'Error talking to MQTT: {}'.format(mqtt.error_string(result_code)))
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    from paho.mqtt.matcher import MQTTMatcher
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
-
-
 class MqttAttributes(Entity):
     """Mixin used for platforms that support JSON attributes."""
 
@@ -57,9 +57,14 @@ async def async_setup(hass, config):
     if not base_topic.endswith('/'):
         base_topic = base_topic + '/'
 
+    # The encoded attributes of the last state of each entity, reused while
+    # the states of the entity share the same attributes.
+    encoded_attributes = {}
+
     @callback
     def _state_publisher(entity_id, old_state, new_state):
         if new_state is None:
+            encoded_attributes.pop(entity_id, None)
             return
 
         if not publish_filter(entity_id):
@@ -85,8 +90,15 @@ async def async_setup(hass, config):
                     True)
 
         if publish_attributes:
-            for key, val in new_state.attributes.items():
-                encoded_val = json.dumps(val, cls=JSONEncoder)
+            attributes, encoded = encoded_attributes.get(
+                entity_id, (None, None))
+            if attributes is not new_state.attributes:
+                attributes = new_state.attributes
+                encoded = {key: json.dumps(val, cls=JSONEncoder)
+                           for key, val in attributes.items()}
+                encoded_attributes[entity_id] = (attributes, encoded)
+
+            for key, encoded_val in encoded.items():
                 hass.components.mqtt.async_publish(mybase + key,
                                                    encoded_val, 1, True)
 
@@ -8,14 +8,15 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/recorder/
 """
 import asyncio
-from collections import namedtuple
+from collections import deque, namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
 import logging
+import os
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional  # noqa: F401
+from typing import Any, Dict, List, Optional  # noqa: F401
 
 import voluptuous as vol
 
@@ -23,14 +24,16 @@ from homeassistant.const import (
     ATTR_ENTITY_ID, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE,
     EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED,
     EVENT_TIME_CHANGED, MATCH_ALL)
-from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import LRUCache
 import homeassistant.util.dt as dt_util
 
-from . import migration, purge
+from . import journal, migration, purge
 from .const import DATA_INSTANCE
+from .statistics import StatisticsCompiler
 from .util import session_scope
 
 REQUIREMENTS = ['sqlalchemy==1.2.15']
@@ -55,10 +58,36 @@ DEFAULT_DB_FILE = 'home-assistant_v2.db'
 CONF_DB_URL = 'db_url'
 CONF_PURGE_KEEP_DAYS = 'purge_keep_days'
 CONF_PURGE_INTERVAL = 'purge_interval'
+CONF_PURGE_KEEP_DAYS_OVERRIDES = 'purge_keep_days_overrides'
+CONF_PURGE_KEEP_DAYS_STATISTICS = 'purge_keep_days_statistics'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_MAX_BATCH = 'max_batch'
+CONF_MAX_QUEUE_SIZE = 'max_queue_size'
+CONF_QUEUE_OVERFLOW = 'queue_overflow'
+CONF_OVERFLOW_EVENT_TYPES = 'overflow_event_types'
+
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_DROP_EVENT_TYPES = 'drop_event_types'
+OVERFLOW_JOURNAL = 'journal'
 
 CONNECT_RETRY_WAIT = 3
 
+DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_MAX_BATCH = 1000
+DEFAULT_MAX_QUEUE_SIZE = 30000
+
+JOURNAL_FILE = '.recorder_journal'
+# Events held in memory while they wait to be appended to the journal
+JOURNAL_BUFFER_SIZE = 10000
+
+# Number of purge batches between two progress messages
+PURGE_PROGRESS_BATCHES = 10
+
+ATTRIBUTES_CACHE_SIZE = 2048
+# Number of hashes looked up per query, below the SQLite variable limit
+ATTRIBUTES_QUERY_CHUNK = 500
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -77,7 +106,23 @@ CONFIG_SCHEMA = vol.Schema({
             vol.All(vol.Coerce(int), vol.Range(min=1)),
         vol.Optional(CONF_PURGE_INTERVAL, default=1):
             vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(CONF_PURGE_KEEP_DAYS_OVERRIDES, default={}): {
+            cv.string: vol.All(vol.Coerce(int), vol.Range(min=1)),
+        },
+        vol.Optional(CONF_PURGE_KEEP_DAYS_STATISTICS, default=365):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_MAX_BATCH, default=DEFAULT_MAX_BATCH):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_MAX_QUEUE_SIZE, default=DEFAULT_MAX_QUEUE_SIZE):
+            vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(CONF_QUEUE_OVERFLOW, default=OVERFLOW_DROP_OLDEST):
+            vol.In([OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_EVENT_TYPES,
+                    OVERFLOW_JOURNAL]),
+        vol.Optional(CONF_OVERFLOW_EVENT_TYPES, default=[]):
+            vol.All(cv.ensure_list, [cv.string]),
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -108,6 +153,13 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config.get(DOMAIN, {})
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    keep_days_overrides = conf.get(CONF_PURGE_KEEP_DAYS_OVERRIDES, {})
+    statistics_keep_days = conf.get(CONF_PURGE_KEEP_DAYS_STATISTICS)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    max_batch = conf.get(CONF_MAX_BATCH, DEFAULT_MAX_BATCH)
+    max_queue_size = conf.get(CONF_MAX_QUEUE_SIZE, DEFAULT_MAX_QUEUE_SIZE)
+    queue_overflow = conf.get(CONF_QUEUE_OVERFLOW, OVERFLOW_DROP_OLDEST)
+    overflow_event_types = conf.get(CONF_OVERFLOW_EVENT_TYPES, [])
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -118,7 +170,12 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass, keep_days=keep_days, purge_interval=purge_interval,
-        uri=db_url, include=include, exclude=exclude)
+        uri=db_url, include=include, exclude=exclude,
+        commit_interval=commit_interval, max_batch=max_batch,
+        max_queue_size=max_queue_size, queue_overflow=queue_overflow,
+        overflow_event_types=overflow_event_types,
+        keep_days_overrides=keep_days_overrides,
+        statistics_keep_days=statistics_keep_days)
     instance.async_initialize()
     instance.start()
 
@@ -136,19 +193,79 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 PurgeTask = namedtuple('PurgeTask', ['keep_days', 'repack'])
 
 
+class RecorderQueue(queue.Queue):
+    """Queue of events and tasks for the recorder thread."""
+
+    def drop_oldest(self, predicate):
+        """Remove the oldest queued item that matches predicate.
+
+        Returns if an item was removed.
+        """
+        with self.mutex:
+            for idx, item in enumerate(self.queue):
+                if predicate(item):
+                    del self.queue[idx]
+                    break
+            else:
+                return False
+
+            # Account for the removed item so join() does not wait for it
+            self.unfinished_tasks -= 1
+            if not self.unfinished_tasks:
+                self.all_tasks_done.notify_all()
+            return True
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
     def __init__(self, hass: HomeAssistant, keep_days: int,
                  purge_interval: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+                 max_batch: int = DEFAULT_MAX_BATCH,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 queue_overflow: str = OVERFLOW_DROP_OLDEST,
+                 overflow_event_types: Optional[List[str]] = None,
+                 keep_days_overrides: Optional[Dict[str, int]] = None,
+                 statistics_keep_days: Optional[int] = None) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
-        self.queue = queue.Queue()  # type: Any
+        # Days to keep per entity id or domain, instead of keep_days
+        self.keep_days_overrides = keep_days_overrides or {}
+        # Days to keep hourly statistics, None to keep them forever
+        self.statistics_keep_days = statistics_keep_days
+        # Number of batches the running purge has taken so far
+        self._purge_batches = 0
+        # Rows deleted by the running or the last purge
+        self.purged_rows = 0
+        self.purge_running = False
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.queue = RecorderQueue()  # type: Any
+        self.max_queue_size = max_queue_size
+        self.queue_overflow = queue_overflow
+        self.overflow_event_types = overflow_event_types or []
+        self.dropped_events = 0
+        self.journaled_events = 0
+        self.journal_path = hass.config.path(JOURNAL_FILE)
+        self._journal = None  # type: Any
+        self._journal_lock = threading.Lock()
+        self._journal_pending = False
+        # Overflowing events, appended to the journal by the executor
+        self._journal_buffer = deque()  # type: deque
+        self._journal_write_scheduled = False
+        self._overflowing = False
+        # Ids of recently written attribute texts
+        self._attributes_ids = LRUCache(ATTRIBUTES_CACHE_SIZE)
+        self._statistics = StatisticsCompiler()
+        # Duration in seconds and size of the last committed batch
+        self.commit_latency = None  # type: Optional[float]
+        self.commit_size = 0
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
         self.async_db_ready = asyncio.Future(loop=hass.loop)
@@ -176,9 +293,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -268,73 +384,398 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        # Write events that were spilled to the journal by a previous run
+        self._journal_pending = os.path.exists(self.journal_path) or \
+            os.path.exists(self._replay_path)
+        if self._journal_pending:
+            self._replay_journal()
+
+        # Events are written in batches: a batch is committed once
+        # commit_interval has passed since its first event and the queue is
+        # drained, or as soon as it holds max_batch events.
+        batch = []
+        deadline = None
+
         while True:
-            event = self.queue.get()
+            try:
+                if batch:
+                    event = self.queue.get(
+                        timeout=max(0, deadline - time.monotonic()))
+                else:
+                    event = self.queue.get()
+            except queue.Empty:
+                self._commit_batch(batch)
+                batch = []
+                continue
 
             if event is None:
+                self._commit_batch(batch)
+                self._write_statistics(self._statistics.flush())
+                self._write_journal()
+                self._close_journal()
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
             if isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                self._commit_batch(batch)
+                batch = []
+                self._run_purge(event)
                 self.queue.task_done()
                 continue
-            elif event.event_type == EVENT_TIME_CHANGED:
-                self.queue.task_done()
-                continue
-            elif event.event_type in self.exclude_t:
-                self.queue.task_done()
+
+            if not batch:
+                deadline = time.monotonic() + self.commit_interval
+            batch.append(event)
+
+            if len(batch) >= self.max_batch or (
+                    time.monotonic() >= deadline and self.queue.empty()):
+                self._commit_batch(batch)
+                batch = []
+
+    def _run_purge(self, task):
+        """Purge one batch of old data.
+
+        An unfinished purge is queued again behind the events that arrived
+        meanwhile, so recording doesn't stall while a large purge runs.
+        """
+        if not self.purge_running:
+            self.purge_running = True
+            self.purged_rows = 0
+
+        self._purge_batches += 1
+
+        if not purge.purge_old_data(self, task.keep_days, task.repack):
+            if self._purge_batches % PURGE_PROGRESS_BATCHES == 0:
+                _LOGGER.info("Purging old data, deleted %d rows so far and "
+                             "more remain", self.purged_rows)
+            self.queue.put(task)
+            return
+
+        if self._purge_batches > 1:
+            _LOGGER.info("Purged %d rows of old data in %s batches",
+                         self.purged_rows, self._purge_batches)
+        self._purge_batches = 0
+        self.purge_running = False
+
+    def _commit_batch(self, batch):
+        """Write a batch of events to the database in one transaction."""
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        updated = self._write_batch(batch)
+        self.commit_latency = time.perf_counter() - start
+        self.commit_size = len(batch)
+
+        if updated:
+            self._compile_statistics(batch)
+
+        for _ in batch:
+            self.queue.task_done()
+
+        if updated and self._journal_pending:
+            self._replay_journal()
+
+    def _write_batch(self, batch):
+        """Write events to the database, retrying on connection errors.
+
+        Returns if the events were written.
+        """
+        from sqlalchemy import exc
+
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    attributes_ids = self._add_batch(session, batch)
+                updated = True
+
+                for shared_attrs, attributes_id in attributes_ids.items():
+                    self._attributes_ids[shared_attrs] = attributes_id
+
+            except exc.OperationalError as err:
+                _LOGGER.error("Error in database connectivity: %s. "
+                              "(retrying in %s seconds)", err,
+                              CONNECT_RETRY_WAIT)
+                tries += 1
+
+        if not updated:
+            _LOGGER.error("Error in database update. Could not save "
+                          "after %d tries. Giving up", tries)
+
+        return updated
+
+    def _compile_statistics(self, batch):
+        """Add the states of a written batch to the statistics."""
+        finished = []
+        for event in batch:
+            if event.event_type != EVENT_STATE_CHANGED:
                 continue
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    self.queue.task_done()
-                    continue
-
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
+            new_state = event.data.get('new_state')
+            if new_state is not None:
+                finished.extend(self._statistics.add_state(new_state))
+
+        finished.extend(self._statistics.flush(dt_util.utcnow()))
+        self._write_statistics(finished)
+
+    def _write_statistics(self, finished):
+        """Write the statistics of finished periods."""
+        from sqlalchemy import exc
+
+        if not finished:
+            return
+
+        try:
+            with session_scope(session=self.get_session()) as session:
+                self._statistics.write(session, finished)
+        except exc.SQLAlchemyError as err:
+            _LOGGER.error("Error writing statistics: %s", err)
+
+    @property
+    def _replay_path(self):
+        """Return the path of the journal that is being replayed."""
+        return self.journal_path + '.replay'
+
+    def _close_journal(self):
+        """Close the journal file if it is open."""
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _write_journal(self):
+        """Append the buffered overflow events to the journal.
+
+        Runs in the executor, so the event loop never touches the file.
+        """
+        with self._journal_lock:
+            # Events buffered from here on are either written by this call
+            # or schedule a new one.
+            self._journal_write_scheduled = False
+
+            if not self._journal_buffer:
+                return
+
+            events = []
+            while self._journal_buffer:
+                events.append(self._journal_buffer.popleft())
+
+            try:
+                if self._journal is None:
+                    self._journal = open(
+                        self.journal_path, 'a', encoding='utf-8')
+                journal.append_events(self._journal, events)
+            except OSError as err:
+                _LOGGER.error("Error writing the recorder journal: %s", err)
+                self.dropped_events += len(events)
+                self.journaled_events -= len(events)
+                return
+
+            self._journal_pending = True
+
+    def _replay_journal(self):
+        """Write the events that were spilled to the journal.
+
+        The journal is moved aside first, so the event loop can keep
+        appending to a new journal while the old one is written.
+        """
+        replay_path = self._replay_path
+
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+            # A journal left by a failed replay is written first
+            if not os.path.exists(replay_path) and \
+                    os.path.exists(self.journal_path):
+                os.replace(self.journal_path, replay_path)
+
+            self._journal_pending = os.path.exists(self.journal_path)
+
+        if not os.path.exists(replay_path):
+            return
+
+        written = 0
+        offset = 0
+        batches = journal.read_batches(replay_path, self.max_batch)
+
+        for events, end in batches:
+            if not self._write_batch(events):
+                batches.close()
+                # Keep only the events that were not written yet
+                if offset:
+                    journal.discard_until(replay_path, offset)
+                self._journal_pending = True
+                _LOGGER.warning(
+                    "Wrote %d events from the recorder journal, the rest "
+                    "is written later", written)
+                return
+
+            written += len(events)
+            offset = end
+
+        journal.remove(replay_path)
+        _LOGGER.info("Wrote %d events from the recorder journal", written)
+
+    def _add_batch(self, session, batch):
+        """Add the events and states of a batch to the session.
+
+        Returns the attribute ids to cache once the batch is committed.
+        """
+        from .models import States, Events, StateAttributes
+
+        dbevents = []
+        dbstates = []
+        for event in batch:
+            try:
+                dbevent = Events.from_event(event)
+            except (TypeError, ValueError):
+                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                dbevent = None
+
+            if event.event_type == EVENT_STATE_CHANGED:
                 try:
-                    with session_scope(session=self.get_session()) as session:
-                        try:
-                            dbevent = Events.from_event(event)
-                            session.add(dbevent)
-                            session.flush()
-                        except (TypeError, ValueError):
-                            _LOGGER.warning(
-                                "Event is not JSON serializable: %s", event)
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            try:
-                                dbstate = States.from_event(event)
-                                dbstate.event_id = dbevent.event_id
-                                session.add(dbstate)
-                            except (TypeError, ValueError):
-                                _LOGGER.warning(
-                                    "State is not JSON serializable: %s",
+                    dbstate = States.from_event(event)
+                    dbstates.append((
+                        dbevent, dbstate,
+                        dbstate.state_attributes.shared_attrs))
+                except (TypeError, ValueError):
+                    _LOGGER.warning("State is not JSON serializable: %s",
                                     event.data.get('new_state'))
 
-                    updated = True
+            if dbevent is not None:
+                dbevents.append(dbevent)
 
-                except exc.OperationalError as err:
-                    _LOGGER.error("Error in database connectivity: %s. "
-                                  "(retrying in %s seconds)", err,
-                                  CONNECT_RETRY_WAIT)
-                    tries += 1
+        attributes = self._find_attributes(
+            session, set(shared_attrs for _, _, shared_attrs in dbstates))
 
-            if not updated:
-                _LOGGER.error("Error in database update. Could not save "
-                              "after %d tries. Giving up", tries)
+        # A single flush inserts all events and new attributes and assigns
+        # their ids, which are needed to link the states to them.
+        session.add_all(dbevents)
+        session.add_all(dbattr for dbattr in attributes.values()
+                        if isinstance(dbattr, StateAttributes))
+        session.flush()
 
-            self.queue.task_done()
+        attributes_ids = {
+            shared_attrs: getattr(dbattr, 'attributes_id', dbattr)
+            for shared_attrs, dbattr in attributes.items()}
+
+        for dbevent, dbstate, shared_attrs in dbstates:
+            if dbevent is not None:
+                dbstate.event_id = dbevent.event_id
+            dbstate.attributes_id = attributes_ids[shared_attrs]
+
+        session.bulk_save_objects(dbstate for _, dbstate, _ in dbstates)
+
+        return attributes_ids
+
+    def _find_attributes(self, session, shared_attrs_set):
+        """Return the attributes ids or new rows for attribute texts."""
+        from .models import StateAttributes
+
+        attributes = {}
+        missing = {}
+        for shared_attrs in shared_attrs_set:
+            attributes_id = self._attributes_ids.get(shared_attrs)
+            if attributes_id is not None:
+                attributes[shared_attrs] = attributes_id
+            else:
+                missing.setdefault(StateAttributes.hash_shared_attrs(
+                    shared_attrs), []).append(shared_attrs)
+
+        hashes = list(missing)
+        for idx in range(0, len(hashes), ATTRIBUTES_QUERY_CHUNK):
+            query = session.query(
+                StateAttributes.attributes_id, StateAttributes.hash,
+                StateAttributes.shared_attrs).filter(
+                    StateAttributes.hash.in_(
+                        hashes[idx:idx + ATTRIBUTES_QUERY_CHUNK]))
+            for attributes_id, attr_hash, shared_attrs in query:
+                if shared_attrs in missing.get(attr_hash, ()):
+                    attributes[shared_attrs] = attributes_id
+
+        for attr_hash, shared_attrs_list in missing.items():
+            for shared_attrs in shared_attrs_list:
+                if shared_attrs not in attributes:
+                    attributes[shared_attrs] = StateAttributes(
+                        hash=attr_hash, shared_attrs=shared_attrs)
+
+        return attributes
+
+    def clear_attributes_cache(self):
+        """Forget the ids of recently written attributes."""
+        self._attributes_ids.clear()
+
+    @property
+    def queue_depth(self):
+        """Return the number of items waiting to be recorded."""
+        return self.queue.qsize()
 
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
+        if event.event_type == EVENT_TIME_CHANGED or \
+                event.event_type in self.exclude_t:
+            return
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        if entity_id is not None and not self.entity_filter(entity_id):
+            return
+
+        if self.max_queue_size and \
+                self.queue.qsize() >= self.max_queue_size:
+            self._async_queue_overflow(event)
+            return
+
+        self._overflowing = False
+        self.queue.put(event)
+
+    @callback
+    def _async_queue_overflow(self, event):
+        """Handle an event that does not fit in the queue."""
+        if not self._overflowing:
+            self._overflowing = True
+            _LOGGER.warning(
+                "The recorder queue reached its maximum size of %d events, "
+                "applying the %s overflow policy", self.max_queue_size,
+                self.queue_overflow)
+
+        if self.queue_overflow == OVERFLOW_JOURNAL:
+            if len(self._journal_buffer) >= JOURNAL_BUFFER_SIZE:
+                # The oldest event is dropped instead of journaled
+                self._journal_buffer.popleft()
+                self.dropped_events += 1
+                self.journaled_events -= 1
+            self.journaled_events += 1
+            self._journal_buffer.append(event)
+
+            if not self._journal_write_scheduled:
+                self._journal_write_scheduled = True
+                self.hass.async_add_executor_job(self._write_journal)
+            return
+
+        self.dropped_events += 1
+
+        if self.queue_overflow == OVERFLOW_DROP_EVENT_TYPES:
+            def droppable(item):
+                """Return if item is an event of an overflow event type."""
+                return isinstance(item, Event) and \
+                    item.event_type in self.overflow_event_types
+
+            if self.queue.drop_oldest(droppable):
+                self.queue.put(event)
+                return
+
+            if droppable(event):
+                return
+
+        self.queue.drop_oldest(lambda item: isinstance(item, Event))
         self.queue.put(event)
 
     def block_till_done(self):
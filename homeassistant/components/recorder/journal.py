@@ -0,0 +1,88 @@
+"""On-disk journal for events the recorder queue could not hold."""
+import json
+import logging
+import os
+import shutil
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, EventOrigin, State
+from homeassistant.helpers.json import JSONEncoder
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def append_events(journal, events):
+    """Append events as JSON lines to an open journal file."""
+    journal.write(''.join(
+        json.dumps(event.as_dict(), cls=JSONEncoder) + '\n'
+        for event in events))
+    journal.flush()
+
+
+def read_batches(path, size):
+    """Read the events stored in a journal file in batches.
+
+    Yields lists of at most size events, each with the offset in the file
+    after its last event, so the file is never loaded at once. Lines that
+    can't be parsed, for example a line that was only partially written
+    before a crash, are skipped.
+    """
+    events = []
+    offset = 0
+
+    with open(path, 'rb') as journal:
+        for line in journal:
+            offset += len(line)
+            try:
+                events.append(_event_from_dict(json.loads(line.decode())))
+            except (ValueError, KeyError, TypeError):
+                _LOGGER.warning("Skipping invalid recorder journal entry")
+                continue
+
+            if len(events) >= size:
+                yield events, offset
+                events = []
+
+    if events:
+        yield events, offset
+
+
+def discard_until(path, offset):
+    """Remove the part of a journal file before offset.
+
+    The rest is copied to a new file that replaces the journal, so a crash
+    leaves either the old or the new journal.
+    """
+    temp_path = path + '.tmp'
+
+    with open(path, 'rb') as journal, open(temp_path, 'wb') as rest:
+        journal.seek(offset)
+        shutil.copyfileobj(journal, rest)
+
+    os.replace(temp_path, path)
+
+
+def remove(path):
+    """Remove a journal file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _event_from_dict(data):
+    """Restore an event from its dictionary representation."""
+    event_data = data['data']
+
+    if data['event_type'] == EVENT_STATE_CHANGED:
+        for key in ('old_state', 'new_state'):
+            event_data[key] = State.from_dict(event_data.get(key))
+
+    return Event(
+        data['event_type'],
+        event_data,
+        EventOrigin(data['origin']),
+        dt_util.parse_datetime(data['time_fired']),
+        Context(**data['context']),
+    )
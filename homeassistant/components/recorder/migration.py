@@ -220,6 +220,17 @@ def _apply_update(engine, new_version, old_version):
         _create_index(engine, "states", "ix_states_context_user_id")
     elif new_version == 7:
         _create_index(engine, "states", "ix_states_entity_id")
+    elif new_version == 8:
+        # The state_attributes table is created with the other tables
+        _add_columns(engine, "states", [
+            'attributes_id INTEGER REFERENCES state_attributes(attributes_id)',
+        ])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 9:
+        # The statistics tables are created with the other tables
+        pass
+    elif new_version == 10:
+        _create_index(engine, "events", "ix_events_event_type_time_fired")
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
@@ -1,26 +1,35 @@
 """Models for SQLAlchemy."""
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+import zlib
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
-from sqlalchemy.ext.declarative import declarative_base
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String,
+    Text, distinct)
+from sqlalchemy.ext.declarative import declarative_base, declared_attr
+from sqlalchemy.orm import relationship
 
+from homeassistant.util import LRUCache
 import homeassistant.util.dt as dt_util
 from homeassistant.core import (
     Context, Event, EventOrigin, State, split_entity_id)
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSONEncoder, event_data_json
+
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 7
+SCHEMA_VERSION = 10
 
 _LOGGER = logging.getLogger(__name__)
 
+# Decoded attributes of recently read state attribute rows, keyed by the
+# JSON text so many states sharing the same attributes are parsed once.
+ATTRIBUTES_CACHE_SIZE = 2048
+_ATTRIBUTES_CACHE = LRUCache(ATTRIBUTES_CACHE_SIZE)
+
 
 class Events(Base):  # type: ignore
     """Event history data."""
@@ -35,11 +44,19 @@ class Events(Base):  # type: ignore
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
 
+    __table_args__ = (
+        # Used for fetching events of some types during a period
+        # (_get_events in logbook.py)
+        Index('ix_events_event_type_time_fired', 'event_type', 'time_fired'),
+    )
+
     @staticmethod
     def from_event(event):
         """Create an event database object from a native event."""
+        event_data = _encode_json(event_data_json, event, event.data)
+
         return Events(event_type=event.event_type,
-                      event_data=json.dumps(event.data, cls=JSONEncoder),
+                      event_data=event_data,
                       origin=str(event.origin),
                       time_fired=event.time_fired,
                       context_id=event.context.id,
@@ -73,6 +90,7 @@ class States(Base):   # type: ignore
     domain = Column(String(64))
     entity_id = Column(String(255), index=True)
     state = Column(String(255))
+    # Only used by rows written before attributes were deduplicated
     attributes = Column(Text)
     event_id = Column(Integer, ForeignKey('events.event_id'), index=True)
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
@@ -81,6 +99,9 @@ class States(Base):   # type: ignore
     created = Column(DateTime(timezone=True), default=datetime.utcnow)
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
+    attributes_id = Column(
+        Integer, ForeignKey('state_attributes.attributes_id'), index=True)
+    state_attributes = relationship('StateAttributes', lazy='joined')
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -99,20 +120,18 @@ class States(Base):   # type: ignore
             entity_id=entity_id,
             context_id=event.context.id,
             context_user_id=event.context.user_id,
+            state_attributes=StateAttributes.from_event(event),
         )
 
         # State got deleted
         if state is None:
             dbstate.state = ''
             dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = '{}'
             dbstate.last_changed = event.time_fired
             dbstate.last_updated = event.time_fired
         else:
             dbstate.domain = state.domain
             dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes),
-                                            cls=JSONEncoder)
             dbstate.last_changed = state.last_changed
             dbstate.last_updated = state.last_updated
 
@@ -124,10 +143,14 @@ class States(Base):   # type: ignore
             id=self.context_id,
             user_id=self.context_user_id
         )
+        if self.state_attributes is not None:
+            shared_attrs = self.state_attributes.shared_attrs
+        else:
+            shared_attrs = self.attributes
         try:
             return State(
                 self.entity_id, self.state,
-                json.loads(self.attributes),
+                _decode_attributes(shared_attrs),
                 _process_timestamp(self.last_changed),
                 _process_timestamp(self.last_updated),
                 context=context,
@@ -138,6 +161,80 @@ class States(Base):   # type: ignore
             return None
 
 
+class StateAttributes(Base):   # type: ignore
+    """State attributes shared by all states that have them."""
+
+    __tablename__ = 'state_attributes'
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(Integer, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def from_event(event):
+        """Create an attributes object from a state_changed event."""
+        state = event.data.get('new_state')
+        if state is None:
+            shared_attrs = '{}'
+        else:
+            shared_attrs = _encode_json(
+                State.attributes_json, state, dict(state.attributes))
+
+        return StateAttributes(
+            hash=StateAttributes.hash_shared_attrs(shared_attrs),
+            shared_attrs=shared_attrs)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the hash used to look up attributes by their content."""
+        return zlib.crc32(shared_attrs.encode('utf-8'))
+
+
+class StatisticsBase:
+    """Aggregated values of a numeric entity during one period."""
+
+    # Table name and duration covered by a row, set by subclasses
+    __tablename__ = None  # type: str
+    period = None  # type: timedelta
+
+    id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    domain = Column(String(64))
+    start = Column(DateTime(timezone=True))
+    mean = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+
+    @declared_attr
+    def __table_args__(cls):  # pylint: disable=no-self-argument
+        """Index the rows of an entity by the start of their period."""
+        return (
+            Index('ix_{}_entity_id_start'.format(cls.__tablename__),
+                  'entity_id', 'start'),
+        )
+
+    def to_native(self, attributes=None):
+        """Convert to an HA state holding the mean of the period."""
+        start = _process_timestamp(self.start)
+        return State(self.entity_id, str(self.mean), attributes,
+                     start, start)
+
+
+class StatisticsShortTerm(Base, StatisticsBase):   # type: ignore
+    """Statistics of numeric entities per 5 minutes."""
+
+    __tablename__ = 'statistics_short_term'
+    period = timedelta(minutes=5)
+
+
+class Statistics(Base, StatisticsBase):   # type: ignore
+    """Statistics of numeric entities per hour."""
+
+    __tablename__ = 'statistics'
+    period = timedelta(hours=1)
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -186,6 +283,26 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+def _encode_json(encode, obj, value):
+    """Return encode(obj), or the lenient JSON of value if it is invalid.
+
+    Values like NaN are not valid JSON, but were always recorded.
+    """
+    try:
+        return encode(obj)
+    except ValueError:
+        return json.dumps(value, cls=JSONEncoder)
+
+
+def _decode_attributes(shared_attrs):
+    """Decode the JSON text of state attributes."""
+    attributes = _ATTRIBUTES_CACHE.get(shared_attrs)
+    if attributes is None:
+        attributes = json.loads(shared_attrs)
+        _ATTRIBUTES_CACHE[shared_attrs] = attributes
+    return attributes
+
+
 def _process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
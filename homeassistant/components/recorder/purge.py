@@ -8,25 +8,82 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of rows deleted from a table per call
+PURGE_BATCH_SIZE = 1000
+
 
 def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
+    """Purge events, states and statistics older than purge_days ago.
+
+    Rows are deleted in batches of at most PURGE_BATCH_SIZE rows, lowest
+    primary keys first, so the recorder can write the events queued in the
+    meantime between two calls.
+
+    Returns True when all old data is purged, False if more batches remain.
+    """
+    from .models import (
+        States, Events, StateAttributes, Statistics, StatisticsShortTerm)
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
     _LOGGER.debug("Purging events before %s", purge_before)
 
+    overrides = getattr(instance, 'keep_days_overrides', None) or {}
+    statistics_keep_days = getattr(instance, 'statistics_keep_days', None)
+
     with session_scope(session=instance.get_session()) as session:
-        deleted_rows = session.query(States) \
-            .filter((States.last_updated < purge_before)) \
-            .delete(synchronize_session=False)
+        deleted_rows, finished = _purge_batch(
+            instance, session, States, States.state_id,
+            _states_condition(purge_before, overrides))
         _LOGGER.debug("Deleted %s states", deleted_rows)
 
-        deleted_rows = session.query(Events) \
-            .filter((Events.time_fired < purge_before)) \
-            .delete(synchronize_session=False)
+        if not finished:
+            return False
+
+        # Events of states that are kept for longer are kept as well
+        deleted_rows, finished = _purge_batch(
+            instance, session, Events, Events.event_id,
+            (Events.time_fired < purge_before) &
+            ~session.query(States.state_id).filter(
+                States.event_id == Events.event_id).exists())
         _LOGGER.debug("Deleted %s events", deleted_rows)
 
+        if not finished:
+            return False
+
+        # Remove attributes that are no longer used by any state
+        deleted_rows, finished = _purge_batch(
+            instance, session, StateAttributes, StateAttributes.attributes_id,
+            ~session.query(States.state_id).filter(
+                States.attributes_id == StateAttributes.attributes_id)
+            .exists())
+
+    # Deleted attribute ids may be reused by the database
+    if deleted_rows:
+        instance.clear_attributes_cache()
+
+    if not finished:
+        return False
+
+    with session_scope(session=instance.get_session()) as session:
+        deleted_rows, finished = _purge_batch(
+            instance, session, StatisticsShortTerm, StatisticsShortTerm.id,
+            StatisticsShortTerm.start < purge_before)
+        _LOGGER.debug("Deleted %s short term statistics", deleted_rows)
+
+        if not finished:
+            return False
+
+        # Hourly statistics are kept for longer than the states
+        if statistics_keep_days is not None:
+            deleted_rows, finished = _purge_batch(
+                instance, session, Statistics, Statistics.id,
+                Statistics.start < dt_util.utcnow() -
+                timedelta(days=statistics_keep_days))
+            _LOGGER.debug("Deleted %s statistics", deleted_rows)
+
+            if not finished:
+                return False
+
     # Execute sqlite vacuum command to free up space on disk
     _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
     if repack and instance.engine.driver == 'pysqlite':
@@ -37,3 +94,58 @@ def purge_old_data(instance, purge_days, repack):
             instance.engine.execute("VACUUM")
         except exc.OperationalError as err:
             _LOGGER.error("Error vacuuming SQLite: %s.", err)
+
+    return True
+
+
+def _purge_batch(instance, session, model, id_column, condition):
+    """Delete the rows with the lowest ids that match condition.
+
+    The deleted rows are added to the purged_rows of the recorder.
+    Returns the number of deleted rows and if no matching rows remain.
+    """
+    ids = [row[0] for row in session.query(id_column).filter(condition)
+           .order_by(id_column).limit(PURGE_BATCH_SIZE)]
+
+    if not ids:
+        return 0, True
+
+    deleted_rows = session.query(model) \
+        .filter(id_column.between(ids[0], ids[-1]) & condition) \
+        .delete(synchronize_session=False)
+    instance.purged_rows += deleted_rows
+
+    return deleted_rows, len(ids) < PURGE_BATCH_SIZE
+
+
+def _states_condition(purge_before, overrides):
+    """Return the condition for states to purge.
+
+    Overrides map an entity id or a domain to its own number of days to
+    keep. Entity overrides take precedence over domain overrides.
+    """
+    from .models import States
+
+    entities = {key: days for key, days in overrides.items() if '.' in key}
+    domains = {key: days for key, days in overrides.items()
+               if '.' not in key}
+    now = dt_util.utcnow()
+
+    condition = States.last_updated < purge_before
+    if domains:
+        condition &= ~States.domain.in_(domains)
+    if entities:
+        condition &= ~States.entity_id.in_(entities)
+
+    for entity_id, days in entities.items():
+        condition |= (States.entity_id == entity_id) & \
+            (States.last_updated < now - timedelta(days=days))
+
+    for domain, days in domains.items():
+        domain_condition = (States.domain == domain) & \
+            (States.last_updated < now - timedelta(days=days))
+        if entities:
+            domain_condition &= ~States.entity_id.in_(entities)
+        condition |= domain_condition
+
+    return condition
@@ -0,0 +1,155 @@
+"""Incrementally compiled statistics of numeric entities."""
+from datetime import datetime
+import logging
+import math
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def period_start(model, timestamp):
+    """Return the start of the period of model that contains timestamp."""
+    timestamp = dt_util.as_utc(timestamp)
+    period = int(model.period.total_seconds())
+    seconds = int(timestamp.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % period, dt_util.UTC)
+
+
+def numeric_value(state):
+    """Return the value of a state that has statistics, or None."""
+    if ATTR_UNIT_OF_MEASUREMENT not in state.attributes:
+        return None
+
+    try:
+        value = float(state.state)
+    except ValueError:
+        return None
+
+    return value if math.isfinite(value) else None
+
+
+class _Bucket:
+    """Values of an entity collected during one period."""
+
+    __slots__ = ('start', 'domain', 'min', 'max', 'total', 'count', 'last')
+
+    def __init__(self, start, domain, value):
+        """Initialize a bucket with its first value."""
+        self.start = start
+        self.domain = domain
+        self.min = self.max = self.total = self.last = value
+        self.count = 1
+
+    def add(self, value):
+        """Add a value to the bucket."""
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += value
+        self.last = value
+        self.count += 1
+
+
+class StatisticsCompiler:
+    """Compile statistics from the states written by the recorder.
+
+    Values are collected in memory per entity and period. A row is only
+    written once its period is over, so every period costs one row per
+    entity instead of one row per state.
+    """
+
+    def __init__(self):
+        """Initialize the compiler."""
+        from .models import Statistics, StatisticsShortTerm
+
+        self.models = (StatisticsShortTerm, Statistics)
+        # (model, entity_id) -> bucket of the current period
+        self._buckets = {}
+        self._next_flush = None
+
+    def add_state(self, state):
+        """Add a recorded state.
+
+        Returns the finished buckets as (model, entity_id, bucket) tuples.
+        """
+        value = numeric_value(state)
+        if value is None:
+            return []
+
+        finished = []
+        for model in self.models:
+            start = period_start(model, state.last_updated)
+            key = (model, state.entity_id)
+            bucket = self._buckets.get(key)
+
+            if bucket is not None and bucket.start == start:
+                bucket.add(value)
+                continue
+
+            if bucket is not None:
+                finished.append((model, state.entity_id, bucket))
+
+            self._buckets[key] = _Bucket(start, state.domain, value)
+
+            end = start + model.period
+            if self._next_flush is None or end < self._next_flush:
+                self._next_flush = end
+
+        return finished
+
+    def flush(self, now=None):
+        """Finish the buckets of the periods that ended before now.
+
+        All buckets are finished if now is None.
+        """
+        if now is not None and (self._next_flush is None or
+                                now < self._next_flush):
+            return []
+
+        finished = []
+        next_flush = None
+        for key, bucket in list(self._buckets.items()):
+            model, entity_id = key
+            end = bucket.start + model.period
+
+            if now is None or end <= now:
+                finished.append((model, entity_id, bucket))
+                del self._buckets[key]
+            elif next_flush is None or end < next_flush:
+                next_flush = end
+
+        self._next_flush = next_flush
+        return finished
+
+    @staticmethod
+    def write(session, finished):
+        """Write finished buckets to the database.
+
+        A bucket is merged into an existing row for the same period, which
+        exists if the period was already partly written before a restart.
+        """
+        for model, entity_id, bucket in finished:
+            row = session.query(model).filter(
+                (model.entity_id == entity_id) &
+                (model.start == bucket.start)).first()
+
+            if row is None:
+                session.add(model(
+                    entity_id=entity_id,
+                    domain=bucket.domain,
+                    start=bucket.start,
+                    mean=bucket.total / bucket.count,
+                    min=bucket.min,
+                    max=bucket.max,
+                    last=bucket.last,
+                    count=bucket.count,
+                ))
+                continue
+
+            count = row.count + bucket.count
+            row.mean = (row.mean * row.count + bucket.total) / count
+            row.min = min(row.min, bucket.min)
+            row.max = max(row.max, bucket.max)
+            row.last = bucket.last
+            row.count = count
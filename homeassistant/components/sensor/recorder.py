@@ -0,0 +1,99 @@
+"""
+Sensors to monitor the Home Assistant recorder.
+
+For more details about this platform, please refer to the documentation at
+https://home-assistant.io/components/sensor.recorder/
+"""
+import logging
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.helpers.entity import Entity
+
+_LOGGER = logging.getLogger(__name__)
+
+DEPENDENCIES = ['recorder']
+
+ICON = 'mdi:database'
+
+
+async def async_setup_platform(
+        hass, config, async_add_entities, discovery_info=None):
+    """Set up the recorder sensor platform."""
+    instance = hass.data[DATA_INSTANCE]
+
+    async_add_entities([
+        RecorderQueueDepthSensor(instance),
+        RecorderCommitLatencySensor(instance),
+    ], True)
+
+
+class RecorderSensor(Entity):
+    """Base class for a recorder sensor."""
+
+    def __init__(self, instance):
+        """Initialize the recorder sensor."""
+        self._instance = instance
+        self._state = None
+
+    @property
+    def icon(self):
+        """Icon to display in the front end."""
+        return ICON
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._state
+
+
+class RecorderQueueDepthSensor(RecorderSensor):
+    """Representation of the number of events waiting to be recorded."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'Recorder queue depth'
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement the value is expressed in."""
+        return 'events'
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes of the sensor."""
+        return {
+            'max_queue_size': self._instance.max_queue_size,
+            'dropped_events': self._instance.dropped_events,
+            'journaled_events': self._instance.journaled_events,
+            'purge_running': self._instance.purge_running,
+            'purged_rows': self._instance.purged_rows,
+        }
+
+    async def async_update(self):
+        """Update the state of the sensor."""
+        self._state = self._instance.queue_depth
+
+
+class RecorderCommitLatencySensor(RecorderSensor):
+    """Representation of the duration of the last recorder commit."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return 'Recorder commit latency'
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement the value is expressed in."""
+        return 'ms'
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes of the sensor."""
+        return {'batch_size': self._instance.commit_size}
+
+    async def async_update(self):
+        """Update the state of the sensor."""
+        latency = self._instance.commit_latency
+        self._state = None if latency is None else round(latency * 1000, 1)
@@ -9,18 +9,18 @@ from typing import Optional
 
 import voluptuous as vol
 
-from homeassistant.core import callback
+from homeassistant.core import callback, split_entity_id
 from homeassistant.components.sensor import ENTITY_ID_FORMAT, \
     PLATFORM_SCHEMA, DEVICE_CLASSES_SCHEMA
 from homeassistant.const import (
     ATTR_FRIENDLY_NAME, ATTR_UNIT_OF_MEASUREMENT, CONF_VALUE_TEMPLATE,
     CONF_ICON_TEMPLATE, CONF_ENTITY_PICTURE_TEMPLATE, ATTR_ENTITY_ID,
     CONF_SENSORS, EVENT_HOMEASSISTANT_START, CONF_FRIENDLY_NAME_TEMPLATE,
-    MATCH_ALL, CONF_DEVICE_CLASS)
-from homeassistant.exceptions import TemplateError
+    CONF_DEVICE_CLASS)
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity, async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_render_info, async_track_state_change)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -54,43 +54,13 @@ async def async_setup_platform(hass, config, async_add_entities,
         friendly_name_template = device_config.get(CONF_FRIENDLY_NAME_TEMPLATE)
         unit_of_measurement = device_config.get(ATTR_UNIT_OF_MEASUREMENT)
         device_class = device_config.get(CONF_DEVICE_CLASS)
+        # Without entity ids the states accessed by the templates are tracked
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
 
-        entity_ids = set()
-        manual_entity_ids = device_config.get(ATTR_ENTITY_ID)
-        invalid_templates = []
-
-        for tpl_name, template in (
-                (CONF_VALUE_TEMPLATE, state_template),
-                (CONF_ICON_TEMPLATE, icon_template),
-                (CONF_ENTITY_PICTURE_TEMPLATE, entity_picture_template),
-                (CONF_FRIENDLY_NAME_TEMPLATE, friendly_name_template),
-        ):
-            if template is None:
-                continue
-            template.hass = hass
-
-            if manual_entity_ids is not None:
-                continue
-
-            template_entity_ids = template.extract_entities()
-            if template_entity_ids == MATCH_ALL:
-                entity_ids = MATCH_ALL
-                # Cut off _template from name
-                invalid_templates.append(tpl_name[:-9])
-            elif entity_ids != MATCH_ALL:
-                entity_ids |= set(template_entity_ids)
-
-        if invalid_templates:
-            _LOGGER.warning(
-                'Template sensor %s has no entity ids configured to track nor'
-                ' were we able to extract the entities to track from the %s '
-                'template(s). This entity will only be able to be updated '
-                'manually.', device, ', '.join(invalid_templates))
-
-        if manual_entity_ids is not None:
-            entity_ids = manual_entity_ids
-        elif entity_ids != MATCH_ALL:
-            entity_ids = list(entity_ids)
+        for template in (state_template, icon_template,
+                         entity_picture_template, friendly_name_template):
+            if template is not None:
+                template.hass = hass
 
         sensors.append(
             SensorTemplate(
@@ -134,27 +104,78 @@ class SensorTemplate(Entity):
         self._entity_picture = None
         self._entities = entity_ids
         self._device_class = device_class
+        self._remove_listener = None
+        self._removed = False
+        self._untracked_warned = False
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        @callback
-        def template_sensor_state_listener(entity, old_state, new_state):
-            """Handle device state changes."""
-            self.async_schedule_update_ha_state(True)
-
         @callback
         def template_sensor_startup(event):
             """Update template on startup."""
-            if self._entities != MATCH_ALL:
-                # Track state change only for valid templates
-                async_track_state_change(
-                    self.hass, self._entities, template_sensor_state_listener)
+            if self._entities is not None:
+                self._remove_listener = async_track_state_change(
+                    self.hass, self._entities,
+                    self._async_template_sensor_state_listener)
 
             self.async_schedule_update_ha_state(True)
 
         self.hass.bus.async_listen_once(
             EVENT_HOMEASSISTANT_START, template_sensor_startup)
 
+    async def async_will_remove_from_hass(self):
+        """Remove the state listener."""
+        self._removed = True
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+
+    @callback
+    def _async_template_sensor_state_listener(self, entity, old_state,
+                                              new_state):
+        """Handle device state changes."""
+        self.async_schedule_update_ha_state(True)
+
+    @callback
+    def _async_track_renders(self, render_infos):
+        """Track the states accessed by the last render of the templates."""
+        if self._entities is not None or self._removed:
+            return
+
+        self._async_warn_untracked(render_infos)
+
+        if self._remove_listener is not None:
+            self._remove_listener()
+        self._remove_listener = async_track_render_info(
+            self.hass, render_infos,
+            self._async_template_sensor_state_listener)
+
+    @callback
+    def _async_warn_untracked(self, render_infos):
+        """Warn once about templates that did not access any states."""
+        if self._untracked_warned:
+            return
+
+        untracked = [
+            name for name, template in (
+                ('value', self._template),
+                ('icon', self._icon_template),
+                ('entity_picture', self._entity_picture_template),
+                ('friendly_name', self._friendly_name_template))
+            for render_info in render_infos
+            if render_info.template is template and not (
+                render_info.entities or render_info.domains or
+                render_info.all_states)]
+
+        if untracked:
+            self._untracked_warned = True
+            _LOGGER.warning(
+                'Template sensor %s has no entity ids configured to track nor'
+                ' were we able to extract the entities to track from the %s '
+                'template(s). These templates are only rendered again when '
+                'the entity is updated.', split_entity_id(self.entity_id)[1],
+                ', '.join(untracked))
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -192,9 +213,13 @@ class SensorTemplate(Entity):
 
     async def async_update(self):
         """Update the state from the template."""
-        try:
-            self._state = self._template.async_render()
-        except TemplateError as ex:
+        render_info = self._template.async_render_to_info()
+        render_infos = [render_info]
+
+        if render_info.exception is None:
+            self._state = render_info.result
+        else:
+            ex = render_info.exception
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
                 # Common during HA startup - so just a warning
@@ -211,21 +236,28 @@ class SensorTemplate(Entity):
             if template is None:
                 continue
 
+            render_info = template.async_render_to_info()
+            render_infos.append(render_info)
+
+            if render_info.exception is None:
+                setattr(self, property_name, render_info.result)
+                continue
+
+            ex = render_info.exception
+            friendly_property_name = property_name[1:].replace('_', ' ')
+            if ex.args and ex.args[0].startswith(
+                    "UndefinedError: 'None' has no attribute"):
+                # Common during HA startup - so just a warning
+                _LOGGER.warning('Could not render %s template %s,'
+                                ' the state is unknown.',
+                                friendly_property_name, self._name)
+                continue
+
             try:
-                setattr(self, property_name, template.async_render())
-            except TemplateError as ex:
-                friendly_property_name = property_name[1:].replace('_', ' ')
-                if ex.args and ex.args[0].startswith(
-                        "UndefinedError: 'None' has no attribute"):
-                    # Common during HA startup - so just a warning
-                    _LOGGER.warning('Could not render %s template %s,'
-                                    ' the state is unknown.',
-                                    friendly_property_name, self._name)
-                    continue
-
-                try:
-                    setattr(self, property_name,
-                            getattr(super(), property_name))
-                except AttributeError:
-                    _LOGGER.error('Could not render %s template %s: %s',
-                                  friendly_property_name, self._name, ex)
+                setattr(self, property_name,
+                        getattr(super(), property_name))
+            except AttributeError:
+                _LOGGER.error('Could not render %s template %s: %s',
+                              friendly_property_name, self._name, ex)
+
+        self._async_track_renders(render_infos)
@@ -4,8 +4,11 @@ import voluptuous as vol
 from homeassistant.const import MATCH_ALL, EVENT_TIME_CHANGED
 from homeassistant.core import callback, DOMAIN as HASS_DOMAIN
 from homeassistant.exceptions import Unauthorized, ServiceNotFound
-from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import config_validation as cv, template
+from homeassistant.helpers.entity_component import DATA_INSTANCES
+from homeassistant.helpers.json import async_get_json_cache
 from homeassistant.helpers.service import async_get_all_descriptions
+from homeassistant.setup import async_get_setup_timeline
 
 from . import const, decorators, messages
 
@@ -13,8 +16,11 @@ from . import const, decorators, messages
 TYPE_CALL_SERVICE = 'call_service'
 TYPE_EVENT = 'event'
 TYPE_GET_CONFIG = 'get_config'
+TYPE_GET_POLLING_STATS = 'get_polling_stats'
 TYPE_GET_SERVICES = 'get_services'
+TYPE_GET_STARTUP_TIMELINE = 'get_startup_timeline'
 TYPE_GET_STATES = 'get_states'
+TYPE_GET_TEMPLATE_CACHE_INFO = 'get_template_cache_info'
 TYPE_PING = 'ping'
 TYPE_PONG = 'pong'
 TYPE_SUBSCRIBE_EVENTS = 'subscribe_events'
@@ -34,6 +40,12 @@ def async_register_commands(hass):
     async_reg(TYPE_GET_SERVICES, handle_get_services, SCHEMA_GET_SERVICES)
     async_reg(TYPE_GET_CONFIG, handle_get_config, SCHEMA_GET_CONFIG)
     async_reg(TYPE_PING, handle_ping, SCHEMA_PING)
+    async_reg(TYPE_GET_POLLING_STATS, handle_get_polling_stats,
+              SCHEMA_GET_POLLING_STATS)
+    async_reg(TYPE_GET_TEMPLATE_CACHE_INFO, handle_get_template_cache_info,
+              SCHEMA_GET_TEMPLATE_CACHE_INFO)
+    async_reg(TYPE_GET_STARTUP_TIMELINE, handle_get_startup_timeline,
+              SCHEMA_GET_STARTUP_TIMELINE)
 
 
 SCHEMA_SUBSCRIBE_EVENTS = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
@@ -76,6 +88,21 @@ SCHEMA_PING = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
 })
 
 
+SCHEMA_GET_POLLING_STATS = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_GET_POLLING_STATS,
+})
+
+
+SCHEMA_GET_TEMPLATE_CACHE_INFO = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_GET_TEMPLATE_CACHE_INFO,
+})
+
+
+SCHEMA_GET_STARTUP_TIMELINE = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_GET_STARTUP_TIMELINE,
+})
+
+
 def event_message(iden, event):
     """Return an event message."""
     return {
@@ -85,6 +112,12 @@ def event_message(iden, event):
     }
 
 
+def event_message_json(iden, event_json):
+    """Return an event message with an encoded event."""
+    return '{{"id": {}, "type": "{}", "event": {}}}'.format(
+        iden, TYPE_EVENT, event_json)
+
+
 def pong_message(iden):
     """Return a pong message."""
     return {
@@ -102,12 +135,27 @@ def handle_subscribe_events(hass, connection, msg):
     if not connection.user.is_admin:
         raise Unauthorized
 
+    json_cache = async_get_json_cache(hass)
+
     async def forward_events(event):
-        """Forward events to websocket."""
+        """Forward events to websocket.
+
+        The event is encoded once for all connections.
+        """
         if event.event_type == EVENT_TIME_CHANGED:
             return
 
-        connection.send_message(event_message(msg['id'], event))
+        try:
+            event_json = json_cache.event_json(event)
+        except (ValueError, TypeError) as err:
+            connection.logger.error(
+                'Unable to serialize to JSON: %s\n%s', err, event)
+            connection.send_message(messages.error_message(
+                msg['id'], const.ERR_UNKNOWN_ERROR,
+                'Invalid JSON in response'))
+            return
+
+        connection.send_message(event_message_json(msg['id'], event_json))
 
     connection.event_listeners[msg['id']] = hass.bus.async_listen(
         msg['event_type'], forward_events)
@@ -164,8 +212,16 @@ def handle_get_states(hass, connection, msg):
         if entity_perm(state.entity_id, 'read')
     ]
 
-    connection.send_message(messages.result_message(
-        msg['id'], states))
+    try:
+        states_json = '[{}]'.format(', '.join(
+            state.as_json() for state in states))
+    except (ValueError, TypeError):
+        # The writer reports states that can't be encoded
+        connection.send_message(messages.result_message(msg['id'], states))
+        return
+
+    connection.send_message(messages.result_message_json(
+        msg['id'], states_json))
 
 
 @decorators.async_response
@@ -196,3 +252,36 @@ def handle_ping(hass, connection, msg):
     Async friendly.
     """
     connection.send_message(pong_message(msg['id']))
+
+
+@callback
+def handle_get_polling_stats(hass, connection, msg):
+    """Handle get polling stats command.
+
+    Async friendly.
+    """
+    stats = []
+    for component in hass.data.get(DATA_INSTANCES, {}).values():
+        stats.extend(component.async_polling_stats())
+
+    connection.send_message(messages.result_message(msg['id'], stats))
+
+
+@callback
+def handle_get_template_cache_info(hass, connection, msg):
+    """Handle get template cache info command.
+
+    Async friendly.
+    """
+    connection.send_message(messages.result_message(
+        msg['id'], template.cache_info()))
+
+
+@callback
+def handle_get_startup_timeline(hass, connection, msg):
+    """Handle get startup timeline command.
+
+    Async friendly.
+    """
+    connection.send_message(messages.result_message(
+        msg['id'], async_get_setup_timeline(hass).as_dict()))
@@ -29,6 +29,12 @@ def result_message(iden, result=None):
     }
 
 
+def result_message_json(iden, result_json):
+    """Return a success result message with an encoded result."""
+    return '{{"id": {}, "type": "{}", "success": true, "result": {}}}'.format(
+        iden, const.TYPE_RESULT, result_json)
+
+
 def error_message(iden, code, message):
     """Return an error result message."""
     return {
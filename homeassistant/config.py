@@ -22,10 +22,10 @@ from homeassistant.const import (
     CONF_UNIT_SYSTEM_IMPERIAL, CONF_TEMPERATURE_UNIT, TEMP_CELSIUS,
     __version__, CONF_CUSTOMIZE, CONF_CUSTOMIZE_DOMAIN, CONF_CUSTOMIZE_GLOB,
     CONF_WHITELIST_EXTERNAL_DIRS, CONF_AUTH_PROVIDERS, CONF_AUTH_MFA_MODULES,
-    CONF_TYPE, CONF_ID)
+    CONF_TYPE, CONF_ID, CONF_TEMPLATE_MEMOIZE)
 from homeassistant.core import callback, DOMAIN as CONF_CORE, HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.loader import get_component, get_platform
+from homeassistant.loader import get_component, get_manifest, get_platform
 from homeassistant.util.yaml import load_yaml, SECRET_YAML
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util import dt as date_util, location as loc_util
@@ -201,6 +201,7 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend({
         # pylint: disable=no-value-for-parameter
         vol.All(cv.ensure_list, [vol.IsDir()]),
     vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
+    vol.Optional(CONF_TEMPLATE_MEMOIZE, default=False): cv.boolean,
     vol.Optional(CONF_AUTH_PROVIDERS):
         vol.All(cv.ensure_list,
                 [auth_providers.AUTH_PROVIDER_SCHEMA.extend({
@@ -517,6 +518,8 @@ async def async_process_ha_core_config(
         hac.whitelist_external_dirs.update(
             set(config[CONF_WHITELIST_EXTERNAL_DIRS]))
 
+    hac.template_memoize = config[CONF_TEMPLATE_MEMOIZE]
+
     # Customize
     cust_exact = dict(config[CONF_CUSTOMIZE])
     cust_domain = dict(config[CONF_CUSTOMIZE_DOMAIN])
@@ -669,20 +672,28 @@ def merge_packages_config(hass: HomeAssistant, config: Dict, packages: Dict,
             # If component name is given with a trailing description, remove it
             # when looking for component
             domain = comp_name.split(' ')[0]
-            component = get_component(hass, domain)
+            manifest = get_manifest(hass, domain)
 
-            if component is None:
+            if manifest is None:
                 _log_pkg_error(pack_name, comp_name, config, "does not exist")
                 continue
 
-            if hasattr(component, 'PLATFORM_SCHEMA'):
+            if manifest.platform_schema:
                 if not comp_conf:
                     continue  # Ensure we dont add Falsy items to list
                 config[comp_name] = cv.ensure_list(config.get(comp_name))
                 config[comp_name].extend(cv.ensure_list(comp_conf))
                 continue
 
-            if hasattr(component, 'CONFIG_SCHEMA'):
+            # Only the schema itself tells how to merge, so import it
+            if manifest.config_schema:
+                component = get_component(hass, domain)
+
+                if component is None:
+                    _log_pkg_error(
+                        pack_name, comp_name, config, "does not exist")
+                    continue
+
                 merge_type, _ = _identify_config_schema(component)
 
                 if merge_type == 'list':
@@ -139,6 +139,7 @@ CONF_STATE_TEMPLATE = 'state_template'
 CONF_STRUCTURE = 'structure'
 CONF_SWITCHES = 'switches'
 CONF_TEMPERATURE_UNIT = 'temperature_unit'
+CONF_TEMPLATE_MEMOIZE = 'template_memoize'
 CONF_TIME_ZONE = 'time_zone'
 CONF_TIMEOUT = 'timeout'
 CONF_TOKEN = 'token'
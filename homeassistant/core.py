@@ -5,10 +5,13 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+import bisect
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 import enum
 import functools
+import heapq
+import itertools
 import logging
 import os
 import pathlib
@@ -20,10 +23,9 @@ import uuid
 from types import MappingProxyType
 from typing import (  # noqa: F401 pylint: disable=unused-import
     Optional, Any, Callable, List, TypeVar, Dict, Coroutine, Set,
-    TYPE_CHECKING, Awaitable, Iterator)
+    TYPE_CHECKING, Awaitable, Iterator, Mapping)
 
 from async_timeout import timeout
-import attr
 import voluptuous as vol
 
 from homeassistant.const import (
@@ -66,6 +68,9 @@ TIMEOUT_EVENT_START = 15
 
 _LOGGER = logging.getLogger(__name__)
 
+# Guards generating the id of a context, which other threads may read
+_CONTEXT_ID_LOCK = threading.Lock()
+
 
 def split_entity_id(entity_id: str) -> List[str]:
     """Split a state entity_id into domain, object_id."""
@@ -110,6 +115,50 @@ def async_loop_exception_handler(_: Any, context: Dict) -> None:
         "Error doing job: %s", context['message'], **kwargs)
 
 
+class HassJobType(enum.Enum):
+    """Represent how a job has to be run."""
+
+    coroutinefunction = 1
+    callback = 2
+    executor = 3
+
+
+def _get_callable_job_type(target: Callable) -> HassJobType:
+    """Determine how a callable has to be run."""
+    # Check for partials to properly determine if coroutine function
+    check_target = target
+    while isinstance(check_target, functools.partial):
+        check_target = check_target.func
+
+    if is_callback(check_target):
+        return HassJobType.callback
+    if asyncio.iscoroutinefunction(check_target):
+        return HassJobType.coroutinefunction
+    return HassJobType.executor
+
+
+class HassJob:
+    """Represent a callable and how it has to be run.
+
+    The job type is determined once, so listeners that are called often do
+    not have to be inspected for every call.
+    """
+
+    __slots__ = ('target', 'job_type')
+
+    def __init__(self, target: Callable) -> None:
+        """Create a job object."""
+        if asyncio.iscoroutine(target):
+            raise ValueError("Coroutine not allowed to be passed to HassJob")
+
+        self.target = target
+        self.job_type = _get_callable_job_type(target)
+
+    def __repr__(self) -> str:
+        """Return the job."""
+        return "<Job {} {}>".format(self.job_type, self.target)
+
+
 class CoreState(enum.Enum):
     """Represent the current state of Home Assistant."""
 
@@ -144,6 +193,7 @@ class HomeAssistant:
         self.bus = EventBus(self)
         self.services = ServiceRegistry(self)
         self.states = StateMachine(self.bus, self.loop)
+        self.scheduler = Scheduler(self)
         self.config = Config()  # type: Config
         self.components = loader.Components(self)
         self.helpers = loader.Helpers(self)
@@ -257,25 +307,53 @@ class HomeAssistant:
         target: target to call.
         args: parameters for method to call.
         """
-        task = None
+        task = None  # type: Optional[asyncio.Future]
 
-        # Check for partials to properly determine if coroutine function
-        check_target = target
-        while isinstance(check_target, functools.partial):
-            check_target = check_target.func
-
-        if asyncio.iscoroutine(check_target):
+        if asyncio.iscoroutine(target):
             task = self.loop.create_task(target)  # type: ignore
-        elif is_callback(check_target):
-            self.loop.call_soon(target, *args)
-        elif asyncio.iscoroutinefunction(check_target):
-            task = self.loop.create_task(target(*args))
+        else:
+            job_type = _get_callable_job_type(target)
+
+            if job_type is HassJobType.callback:
+                self.loop.call_soon(target, *args)
+                return None
+
+            if job_type is HassJobType.coroutinefunction:
+                task = self.loop.create_task(target(*args))
+            else:
+                task = self.loop.run_in_executor(  # type: ignore
+                    None, target, *args)
+
+        # If a task is scheduled
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
+    @callback
+    def async_add_hass_job(
+            self,
+            hassjob: HassJob,
+            *args: Any) -> Optional[asyncio.Future]:
+        """Add a job of which the job type is known from within the loop.
+
+        This method must be run in the event loop.
+
+        hassjob: job to call.
+        args: parameters for method to call.
+        """
+        if hassjob.job_type is HassJobType.callback:
+            self.loop.call_soon(hassjob.target, *args)
+            return None
+
+        if hassjob.job_type is HassJobType.coroutinefunction:
+            task = self.loop.create_task(hassjob.target(*args))
         else:
             task = self.loop.run_in_executor(  # type: ignore
-                None, target, *args)
+                None, hassjob.target, *args)
 
         # If a task is scheduled
-        if self._track_task and task is not None:
+        if self._track_task:
             self._pending_tasks.append(task)
 
         return task
@@ -334,6 +412,20 @@ class HomeAssistant:
         else:
             self.async_add_job(target, *args)
 
+    @callback
+    def async_run_hass_job(self, hassjob: HassJob, *args: Any) -> None:
+        """Run a job of which the job type is known from within the loop.
+
+        This method must be run in the event loop.
+
+        hassjob: job to call.
+        args: parameters for method to call.
+        """
+        if hassjob.job_type is HassJobType.callback:
+            hassjob.target(*args)
+        else:
+            self.async_add_hass_job(hassjob, *args)
+
     def block_till_done(self) -> None:
         """Block till all pending work is done."""
         run_coroutine_threadsafe(
@@ -401,18 +493,32 @@ class HomeAssistant:
             self.loop.stop()
 
 
-@attr.s(slots=True, frozen=True)
 class Context:
-    """The context that triggered something."""
+    """The context that triggered something.
+
+    The id is only generated once it is used, most contexts are never
+    serialized or compared. Threads reading the id at the same time get
+    the same id.
+    """
 
-    user_id = attr.ib(
-        type=str,
-        default=None,
-    )
-    id = attr.ib(
-        type=str,
-        default=attr.Factory(lambda: uuid.uuid4().hex),
-    )
+    __slots__ = ['user_id', '_id']
+
+    def __init__(self, user_id: Optional[str] = None,
+                 id: Optional[str] = None) -> None:
+        """Initialize a new context."""
+        # pylint: disable=redefined-builtin, invalid-name
+        self.user_id = user_id
+        self._id = id
+
+    @property
+    def id(self) -> str:
+        """Return the id of the context, generating it if needed."""
+        # pylint: disable=invalid-name
+        if self._id is None:
+            with _CONTEXT_ID_LOCK:
+                if self._id is None:
+                    self._id = uuid.uuid4().hex
+        return self._id
 
     def as_dict(self) -> dict:
         """Return a dictionary representation of the context."""
@@ -421,6 +527,22 @@ class Context:
             'user_id': self.user_id,
         }
 
+    def __eq__(self, other: Any) -> bool:
+        """Return the comparison of the context."""
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return bool(self.user_id == other.user_id and self.id == other.id)
+
+    def __hash__(self) -> int:
+        """Return the hash of the context."""
+        return hash((self.user_id, self.id))
+
+    def __repr__(self) -> str:
+        """Return the representation of the context."""
+        return "Context(user_id={!r}, id={!r})".format(self.user_id, self.id)
+
 
 class EventOrigin(enum.Enum):
     """Represent the origin of an event."""
@@ -440,7 +562,7 @@ class Event:
 
     def __init__(self, event_type: str, data: Optional[Dict] = None,
                  origin: EventOrigin = EventOrigin.local,
-                 time_fired: Optional[int] = None,
+                 time_fired: Optional[datetime.datetime] = None,
                  context: Optional[Context] = None) -> None:
         """Initialize a new event."""
         self.event_type = event_type
@@ -488,7 +610,7 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners = {}  # type: Dict[str, List[Callable]]
+        self._listeners = {}  # type: Dict[str, List[HassJob]]
         self._hass = hass
 
     @callback
@@ -517,29 +639,39 @@ class EventBus:
     @callback
     def async_fire(self, event_type: str, event_data: Optional[Dict] = None,
                    origin: EventOrigin = EventOrigin.local,
-                   context: Optional[Context] = None) -> None:
+                   context: Optional[Context] = None,
+                   time_fired: Optional[datetime.datetime] = None) -> None:
         """Fire an event.
 
         This method must be run in the event loop.
         """
-        listeners = self._listeners.get(event_type, [])
+        listeners = self._listeners.get(event_type)
 
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if (match_all_listeners is not None and
-                event_type != EVENT_HOMEASSISTANT_CLOSE):
-            listeners = match_all_listeners + listeners
+        if event_type == EVENT_HOMEASSISTANT_CLOSE:
+            match_all_listeners = None
+        else:
+            match_all_listeners = self._listeners.get(MATCH_ALL)
 
-        event = Event(event_type, event_data, origin, None, context)
+        event = Event(event_type, event_data, origin, time_fired, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
-        if not listeners:
-            return
+        # Jobs are only scheduled, so no listener can change the lists
+        # while they are iterated.
+        call_soon = self._hass.loop.call_soon
+        add_hass_job = self._hass.async_add_hass_job
 
-        for func in listeners:
-            self._hass.async_add_job(func, event)
+        for jobs in (match_all_listeners, listeners):
+            if not jobs:
+                continue
+
+            for job in jobs:
+                if job.job_type is HassJobType.callback:
+                    call_soon(job.target, event)
+                else:
+                    add_hass_job(job, event)
 
     def listen(
             self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
@@ -566,16 +698,25 @@ class EventBus:
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        This method must be run in the event loop.
+        """
+        return self._async_listen_job(event_type, HassJob(listener))
+
+    @callback
+    def _async_listen_job(
+            self, event_type: str, hassjob: HassJob) -> CALLBACK_TYPE:
+        """Add a job as listener and return the function to remove it.
+
         This method must be run in the event loop.
         """
         if event_type in self._listeners:
-            self._listeners[event_type].append(listener)
+            self._listeners[event_type].append(hassjob)
         else:
-            self._listeners[event_type] = [listener]
+            self._listeners[event_type] = [hassjob]
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, listener)
+            self._async_remove_listener(event_type, hassjob)
 
         return remove_listener
 
@@ -611,6 +752,8 @@ class EventBus:
 
         This method must be run in the event loop.
         """
+        listener_job = HassJob(listener)
+
         @callback
         def onetime_listener(event: Event) -> None:
             """Remove listener from event bus and then fire listener."""
@@ -622,20 +765,22 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(onetime_listener, 'run', True)
-            self._async_remove_listener(event_type, onetime_listener)
-            self._hass.async_run_job(listener, event)
+            self._async_remove_listener(event_type, onetime_job)
+            self._hass.async_run_hass_job(listener_job, event)
+
+        onetime_job = HassJob(onetime_listener)
 
-        return self.async_listen(event_type, onetime_listener)
+        return self._async_listen_job(event_type, onetime_job)
 
     @callback
     def _async_remove_listener(
-            self, event_type: str, listener: Callable) -> None:
+            self, event_type: str, hassjob: HassJob) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(listener)
+            self._listeners[event_type].remove(hassjob)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -643,7 +788,107 @@ class EventBus:
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+            _LOGGER.warning("Unable to remove unknown listener %s",
+                            hassjob.target)
+
+
+class Scheduler:
+    """Run jobs once a point in time has passed.
+
+    Pending jobs are kept in a heap ordered by their point in time. A single
+    EVENT_TIME_CHANGED listener only looks at the head of the heap, so the
+    cost of a timer tick does not grow with the number of pending jobs.
+    """
+
+    # Rebuild the heap when more than this share of entries is cancelled
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._heap = []  # type: List[list]
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._unsub_time_listener = None  # type: Optional[CALLBACK_TYPE]
+
+    @property
+    def pending(self) -> int:
+        """Return the number of pending jobs."""
+        return len(self._heap) - self._cancelled
+
+    @callback
+    def async_schedule(self, point_in_time: datetime.datetime,
+                       target: Callable[..., Any]) -> CALLBACK_TYPE:
+        """Run target with the current time once point_in_time has passed.
+
+        Returns a function to cancel the job.
+
+        This method must be run in the event loop.
+        """
+        entry = [point_in_time, next(self._counter), target]
+        heapq.heappush(self._heap, entry)
+
+        if self._unsub_time_listener is None:
+            self._unsub_time_listener = self._hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+        @callback
+        def cancel() -> None:
+            """Cancel the scheduled job."""
+            # Target is cleared when the job is run or cancelled
+            if entry[2] is None:
+                return
+
+            entry[2] = None
+            self._cancelled += 1
+
+            if self._cancelled > len(self._heap) * self.COMPACT_RATIO:
+                self._async_compact()
+
+        return cancel
+
+    @callback
+    def _async_compact(self) -> None:
+        """Remove cancelled jobs from the heap."""
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+        self._async_check_empty()
+
+    @callback
+    def _async_check_empty(self) -> None:
+        """Stop listening for time changes if no jobs are pending."""
+        if not self._heap and self._unsub_time_listener is not None:
+            self._unsub_time_listener()
+            self._unsub_time_listener = None
+
+    @callback
+    def _async_time_changed(self, event: Event) -> None:
+        """Run all jobs that are due."""
+        now = event.data[ATTR_NOW]
+        heap = self._heap
+        due = []
+
+        # Collect due jobs first so jobs scheduled by a running job wait for
+        # the next time change, like a newly added bus listener would.
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            target = entry[2]
+
+            if target is None:
+                self._cancelled -= 1
+                continue
+
+            entry[2] = None
+            due.append(target)
+
+        self._async_check_empty()
+
+        for target in due:
+            try:
+                self._hass.async_run_job(target, now)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running scheduled job %s", target)
 
 
 class State:
@@ -658,17 +903,19 @@ class State:
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated', 'context']
+                 'last_changed', 'last_updated', 'context', '_json',
+                 '_attributes_json']
 
     def __init__(self, entity_id: str, state: Any,
-                 attributes: Optional[Dict] = None,
+                 attributes: Optional[Mapping] = None,
                  last_changed: Optional[datetime.datetime] = None,
                  last_updated: Optional[datetime.datetime] = None,
-                 context: Optional[Context] = None) -> None:
+                 context: Optional[Context] = None,
+                 validate_entity_id: bool = True) -> None:
         """Initialize a new state."""
         state = str(state)
 
-        if not valid_entity_id(entity_id):
+        if validate_entity_id and not valid_entity_id(entity_id):
             raise InvalidEntityFormatError((
                 "Invalid entity id encountered: {}. "
                 "Format should be <domain>.<object_id>").format(entity_id))
@@ -680,10 +927,15 @@ class State:
 
         self.entity_id = entity_id.lower()
         self.state = state  # type: str
-        self.attributes = MappingProxyType(attributes or {})
+        # A mapping shared with a previous state is read-only already
+        if not isinstance(attributes, MappingProxyType):
+            attributes = MappingProxyType(attributes or {})
+        self.attributes = attributes  # type: MappingProxyType
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
+        self._json = None  # type: Optional[str]
+        self._attributes_json = None  # type: Optional[str]
 
     @property
     def domain(self) -> str:
@@ -717,6 +969,42 @@ class State:
                 'last_updated': self.last_updated,
                 'context': self.context.as_dict()}
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the State.
+
+        Async friendly.
+
+        A state does not change once it is set, so it is encoded once and
+        every consumer reuses the same string. Raises ValueError or
+        TypeError if the attributes can't be encoded.
+        """
+        text = self._json
+        if text is None:
+            from homeassistant.helpers.json import JSON_DUMP
+            text = self._json = (
+                '{{"entity_id": {}, "state": {}, "attributes": {}, '
+                '"last_changed": {}, "last_updated": {}, "context": {}}}'
+                .format(JSON_DUMP(self.entity_id), JSON_DUMP(self.state),
+                        self.attributes_json(),
+                        JSON_DUMP(self.last_changed),
+                        JSON_DUMP(self.last_updated),
+                        JSON_DUMP(self.context)))
+        return text
+
+    def attributes_json(self) -> str:
+        """Return the JSON representation of the attributes.
+
+        Async friendly.
+
+        Encoded once, and shared with the next state of the entity while
+        the attributes don't change.
+        """
+        text = self._attributes_json
+        if text is None:
+            from homeassistant.helpers.json import JSON_DUMP
+            text = self._attributes_json = JSON_DUMP(dict(self.attributes))
+        return text
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -772,6 +1060,10 @@ class StateMachine:
                  loop: asyncio.events.AbstractEventLoop) -> None:
         """Initialize state machine."""
         self._states = {}  # type: Dict[str, State]
+        # Domain -> entity id -> state, in the order entities were added
+        self._domain_states = {}  # type: Dict[str, Dict[str, State]]
+        # Domain -> sorted entity ids
+        self._sorted_entity_ids = {}  # type: Dict[str, List[str]]
         self._bus = bus
         self._loop = loop
 
@@ -792,23 +1084,55 @@ class StateMachine:
         if domain_filter is None:
             return list(self._states.keys())
 
-        domain_filter = domain_filter.lower()
+        return list(self._domain_states.get(domain_filter.lower(), ()))
 
-        return [state.entity_id for state in self._states.values()
-                if state.domain == domain_filter]
+    @callback
+    def async_entity_ids_count(
+            self, domain_filter: Optional[str] = None) -> int:
+        """Count the entity ids that are being tracked.
 
-    def all(self)-> List[State]:
+        This method must be run in the event loop.
+        """
+        if domain_filter is None:
+            return len(self._states)
+
+        return len(self._domain_states.get(domain_filter.lower(), ()))
+
+    def all(self, domain_filter: Optional[str] = None)-> List[State]:
         """Create a list of all states."""
         return run_callback_threadsafe(  # type: ignore
-            self._loop, self.async_all).result()
+            self._loop, self.async_all, domain_filter).result()
+
+    @callback
+    def async_all(self, domain_filter: Optional[str] = None)-> List[State]:
+        """Create a list of all states, optionally of a single domain.
+
+        This method must be run in the event loop.
+        """
+        if domain_filter is None:
+            return list(self._states.values())
+
+        return list(
+            self._domain_states.get(domain_filter.lower(), {}).values())
 
     @callback
-    def async_all(self)-> List[State]:
-        """Create a list of all states.
+    def async_all_sorted(
+            self, domain_filter: Optional[str] = None) -> List[State]:
+        """Create a list of all states sorted by entity id.
+
+        The sorted entity ids are maintained when entities are added or
+        removed, so this does not sort the states.
 
         This method must be run in the event loop.
         """
-        return list(self._states.values())
+        if domain_filter is None:
+            domains = sorted(self._domain_states)  # type: List[str]
+        else:
+            domains = [domain_filter.lower()]
+
+        states = self._states
+        return [states[entity_id] for domain in domains
+                for entity_id in self._sorted_entity_ids.get(domain, ())]
 
     def get(self, entity_id: str) -> Optional[State]:
         """Retrieve state of entity_id or None if not found.
@@ -847,6 +1171,16 @@ class StateMachine:
         if old_state is None:
             return False
 
+        domain = old_state.domain
+        domain_states = self._domain_states[domain]
+        del domain_states[entity_id]
+        if domain_states:
+            sorted_ids = self._sorted_entity_ids[domain]
+            del sorted_ids[bisect.bisect_left(sorted_ids, entity_id)]
+        else:
+            del self._domain_states[domain]
+            del self._sorted_entity_ids[domain]
+
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -855,7 +1189,7 @@ class StateMachine:
         return True
 
     def set(self, entity_id: str, new_state: Any,
-            attributes: Optional[Dict] = None,
+            attributes: Optional[Mapping] = None,
             force_update: bool = False,
             context: Optional[Context] = None) -> None:
         """Set the state of an entity, add entity if it does not exist.
@@ -873,7 +1207,7 @@ class StateMachine:
 
     @callback
     def async_set(self, entity_id: str, new_state: Any,
-                  attributes: Optional[Dict] = None,
+                  attributes: Optional[Mapping] = None,
                   force_update: bool = False,
                   context: Optional[Context] = None) -> None:
         """Set the state of an entity, add entity if it does not exist.
@@ -896,37 +1230,59 @@ class StateMachine:
         else:
             same_state = (old_state.state == new_state and
                           not force_update)
-            same_attr = old_state.attributes == attributes
+            same_attr = (old_state.attributes is attributes or
+                         old_state.attributes == attributes)
             last_changed = old_state.last_changed if same_state else None
 
+            # Unchanged attributes keep their mapping, so the next write
+            # of that mapping is recognized by identity.
+            if same_attr:
+                attributes = old_state.attributes
+
         if same_state and same_attr:
             return
 
         if context is None:
             context = Context()
 
-        state = State(entity_id, new_state, attributes, last_changed, None,
-                      context)
+        # The entity id of a known entity was validated already
+        now = dt_util.utcnow()
+        state = State(entity_id, new_state, attributes, last_changed, now,
+                      context, old_state is None)
+        if same_attr and old_state is not None:
+            # pylint: disable=protected-access
+            state._attributes_json = old_state._attributes_json
         self._states[entity_id] = state
+
+        domain_states = self._domain_states.get(state.domain)
+        if domain_states is None:
+            domain_states = self._domain_states[state.domain] = {}
+            self._sorted_entity_ids[state.domain] = [entity_id]
+        elif old_state is None:
+            bisect.insort(self._sorted_entity_ids[state.domain], entity_id)
+        domain_states[entity_id] = state
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
             'new_state': state,
-        }, EventOrigin.local, context)
+        }, EventOrigin.local, context, now)
 
 
 class Service:
     """Representation of a callable service."""
 
-    __slots__ = ['func', 'schema', 'is_callback', 'is_coroutinefunction']
+    __slots__ = ['job', 'schema']
 
     def __init__(self, func: Callable, schema: Optional[vol.Schema],
                  context: Optional[Context] = None) -> None:
         """Initialize a service."""
-        self.func = func
+        self.job = HassJob(func)
         self.schema = schema
-        self.is_callback = is_callback(func)
-        self.is_coroutinefunction = asyncio.iscoroutinefunction(func)
+
+    @property
+    def func(self) -> Callable:
+        """Return the function that handles the service."""
+        return self.job.target
 
 
 class ServiceCall:
@@ -1143,12 +1499,14 @@ class ServiceRegistry:
     async def _execute_service(self, handler: Service,
                                service_call: ServiceCall) -> None:
         """Execute a service."""
-        if handler.is_callback:
-            handler.func(service_call)
-        elif handler.is_coroutinefunction:
-            await handler.func(service_call)
+        job = handler.job
+
+        if job.job_type is HassJobType.callback:
+            job.target(service_call)
+        elif job.job_type is HassJobType.coroutinefunction:
+            await job.target(service_call)
         else:
-            await self._hass.async_add_executor_job(handler.func, service_call)
+            await self._hass.async_add_executor_job(job.target, service_call)
 
 
 class Config:
@@ -1178,6 +1536,9 @@ class Config:
         # List of allowed external dirs to access
         self.whitelist_external_dirs = set()  # type: Set[str]
 
+        # If True, templates reuse their last result for unchanged inputs
+        self.template_memoize = False  # type: bool
+
     def distance(self, lat: float, lon: float) -> Optional[float]:
         """Calculate distance from Home Assistant.
 
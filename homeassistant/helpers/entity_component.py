@@ -12,7 +12,8 @@ from homeassistant.const import (
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_per_platform, discovery
-from homeassistant.helpers.service import extract_entity_ids
+from homeassistant.helpers.service import (
+    extract_entity_ids, lookup_entities)
 from homeassistant.loader import bind_hass
 from homeassistant.util import slugify
 from .entity_platform import EntityPlatform
@@ -64,6 +65,8 @@ class EntityComponent:
 
         self.config = None
 
+        # entity_id -> (platform, entity) of all entities of the platforms
+        self._entity_index = {}
         self._platforms = {
             domain: self._async_init_entity_platform(domain, None)
         }
@@ -80,11 +83,8 @@ class EntityComponent:
 
     def get_entity(self, entity_id):
         """Get an entity."""
-        for platform in self._platforms.values():
-            entity = platform.entities.get(entity_id)
-            if entity is not None:
-                return entity
-        return None
+        found = self._entity_index.get(entity_id)
+        return None if found is None else found[1]
 
     def setup(self, config):
         """Set up a full entity component.
@@ -173,9 +173,17 @@ class EntityComponent:
 
             return [entity for entity in self.entities if entity.available]
 
-        entity_ids = set(extract_entity_ids(self.hass, service, expand_group))
-        return [entity for entity in self.entities
-                if entity.available and entity.entity_id in entity_ids]
+        found = lookup_entities(
+            self._entity_index,
+            extract_entity_ids(self.hass, service, expand_group))
+        return [entity for _, entity in found if entity.available]
+
+    @callback
+    def async_polling_stats(self):
+        """Return the polling statistics of the platforms that poll."""
+        return [stats for stats in (platform.async_polling_stats()
+                                    for platform in self._platforms.values())
+                if stats['entities']]
 
     @callback
     def async_register_entity_service(self, name, schema, func):
@@ -183,7 +191,7 @@ class EntityComponent:
         async def handle_service(call):
             """Handle the service."""
             await self.hass.helpers.service.entity_service_call(
-                self._platforms.values(), func, call
+                self._platforms.values(), func, call, self._entity_index
             )
 
         self.hass.services.async_register(
@@ -256,9 +264,9 @@ class EntityComponent:
 
     async def async_remove_entity(self, entity_id):
         """Remove an entity managed by one of the platforms."""
-        for platform in self._platforms.values():
-            if entity_id in platform.entities:
-                await platform.async_remove_entity(entity_id)
+        found = self._entity_index.get(entity_id)
+        if found is not None:
+            await found[0].async_remove_entity(entity_id)
 
     async def async_prepare_reload(self):
         """Prepare reloading this entity component.
@@ -287,7 +295,7 @@ class EntityComponent:
         if scan_interval is None:
             scan_interval = self.scan_interval
 
-        return EntityPlatform(
+        entity_platform = EntityPlatform(
             hass=self.hass,
             logger=self.logger,
             domain=self.domain,
@@ -297,3 +305,5 @@ class EntityComponent:
             entity_namespace=entity_namespace,
             async_entities_added_callback=self._async_update_group,
         )
+        entity_platform.entity_index = self._entity_index
+        return entity_platform
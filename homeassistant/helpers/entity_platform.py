@@ -1,18 +1,78 @@
 """Class to manage the entities for a single platform."""
 import asyncio
+import bisect
+from timeit import default_timer as timer
 
 from homeassistant.const import DEVICE_DEFAULT_NAME
 from homeassistant.core import callback, valid_entity_id, split_entity_id
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
+from homeassistant.setup import (
+    PHASE_ENTITIES, PHASE_SETUP, async_get_setup_timeline)
 from homeassistant.util.async_ import (
     run_callback_threadsafe, run_coroutine_threadsafe)
+import homeassistant.util.dt as dt_util
 
-from .event import async_track_time_interval, async_call_later
+from .event import async_track_point_in_utc_time, async_call_later
 
 SLOW_SETUP_WARNING = 10
 SLOW_SETUP_MAX_WAIT = 60
 PLATFORM_NOT_READY_RETRIES = 10
 
+# Semaphores limiting the parallel updates of each platform module
+DATA_PARALLEL_UPDATES = 'entity_platform_parallel_updates'
+
+# Failing entities are polled at most this many scan intervals apart
+POLLING_BACKOFF_MAX = 8
+
+# Consecutive multiples of the golden ratio conjugate are evenly spread over
+# [0, 1), whatever the number of entities that are added.
+PHASE_STEP = 0.6180339887498949
+
+
+class LatencyHistogram:
+    """Count durations in buckets of growing upper bounds in seconds."""
+
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        """Add a duration."""
+        self.counts[bisect.bisect_left(self.BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def as_dict(self):
+        """Return a dictionary representation of the histogram."""
+        buckets = {str(bound): count for bound, count
+                   in zip(self.BUCKETS, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'buckets': buckets,
+        }
+
+
+class _EntityPoll:
+    """Polling schedule of a single entity."""
+
+    __slots__ = ('entity', 'due', 'failures', 'cancel')
+
+    def __init__(self, entity):
+        """Initialize the schedule."""
+        self.entity = entity
+        self.due = None
+        self.failures = 0
+        self.cancel = None
+
 
 class EntityPlatform:
     """Manage the entities for a single platform."""
@@ -41,12 +101,17 @@ class EntityPlatform:
         self.async_entities_added_callback = async_entities_added_callback
         self.config_entry = None
         self.entities = {}
+        # entity_id -> (platform, entity) index, replaced by the one shared
+        # with the other platforms when added to an EntityComponent
+        self.entity_index = {}
         self._tasks = []
-        # Method to cancel the state change listener
-        self._async_unsub_polling = None
+        # entity_id -> polling schedule of the entity
+        self._polls = {}
+        # Number of phase offsets handed out to polling entities
+        self._poll_slots = 0
+        self.update_latency = LatencyHistogram()
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup = None
-        self._process_updates = asyncio.Lock(loop=hass.loop)
 
         # Platform is None for the EntityComponent "catch-all" EntityPlatform
         # which powers entity_component.add_entities
@@ -63,11 +128,18 @@ class EntityPlatform:
         parallel_updates = getattr(platform, 'PARALLEL_UPDATES',
                                    default_parallel_updates)
 
-        if parallel_updates:
-            self.parallel_updates = asyncio.Semaphore(
-                parallel_updates, loop=hass.loop)
-        else:
+        if not parallel_updates:
             self.parallel_updates = None
+            return
+
+        # All platforms set up from the same module share the budget
+        semaphores = hass.data.setdefault(DATA_PARALLEL_UPDATES, {})
+        key = '{}.{}'.format(domain, platform_name)
+        self.parallel_updates = semaphores.get(key)
+
+        if self.parallel_updates is None:
+            self.parallel_updates = semaphores[key] = asyncio.Semaphore(
+                parallel_updates, loop=hass.loop)
 
     async def async_setup(self, platform_config, discovery_info=None):
         """Set up the platform from a config file."""
@@ -120,6 +192,9 @@ class EntityPlatform:
             "Setup of platform %s is taking over %s seconds.",
             self.platform_name, SLOW_SETUP_WARNING)
 
+        timeline = async_get_setup_timeline(hass)
+        start = timer()
+
         try:
             task = async_create_setup_task()
 
@@ -127,6 +202,11 @@ class EntityPlatform:
                 asyncio.shield(task, loop=hass.loop),
                 SLOW_SETUP_MAX_WAIT, loop=hass.loop)
 
+            end = timer()
+            # Coroutines are awaited, sync platforms run in the executor
+            timeline.async_add(full_name, PHASE_SETUP, end - start,
+                               not asyncio.iscoroutine(task))
+
             # Block till all entities are done
             if self._tasks:
                 pending = [task for task in self._tasks if not task.done()]
@@ -136,6 +216,7 @@ class EntityPlatform:
                     await asyncio.wait(
                         pending, loop=self.hass.loop)
 
+            timeline.async_add(full_name, PHASE_ENTITIES, timer() - end)
             hass.config.components.add(full_name)
             return True
         except PlatformNotReady:
@@ -223,14 +304,14 @@ class EntityPlatform:
         await asyncio.wait(tasks, loop=self.hass.loop)
         self.async_entities_added_callback()
 
-        if self._async_unsub_polling is not None or \
-           not any(entity.should_poll for entity
-                   in self.entities.values()):
-            return
+        for entity in new_entities:
+            # Skip entities that were not added or are polled already
+            if entity is None or entity.entity_id in self._polls or \
+                    self.entities.get(entity.entity_id) is not entity:
+                continue
 
-        self._async_unsub_polling = async_track_time_interval(
-            self.hass, self._update_entity_states, self.scan_interval
-        )
+            if entity.should_poll:
+                self._async_start_polling(entity)
 
     async def _async_add_entity(self, entity, update_before_add,
                                 entity_registry, device_registry):
@@ -335,8 +416,8 @@ class EntityPlatform:
             raise HomeAssistantError(
                 'Invalid entity id: {}'.format(entity.entity_id))
         elif (entity.entity_id in self.entities or
-              entity.entity_id in self.hass.states.async_entity_ids(
-                  self.domain)):
+              (split_entity_id(entity.entity_id)[0] == self.domain and
+               self.hass.states.get(entity.entity_id) is not None)):
             msg = 'Entity id already exists: {}'.format(entity.entity_id)
             if entity.unique_id is not None:
                 msg += '. Platform {} does not generate unique IDs'.format(
@@ -345,7 +426,8 @@ class EntityPlatform:
 
         entity_id = entity.entity_id
         self.entities[entity_id] = entity
-        entity.async_on_remove(lambda: self.entities.pop(entity_id))
+        self.entity_index[entity_id] = (self, entity)
+        entity.async_on_remove(lambda: self._async_forget_entity(entity_id))
 
         await entity.async_added_to_hass()
 
@@ -368,42 +450,109 @@ class EntityPlatform:
 
         await asyncio.wait(tasks, loop=self.hass.loop)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         await self.entities[entity_id].async_remove()
 
-        # Clean up polling job if no longer needed
-        if (self._async_unsub_polling is not None and
-                not any(entity.should_poll for entity
-                        in self.entities.values())):
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
+    @callback
+    def _async_forget_entity(self, entity_id):
+        """Forget a removed entity and stop polling it."""
+        self.entities.pop(entity_id)
+        self.entity_index.pop(entity_id, None)
+        poll = self._polls.pop(entity_id, None)
+
+        if poll is not None and poll.cancel is not None:
+            poll.cancel()
+
+    @callback
+    def _async_start_polling(self, entity):
+        """Start polling an entity.
+
+        Every entity gets its own phase within the scan interval, so the
+        updates of a platform are spread over the interval instead of
+        running in one burst.
+        """
+        poll = self._polls[entity.entity_id] = _EntityPoll(entity)
+        phase = (self._poll_slots * PHASE_STEP) % 1
+        self._poll_slots += 1
+        self._async_schedule_poll(
+            poll, dt_util.utcnow() + self.scan_interval * (1 - phase))
+
+    @callback
+    def _async_schedule_poll(self, poll, point_in_time):
+        """Schedule the next update of a polling entity."""
+        @callback
+        def poll_due(now):
+            """Update the entity once it is due."""
+            poll.cancel = None
+            self.hass.async_create_task(self._async_poll_entity(poll))
+
+        poll.due = point_in_time
+        poll.cancel = async_track_point_in_utc_time(
+            self.hass, poll_due, point_in_time)
 
-    async def _update_entity_states(self, now):
-        """Update the states of all the polling entities.
+    async def _async_poll_entity(self, poll):
+        """Update a polling entity and schedule its next update.
 
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
+        Entities whose update fails or takes longer than the scan interval
+        back off exponentially, up to POLLING_BACKOFF_MAX scan intervals.
+        The next update is only scheduled once the current one is done, so
+        a slow entity never has more than one update in flight.
 
         This method must be run in the event loop.
         """
-        if self._process_updates.locked():
-            self.logger.warning(
-                "Updating %s %s took longer than the scheduled update "
-                "interval %s", self.platform_name, self.domain,
-                self.scan_interval)
+        entity = poll.entity
+        failed = slow = False
+
+        if entity.should_poll:
+            start = timer()
+            try:
+                await entity.async_device_update()
+            except Exception:  # pylint: disable=broad-except
+                self.logger.exception("Update for %s fails", entity.entity_id)
+                failed = True
+            duration = timer() - start
+            self.update_latency.add(duration)
+
+            if duration > self.scan_interval.total_seconds():
+                self.logger.warning(
+                    "Updating %s took longer than the scheduled update "
+                    "interval %s", entity.entity_id, self.scan_interval)
+                slow = True
+
+        # The entity was removed while it was updating
+        if self._polls.get(entity.entity_id) is not poll:
             return
 
-        async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
-                    continue
-                tasks.append(entity.async_update_ha_state(True))
+        if failed or slow:
+            poll.failures += 1
+        else:
+            poll.failures = 0
+
+        backoff = min(2 ** poll.failures, POLLING_BACKOFF_MAX)
+        next_due = poll.due + self.scan_interval * backoff
+
+        # Skip the updates that were missed, but keep the phase
+        now = dt_util.utcnow()
+        if next_due <= now:
+            next_due += self.scan_interval * (
+                (now - next_due) // self.scan_interval + 1)
+
+        self._async_schedule_poll(poll, next_due)
 
-            if tasks:
-                await asyncio.wait(tasks, loop=self.hass.loop)
+        # A slow update still fetched new data
+        if entity.should_poll and not failed:
+            await entity.async_update_ha_state()
+
+    @callback
+    def async_polling_stats(self):
+        """Return the polling statistics of the platform."""
+        return {
+            'domain': self.domain,
+            'platform': self.platform_name,
+            'scan_interval': self.scan_interval.total_seconds(),
+            'entities': len(self._polls),
+            'backoff': sum(1 for poll in self._polls.values()
+                           if poll.failures),
+            'latency': self.update_latency.as_dict(),
+        }
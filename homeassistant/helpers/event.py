@@ -1,6 +1,7 @@
 """Helpers for listening to events."""
 from datetime import timedelta
 import functools as ft
+import logging
 
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
@@ -11,6 +12,11 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+DATA_STATE_CHANGE_LISTENERS = 'track_state_change_listeners'
+DATA_STATE_CHANGE_UNSUB = 'track_state_change_unsub'
+
+_LOGGER = logging.getLogger(__name__)
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -55,52 +61,160 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
 
     # Ensure it is a lowercase list with entity ids we want to match on
     if entity_ids == MATCH_ALL:
-        pass
+        entity_ids = (MATCH_ALL,)
     elif isinstance(entity_ids, str):
         entity_ids = (entity_ids.lower(),)
     else:
-        entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
+        entity_ids = tuple(set(entity_id.lower() for entity_id in entity_ids))
 
     @callback
-    def state_change_listener(event):
+    def state_change_listener(entity_id, old_state, new_state):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
+        if match_from_state(None if old_state is None else old_state.state) \
+           and match_to_state(None if new_state is None else new_state.state):
+            hass.async_run_job(action, entity_id, old_state, new_state)
+
+    return _async_add_state_change_listener(
+        hass, entity_ids, state_change_listener)
+
+
+@callback
+def _async_add_state_change_listener(hass, entity_ids, listener):
+    """Register a listener with the shared state changed dispatcher.
 
-        old_state = event.data.get('old_state')
-        if old_state is not None:
-            old_state = old_state.state
+    A single EVENT_STATE_CHANGED listener is registered on the bus for all
+    trackers. It looks up the listeners for the changed entity id, plus the
+    MATCH_ALL listeners, so a state change only reaches interested trackers.
+    """
+    listeners = hass.data.get(DATA_STATE_CHANGE_LISTENERS)
 
-        new_state = event.data.get('new_state')
-        if new_state is not None:
-            new_state = new_state.state
+    if listeners is None:
+        listeners = hass.data[DATA_STATE_CHANGE_LISTENERS] = {}
 
-        if match_from_state(old_state) and match_to_state(new_state):
-            hass.async_run_job(action, event.data.get('entity_id'),
-                               event.data.get('old_state'),
-                               event.data.get('new_state'))
+        @callback
+        def state_change_dispatcher(event):
+            """Dispatch state changes by entity id."""
+            entity_id = event.data.get('entity_id')
+            targets = listeners.get(entity_id, ()) + \
+                listeners.get(MATCH_ALL, ())
+
+            if not targets:
+                return
+
+            old_state = event.data.get('old_state')
+            new_state = event.data.get('new_state')
+
+            for target in targets:
+                try:
+                    target(entity_id, old_state, new_state)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(
+                        "Error while processing state change for %s",
+                        entity_id)
+
+        hass.data[DATA_STATE_CHANGE_UNSUB] = hass.bus.async_listen(
+            EVENT_STATE_CHANGED, state_change_dispatcher)
+
+    # Buckets are tuples so the dispatcher can iterate them safely while
+    # listeners are added or removed by the targets it calls.
+    for entity_id in entity_ids:
+        listeners[entity_id] = listeners.get(entity_id, ()) + (listener,)
+
+    @callback
+    def remove_listener():
+        """Remove the listener from the dispatcher."""
+        for entity_id in entity_ids:
+            bucket = tuple(target for target in listeners.get(entity_id, ())
+                           if target is not listener)
+            if bucket:
+                listeners[entity_id] = bucket
+            else:
+                listeners.pop(entity_id, None)
+
+        if not listeners and \
+           hass.data.get(DATA_STATE_CHANGE_LISTENERS) is listeners:
+            hass.data.pop(DATA_STATE_CHANGE_LISTENERS)
+            hass.data.pop(DATA_STATE_CHANGE_UNSUB)()
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    return remove_listener
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
 
 
+@callback
+@bind_hass
+def async_track_render_info(hass, render_infos, action):
+    """Track the state changes that can change the results of renders.
+
+    Listens to the entities, domains and all states the renders accessed, as
+    recorded in their RenderInfo.
+
+    Returns a function that can be called to remove the listener.
+    """
+    render_infos = tuple(render_infos)
+    entities = set()
+
+    for render_info in render_infos:
+        if render_info.all_states or render_info.domains:
+            break
+        entities |= render_info.entities
+    else:
+        return async_track_state_change(hass, entities, action)
+
+    @callback
+    def render_info_listener(entity_id, old_state, new_state):
+        """Run action if the change is accessed by one of the renders."""
+        if any(render_info.matches(entity_id)
+               for render_info in render_infos):
+            hass.async_run_job(action, entity_id, old_state, new_state)
+
+    return async_track_state_change(hass, MATCH_ALL, render_info_listener)
+
+
 @callback
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
-    from . import condition
+    """Add a listener that track state changes with template condition.
 
+    The template is rendered right away to find the states it accesses, and
+    the tracked states are updated after every render.
+    """
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
+    remove_listener = None
+
+    @callback
+    def async_render():
+        """Render the template and track the states it accessed."""
+        nonlocal remove_listener
+        render_info = template.async_render_to_info(variables)
+
+        if remove_listener is not None:
+            remove_listener()
+
+        if render_info.entities or render_info.domains or \
+                render_info.all_states or template.is_static:
+            remove_listener = async_track_render_info(
+                hass, (render_info,), template_condition_listener)
+        else:
+            # Templates that access no states, like now(), are checked on
+            # every state change
+            remove_listener = async_track_state_change(
+                hass, MATCH_ALL, template_condition_listener)
+
+        if render_info.exception is not None:
+            _LOGGER.error("Error during template condition: %s",
+                          render_info.exception)
+            return False
+
+        return render_info.result.lower() == 'true'
 
     @callback
     def template_condition_listener(entity_id, from_s, to_s):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        template_result = async_render()
 
         # Check to see if template returns true
         if template_result and not already_triggered:
@@ -109,9 +223,14 @@ def async_track_template(hass, template, action, variables=None):
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables),
-        template_condition_listener)
+    async_render()
+
+    @callback
+    def remove():
+        """Remove the listener of the currently tracked states."""
+        remove_listener()
+
+    return remove
 
 
 track_template = threaded_listener_factory(async_track_template)
@@ -192,28 +311,7 @@ def async_track_point_in_utc_time(hass, action, point_in_time):
     # Ensure point_in_time is UTC
     point_in_time = dt_util.as_utc(point_in_time)
 
-    @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, 'run'):
-            return
-
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
-        hass.async_run_job(action, now)
-
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                        point_in_time_listener)
-
-    return async_unsub
+    return hass.scheduler.async_schedule(point_in_time, action)
 
 
 track_point_in_utc_time = threaded_listener_factory(
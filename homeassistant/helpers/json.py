@@ -1,11 +1,23 @@
 """Helpers to help with encoding Home Assistant objects in JSON."""
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial
 import json
 import logging
-from typing import Any
+from typing import Any, Optional
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import State, callback
 
 _LOGGER = logging.getLogger(__name__)
 
+DATA_JSON_CACHE = 'json_cache'
+
+# Number of recently encoded events kept in the JSON cache
+EVENT_CACHE_SIZE = 128
+
+_STATE_CHANGED_KEYS = {'entity_id', 'old_state', 'new_state'}
+
 
 class JSONEncoder(json.JSONEncoder):
     """JSONEncoder that supports Home Assistant objects."""
@@ -24,3 +36,105 @@ class JSONEncoder(json.JSONEncoder):
             return o.as_dict()
 
         return json.JSONEncoder.default(self, o)
+
+
+JSON_DUMP = partial(json.dumps, cls=JSONEncoder, allow_nan=False)
+
+
+class JSONCache:
+    """Cache the JSON of recently encoded events.
+
+    Events are not changed once they are fired, so they are cached by
+    identity. The cache references the events, which keeps their ids from
+    being reused while they are cached. States cache their own JSON.
+
+    Not thread safe, only use it from the event loop.
+    """
+
+    def __init__(self, event_size: int = EVENT_CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        self._events = OrderedDict()  # type: OrderedDict
+        self._event_size = event_size
+
+    def event_json(self, event: Any) -> str:
+        """Return the JSON of an event.
+
+        The states of a state_changed event reuse their own JSON, so a
+        state is encoded once as new_state and reused as old_state.
+        """
+        text = _lookup(self._events, event)
+        if text is not None:
+            return text
+
+        if _is_state_changed(event):
+            text = (
+                '{{"event_type": {}, "data": {}, "origin": {}, '
+                '"time_fired": {}, "context": {}}}'.format(
+                    JSON_DUMP(event.event_type), event_data_json(event),
+                    JSON_DUMP(str(event.origin)),
+                    JSON_DUMP(event.time_fired),
+                    JSON_DUMP(event.context)))
+        else:
+            text = JSON_DUMP(event)
+
+        _store(self._events, event, text, self._event_size)
+        return text
+
+
+def event_data_json(event: Any) -> str:
+    """Return the JSON of the data of an event.
+
+    The data of a state_changed event reuses the JSON of its states.
+    """
+    if not _is_state_changed(event):
+        return JSON_DUMP(event.data)
+
+    data = event.data
+    return '{{"entity_id": {}, "old_state": {}, "new_state": {}}}'.format(
+        JSON_DUMP(data['entity_id']),
+        _optional_state_json(data['old_state']),
+        _optional_state_json(data['new_state']))
+
+
+def _is_state_changed(event: Any) -> bool:
+    """Return if the data of an event is the one of a state change."""
+    return bool(event.event_type == EVENT_STATE_CHANGED and
+                event.data.keys() == _STATE_CHANGED_KEYS)
+
+
+def _optional_state_json(state: Any) -> str:
+    """Return the JSON of a state that may be None.
+
+    Events fired by others may hold states that are not State objects.
+    """
+    if isinstance(state, State):
+        return state.as_json()
+    text = JSON_DUMP(state)  # type: str
+    return text
+
+
+def _lookup(cache: OrderedDict, obj: Any) -> Optional[str]:
+    """Return the cached JSON of obj or None."""
+    cached = cache.get(id(obj))
+    if cached is None or cached[0] is not obj:
+        return None
+    cache.move_to_end(id(obj))
+    text = cached[1]  # type: str
+    return text
+
+
+def _store(cache: OrderedDict, obj: Any, text: str, size: int) -> None:
+    """Store the JSON of obj, dropping the least recently used entry."""
+    cache[id(obj)] = (obj, text)
+    cache.move_to_end(id(obj))
+    if len(cache) > size:
+        cache.popitem(last=False)
+
+
+@callback
+def async_get_json_cache(hass: Any) -> JSONCache:
+    """Return the JSON cache shared by the connections of hass."""
+    cache = hass.data.get(DATA_JSON_CACHE)  # type: Optional[JSONCache]
+    if cache is None:
+        cache = hass.data[DATA_JSON_CACHE] = JSONCache()
+    return cache
@@ -12,7 +12,7 @@ import homeassistant.util.dt as dt_util
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import JSON_DUMP, JSONEncoder
 from homeassistant.helpers.storage import Store  # noqa  pylint_disable=unused-import
 
 DATA_RESTORE_STATE_TASK = 'restore_state_task'
@@ -22,9 +22,13 @@ _LOGGER = logging.getLogger(__name__)
 STORAGE_KEY = 'core.restore_state'
 STORAGE_VERSION = 1
 
-# How long between periodically saving the current states to disk
+# How long between periodically saving the changed states to disk
 STATE_DUMP_INTERVAL = timedelta(minutes=15)
 
+# How long between saving all states, which compacts the changes saved since
+# and marks the states of all current entities as seen
+STATE_COMPACT_INTERVAL = timedelta(days=1)
+
 # How long should a saved state be preserved if the entity no longer exists
 STATE_EXPIRATION = timedelta(days=7)
 
@@ -44,6 +48,14 @@ class StoredState:
             'last_seen': self.last_seen,
         }
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the stored state.
+
+        Reuses the JSON of the state.
+        """
+        return '{{"state": {}, "last_seen": {}}}'.format(
+            self.state.as_json(), JSON_DUMP(self.last_seen))
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> 'StoredState':
         """Initialize a stored state from a dict."""
@@ -71,18 +83,27 @@ class RestoreStateData():
 
                 try:
                     stored_states = await data.store.async_load()
+                    # The changes saved after the states replace them
+                    changes = await data.store.async_load_log()
                 except HomeAssistantError as exc:
                     _LOGGER.error("Error loading last states", exc_info=exc)
                     stored_states = None
+                    changes = []
 
-                if stored_states is None:
+                if stored_states is None and not changes:
                     _LOGGER.debug('Not creating cache - no saved states found')
                     data.last_states = {}
                 else:
-                    data.last_states = {
-                        item['state']['entity_id']: StoredState.from_dict(item)
-                        for item in stored_states
-                        if valid_entity_id(item['state']['entity_id'])}
+                    for item in (stored_states or []) + changes:
+                        entity_id = item['state']['entity_id']
+                        if not valid_entity_id(entity_id):
+                            continue
+                        stored_state = StoredState.from_dict(item)
+                        last = data.last_states.get(entity_id)
+                        # A log left by a crash while saving holds older states
+                        if last is None or last.state.last_updated <= \
+                                stored_state.state.last_updated:
+                            data.last_states[entity_id] = stored_state
                     _LOGGER.debug(
                         'Created cache with %s', list(data.last_states))
 
@@ -107,6 +128,10 @@ class RestoreStateData():
             encoder=JSONEncoder)  # type: Store
         self.last_states = {}  # type: Dict[str, StoredState]
         self.entity_ids = set()  # type: Set[str]
+        # The last saved state of each entity, to find the changed states
+        self._saved_states = {}  # type: Dict[str, State]
+        self._log_size = 0
+        self._last_dump = None  # type: Optional[datetime]
 
     def async_get_stored_states(self) -> List[StoredState]:
         """Get the set of states which should be stored.
@@ -141,13 +166,67 @@ class RestoreStateData():
     async def async_dump_states(self) -> None:
         """Save the current state machine to storage."""
         _LOGGER.debug("Dumping states")
+        stored_states = self.async_get_stored_states()
+        self._saved_states = {
+            stored_state.state.entity_id: stored_state.state
+            for stored_state in stored_states}
+        self._log_size = 0
+        self._last_dump = dt_util.utcnow()
+
         try:
             await self.store.async_save([
-                stored_state.as_dict()
-                for stored_state in self.async_get_stored_states()])
+                stored_state.as_dict() for stored_state in stored_states])
         except HomeAssistantError as exc:
             _LOGGER.error("Error saving current states", exc_info=exc)
 
+    async def async_dump_changes(self) -> None:
+        """Save the states that changed since they were last saved.
+
+        A state is not changed once it is set, so a changed state is a
+        different object. The changes are appended to the log of the store
+        and encoded in the executor.
+        """
+        now = dt_util.utcnow()
+        expiration_time = now - STATE_EXPIRATION
+        changes = []  # type: List[StoredState]
+
+        for entity_id in self.entity_ids:
+            state = self.hass.states.get(entity_id)
+            if state is not None and \
+                    self._saved_states.get(entity_id) is not state:
+                changes.append(StoredState(state, now))
+
+        # The states of removed entities
+        for entity_id, stored_state in self.last_states.items():
+            if self._saved_states.get(entity_id) is not stored_state.state \
+                    and stored_state.last_seen >= expiration_time and \
+                    self.hass.states.get(entity_id) is None:
+                changes.append(stored_state)
+
+        if not changes:
+            return
+
+        _LOGGER.debug("Dumping %s changed states", len(changes))
+        for stored_state in changes:
+            self._saved_states[stored_state.state.entity_id] = \
+                stored_state.state
+        self._log_size += len(changes)
+
+        await self.store.async_append_log(changes, StoredState.as_json)
+
+    async def async_dump_periodically(self) -> None:
+        """Save the changed states, or all states once in a while.
+
+        All states are saved once the changes outnumber them, or when they
+        were last saved STATE_COMPACT_INTERVAL ago.
+        """
+        if self._last_dump is None or \
+                self._log_size >= len(self._saved_states) or \
+                dt_util.utcnow() - self._last_dump >= STATE_COMPACT_INTERVAL:
+            await self.async_dump_states()
+        else:
+            await self.async_dump_changes()
+
     @callback
     def async_setup_dump(self, *args: Any) -> None:
         """Set up the restore state listeners."""
@@ -159,12 +238,12 @@ class RestoreStateData():
         # Dump states periodically
         async_track_time_interval(
             self.hass, lambda *_: self.hass.async_create_task(
-                self.async_dump_states()), STATE_DUMP_INTERVAL)
+                self.async_dump_periodically()), STATE_DUMP_INTERVAL)
 
-        # Dump states when stopping hass
+        # Dump changed states when stopping hass
         self.hass.bus.async_listen_once(
             EVENT_HOMEASSISTANT_STOP, lambda *_: self.hass.async_create_task(
-                self.async_dump_states()))
+                self.async_dump_changes()))
 
     @callback
     def async_restore_entity_added(self, entity_id: str) -> None:
@@ -1,5 +1,6 @@
 """Service calling related helpers."""
 import asyncio
+from collections import OrderedDict
 import logging
 from os import path
 
@@ -186,11 +187,34 @@ async def async_get_all_descriptions(hass):
     return descriptions
 
 
+def lookup_entities(entity_index, entity_ids):
+    """Look up entity ids in an entity_id -> (platform, entity) index.
+
+    Returns the (platform, entity) tuples in the order of entity_ids. Unknown
+    and repeated entity ids are skipped.
+    """
+    found = []
+    seen = set()
+
+    for entity_id in entity_ids:
+        if entity_id in seen:
+            continue
+        seen.add(entity_id)
+
+        item = entity_index.get(entity_id)
+        if item is not None:
+            found.append(item)
+
+    return found
+
+
 @bind_hass
-async def entity_service_call(hass, platforms, func, call):
+async def entity_service_call(hass, platforms, func, call, entity_index=None):
     """Handle an entity service call.
 
-    Calls all platforms simultaneously.
+    Calls all platforms simultaneously. The optional entity_index maps the
+    entity ids of the entities of platforms to their (platform, entity), so
+    targeted entities are looked up instead of searched.
     """
     if call.context.user_id:
         user = await hass.auth.async_get_user(call.context.user_id)
@@ -209,11 +233,6 @@ async def entity_service_call(hass, platforms, func, call):
             'deprecated. Use instead: entity_id: "%s"', ENTITY_MATCH_ALL)
         target_all_entities = True
 
-    if not target_all_entities:
-        # A set of entities we're trying to target.
-        entity_ids = set(
-            extract_entity_ids(hass, call, True))
-
     # If the service function is a string, we'll pass it the service call data
     if isinstance(func, str):
         data = {key: val for key, val in call.data.items()
@@ -222,37 +241,38 @@ async def entity_service_call(hass, platforms, func, call):
     else:
         data = call
 
-    # Check the permissions
-
-    # A list with for each platform in platforms a list of entities to call
-    # the service on.
-    platforms_entities = []
-
-    if entity_perms is None:
-        for platform in platforms:
-            if target_all_entities:
-                platforms_entities.append(list(platform.entities.values()))
-            else:
-                platforms_entities.append([
-                    entity for entity in platform.entities.values()
-                    if entity.entity_id in entity_ids
-                ])
-
-    elif target_all_entities:
-        # If we target all entities, we will select all entities the user
-        # is allowed to control.
-        for platform in platforms:
-            platforms_entities.append([
-                entity for entity in platform.entities.values()
-                if entity_perms(entity.entity_id, POLICY_CONTROL)])
+    # A list of (platform, entities to call the service on) tuples
+    if target_all_entities:
+        platforms_entities = [(platform, list(platform.entities.values()))
+                              for platform in platforms]
 
     else:
-        for platform in platforms:
-            platform_entities = []
-            for entity in platform.entities.values():
-                if entity.entity_id not in entity_ids:
-                    continue
+        if entity_index is None:
+            entity_index = {
+                entity.entity_id: (platform, entity)
+                for platform in platforms
+                for entity in platform.entities.values()}
+
+        grouped = OrderedDict()
+        for platform, entity in lookup_entities(
+                entity_index, extract_entity_ids(hass, call, True)):
+            grouped.setdefault(platform, []).append(entity)
+
+        platforms_entities = list(grouped.items())
 
+    # Check the permissions
+    if entity_perms is not None and target_all_entities:
+        # If we target all entities, we will select all entities the user
+        # is allowed to control.
+        platforms_entities = [
+            (platform, [entity for entity in entities
+                        if entity_perms(entity.entity_id, POLICY_CONTROL)])
+            for platform, entities in platforms_entities]
+
+    elif entity_perms is not None:
+        # All targeted entities are checked before any of them is called
+        for _, entities in platforms_entities:
+            for entity in entities:
                 if not entity_perms(entity.entity_id, POLICY_CONTROL):
                     raise Unauthorized(
                         context=call.context,
@@ -260,13 +280,9 @@ async def entity_service_call(hass, platforms, func, call):
                         permission=POLICY_CONTROL
                     )
 
-                platform_entities.append(entity)
-
-            platforms_entities.append(platform_entities)
-
     tasks = [
         _handle_service_platform_call(func, data, entities, call.context)
-        for platform, entities in zip(platforms, platforms_entities)
+        for _, entities in platforms_entities if entities
     ]
 
     if tasks:
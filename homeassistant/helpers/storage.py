@@ -3,7 +3,7 @@ import asyncio
 from json import JSONEncoder
 import logging
 import os
-from typing import Dict, List, Optional, Callable, Union
+from typing import Any, Dict, List, Optional, Callable, Union
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
@@ -66,6 +66,11 @@ class Store:
         """Return the config path."""
         return self.hass.config.path(STORAGE_DIR, self.key)
 
+    @property
+    def log_path(self) -> str:
+        """Return the path of the log of changes to the saved data."""
+        return self.path + '.log'
+
     async def async_load(self) -> Optional[Union[Dict, List]]:
         """Load data.
 
@@ -118,6 +123,26 @@ class Store:
         self._async_cleanup_stop_listener()
         await self._async_handle_write_data()
 
+    async def async_load_log(self) -> List:
+        """Load the entries appended to the log since the last save."""
+        return await self.hass.async_add_executor_job(
+            json_util.load_json_lines, self.log_path)
+
+    async def async_append_log(self, entries: List,
+                               encode: Callable[[Any], str]) -> None:
+        """Append entries to the log of changes to the saved data.
+
+        The entries are encoded with encode in the executor, so large logs
+        of changes don't block the event loop. The log is removed once the
+        data is saved again, so the saved data should include the changes.
+        """
+        async with self._write_lock:
+            try:
+                await self.hass.async_add_executor_job(
+                    self._append_log, self.log_path, entries, encode)
+            except json_util.WriteError as err:
+                _LOGGER.error('Error writing log for %s: %s', self.key, err)
+
     @callback
     def async_delay_save(self, data_func: Callable[[], Dict],
                          delay: Optional[int] = None):
@@ -192,6 +217,37 @@ class Store:
         _LOGGER.debug('Writing data for %s', self.key)
         json_util.save_json(path, data, self._private, encoder=self._encoder)
 
+        # The saved data includes the changes of the log
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            raise json_util.WriteError(err)
+
+    def _append_log(self, path: str, entries: List,
+                    encode: Callable[[Any], str]) -> None:
+        """Encode entries and append them to the log."""
+        lines = []
+        for entry in entries:
+            try:
+                lines.append(encode(entry))
+            except (ValueError, TypeError) as err:
+                _LOGGER.error('Unable to encode log entry for %s: %s',
+                              self.key, err)
+
+        if lines:
+            self._write_log(path, lines)
+
+    def _write_log(self, path: str, lines: List[str]) -> None:
+        """Append encoded entries to the log."""
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        _LOGGER.debug('Appending %s entries to log of %s', len(lines),
+                      self.key)
+        json_util.append_json_lines(path, lines, self._private)
+
     async def _async_migrate_func(self, old_version, old_data):
         """Migrate to the new version."""
         raise NotImplementedError
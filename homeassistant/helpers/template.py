@@ -8,25 +8,26 @@ import base64
 import re
 
 import jinja2
-from jinja2 import contextfilter
+from jinja2 import contextfilter, meta, nodes
 from jinja2.sandbox import ImmutableSandboxedEnvironment
 from jinja2.utils import Namespace
 
 from homeassistant.const import (
     ATTR_LATITUDE, ATTR_LONGITUDE, ATTR_UNIT_OF_MEASUREMENT, MATCH_ALL,
     STATE_UNKNOWN)
-from homeassistant.core import State, valid_entity_id
+from homeassistant.core import State, split_entity_id, valid_entity_id
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.helpers.typing import TemplateVarsType
 from homeassistant.loader import bind_hass
-from homeassistant.util import convert
+from homeassistant.util import LRUCache, convert
 from homeassistant.util import dt as dt_util
 from homeassistant.util import location as loc_util
 from homeassistant.util.async_ import run_callback_threadsafe
 
 _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
+_SENTINEL_MISSING = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
@@ -36,6 +37,31 @@ _RE_GET_ENTITIES = re.compile(
 )
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{")
 
+# RenderInfo of the template that is currently being rendered
+_RENDER_INFO = 'template.render_info'
+# Template globals bound to a hass instance, shared by its templates
+_DATA_GLOBALS = 'template.globals'
+
+# Maximum number of compiled templates shared by all Template instances
+COMPILE_CACHE_SIZE = 512
+# Maximum number of parsed JSON values shared by all Template instances
+JSON_CACHE_SIZE = 64
+
+# Globals bound to a hass instance by _ensure_compiled
+_HASS_GLOBALS = frozenset((
+    'closest', 'distance', 'is_state', 'is_state_attr', 'state_attr',
+    'states'))
+# Globals with results that only depend on their arguments and the states
+# read by the render. Templates using any other global, like now or
+# lipsum, are not memoized.
+_PURE_GLOBALS = frozenset((
+    'range', 'dict', 'cycler', 'joiner', 'namespace', 'log', 'sin', 'cos',
+    'tan', 'sqrt', 'pi', 'tau', 'e', 'float', 'as_timestamp', 'strptime',
+    'is_state', 'is_state_attr', 'state_attr', 'states'))
+# Filters with results that do not only depend on their input
+_VOLATILE_FILTERS = frozenset((
+    'random', 'timestamp_custom', 'timestamp_local'))
+
 
 @bind_hass
 def attach(hass, obj):
@@ -89,9 +115,148 @@ def extract_entities(template, variables=None):
     return MATCH_ALL
 
 
+# source -> (compiled code, if renders can be memoized)
+_COMPILE_CACHE = LRUCache(COMPILE_CACHE_SIZE)
+# JSON string -> parsed value, or _SENTINEL if invalid
+_JSON_CACHE = LRUCache(JSON_CACHE_SIZE)
+_RENDER_MEMO_STATS = {'hits': 0, 'misses': 0}
+
+
+def cache_info():
+    """Return the hit and miss counters of the template caches."""
+    return {
+        'compiled': _COMPILE_CACHE.as_dict(),
+        'json': _JSON_CACHE.as_dict(),
+        'render': dict(_RENDER_MEMO_STATS),
+    }
+
+
+def _compile(source):
+    """Return the compiled code of source and if renders can be memoized.
+
+    Compiled code is shared by all templates with the same source.
+    """
+    cached = _COMPILE_CACHE.get(source)
+    if cached is not None:
+        return cached
+
+    try:
+        ast = ENV.parse(source)
+        code = ENV.compile(ast)
+    except jinja2.exceptions.TemplateSyntaxError as err:
+        raise TemplateError(err)
+
+    used_globals = meta.find_undeclared_variables(ast) & (
+        set(ENV.globals) | _HASS_GLOBALS)
+    memoizable = not (
+        used_globals - _PURE_GLOBALS or
+        any(node.name in _VOLATILE_FILTERS
+            for node in ast.find_all(nodes.Filter)))
+
+    cached = (code, memoizable)
+    _COMPILE_CACHE[source] = cached
+    return cached
+
+
+def _parse_json(value):
+    """Return value parsed as JSON, or _SENTINEL if it is not valid JSON.
+
+    Parsed values are shared by all templates rendering the same value,
+    which is safe as the sandbox does not allow templates to modify them.
+    """
+    if not isinstance(value, (str, bytes)):
+        return _SENTINEL
+
+    parsed = _JSON_CACHE.get(value, _SENTINEL_MISSING)
+    if parsed is not _SENTINEL_MISSING:
+        return parsed
+
+    try:
+        parsed = json.loads(value)
+    except (ValueError, TypeError):
+        parsed = _SENTINEL
+
+    _JSON_CACHE[value] = parsed
+    return parsed
+
+
+class RenderInfo:
+    """Holds the result of a render and the states it accessed."""
+
+    def __init__(self, template):
+        """Initialize the render info."""
+        self.template = template
+        self.result = None
+        self.exception = None
+        # Entity ids accessed by the render
+        self.entities = set()
+        # Domains iterated or counted by the render
+        self.domains = set()
+        # If the render iterated or counted all states
+        self.all_states = False
+
+    def matches(self, entity_id):
+        """Return if a change of entity_id can change the result."""
+        return (self.all_states or entity_id in self.entities or
+                split_entity_id(entity_id)[0] in self.domains)
+
+    def merge(self, other):
+        """Add the states accessed by another render."""
+        self.entities |= other.entities
+        self.domains |= other.domains
+        self.all_states = self.all_states or other.all_states
+
+
+class _RenderMemo:
+    """Result of a render with the inputs it depends on."""
+
+    __slots__ = ('variables', 'states', 'result')
+
+    def __init__(self, hass, variables, entities, result):
+        """Initialize the memo."""
+        self.variables = variables
+        self.states = [(entity_id, hass.states.get(entity_id))
+                       for entity_id in entities]
+        self.result = result
+
+    def is_valid(self, hass, variables):
+        """Return if a render with variables has the same result."""
+        if self.variables != variables:
+            return False
+
+        get = hass.states.get
+        return all(get(entity_id) is state
+                   for entity_id, state in self.states)
+
+
+def _collect_entity(hass, entity_id):
+    """Record an accessed entity id in the active RenderInfo."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.entities.add(entity_id.lower())
+
+
+def _collect_domain(hass, domain):
+    """Record an accessed domain in the active RenderInfo."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.domains.add(domain.lower())
+
+
+def _collect_all_states(hass):
+    """Record an access of all states in the active RenderInfo."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.all_states = True
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
+    # Reuse the last result if the variables and read states are unchanged.
+    # Only used if template_memoize is enabled in the core configuration.
+    memoize = True
+
     def __init__(self, template, hass=None):
         """Instantiate a template."""
         if not isinstance(template, str):
@@ -100,17 +265,21 @@ class Template:
         self.template = template
         self._compiled_code = None
         self._compiled = None
+        self._memoizable = False
+        self._memo = None
         self.hass = hass
 
+    @property
+    def is_static(self):
+        """Return if the template is plain text without Jinja code."""
+        return _RE_JINJA_DELIMITERS.search(self.template) is None
+
     def ensure_valid(self):
         """Return if template is valid."""
         if self._compiled_code is not None:
             return
 
-        try:
-            self._compiled_code = ENV.compile(self.template)
-        except jinja2.exceptions.TemplateSyntaxError as err:
-            raise TemplateError(err)
+        self._compiled_code, self._memoizable = _compile(self.template)
 
     def extract_entities(self, variables=None):
         """Extract all entities for state_changed listener."""
@@ -136,10 +305,70 @@ class Template:
         if variables is not None:
             kwargs.update(variables)
 
+        return self._async_render(kwargs)
+
+    def _async_render(self, variables):
+        """Render the compiled template with variables.
+
+        If template_memoize is enabled, the last result is reused if the
+        variables and the states read by the render are unchanged. Renders
+        that iterate states are not memoized, as it is not known which
+        states they read.
+        """
+        if not (self.memoize and self._memoizable and
+                self.hass.config.template_memoize):
+            try:
+                return self._compiled.render(variables).strip()
+            except jinja2.TemplateError as err:
+                raise TemplateError(err)
+
+        memo = self._memo
+        if memo is not None and memo.is_valid(self.hass, variables):
+            _RENDER_MEMO_STATS['hits'] += 1
+            for entity_id, _ in memo.states:
+                _collect_entity(self.hass, entity_id)
+            return memo.result
+
+        _RENDER_MEMO_STATS['misses'] += 1
+        self._memo = None
+        outer_info = self.hass.data.get(_RENDER_INFO)
+        render_info = self.hass.data[_RENDER_INFO] = RenderInfo(self)
+
         try:
-            return self._compiled.render(kwargs).strip()
+            result = self._compiled.render(variables).strip()
         except jinja2.TemplateError as err:
             raise TemplateError(err)
+        finally:
+            self.hass.data[_RENDER_INFO] = outer_info
+            if outer_info is not None:
+                outer_info.merge(render_info)
+
+        if not (render_info.domains or render_info.all_states):
+            self._memo = _RenderMemo(
+                self.hass, variables, render_info.entities, result)
+
+        return result
+
+    def async_render_to_info(self, variables: TemplateVarsType = None,
+                             **kwargs) -> RenderInfo:
+        """Render given template and record the states it accessed.
+
+        Errors are stored in the returned RenderInfo instead of raised.
+
+        This method must be run in the event loop.
+        """
+        render_info = RenderInfo(self)
+        previous = self.hass.data.get(_RENDER_INFO)
+        self.hass.data[_RENDER_INFO] = render_info
+
+        try:
+            render_info.result = self.async_render(variables, **kwargs)
+        except TemplateError as ex:
+            render_info.exception = ex
+        finally:
+            self.hass.data[_RENDER_INFO] = previous
+
+        return render_info
 
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
@@ -165,14 +394,13 @@ class Template:
         variables = dict(variables or {})
         variables['value'] = value
 
-        try:
-            variables['value_json'] = json.loads(value)
-        except (ValueError, TypeError):
-            pass
+        value_json = _parse_json(value)
+        if value_json is not _SENTINEL:
+            variables['value_json'] = value_json
 
         try:
-            return self._compiled.render(variables).strip()
-        except jinja2.TemplateError as ex:
+            return self._async_render(variables)
+        except TemplateError as ex:
             if error_value is _SENTINEL:
                 _LOGGER.error(
                     "Error parsing value: %s (value: %s, template: %s)",
@@ -185,16 +413,18 @@ class Template:
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        template_methods = TemplateMethods(self.hass)
+        global_vars = self.hass.data.get(_DATA_GLOBALS)
 
-        global_vars = ENV.make_globals({
-            'closest': template_methods.closest,
-            'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': template_methods.is_state_attr,
-            'state_attr': template_methods.state_attr,
-            'states': AllStates(self.hass),
-        })
+        if global_vars is None:
+            template_methods = TemplateMethods(self.hass)
+            global_vars = self.hass.data[_DATA_GLOBALS] = ENV.make_globals({
+                'closest': template_methods.closest,
+                'distance': template_methods.distance,
+                'is_state': template_methods.is_state,
+                'is_state_attr': template_methods.is_state_attr,
+                'state_attr': template_methods.state_attr,
+                'states': AllStates(self.hass),
+            })
 
         self._compiled = jinja2.Template.from_code(
             ENV, self._compiled_code, global_vars, None)
@@ -221,17 +451,18 @@ class AllStates:
 
     def __iter__(self):
         """Return all states."""
-        return iter(
-            _wrap_state(state) for state in
-            sorted(self._hass.states.async_all(),
-                   key=lambda state: state.entity_id))
+        _collect_all_states(self._hass)
+        return iter(_wrap_state(state) for state in
+                    self._hass.states.async_all_sorted())
 
     def __len__(self):
         """Return number of states."""
-        return len(self._hass.states.async_entity_ids())
+        _collect_all_states(self._hass)
+        return self._hass.states.async_entity_ids_count()
 
     def __call__(self, entity_id):
         """Return the states."""
+        _collect_entity(self._hass, entity_id)
         state = self._hass.states.get(entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
@@ -246,19 +477,20 @@ class DomainStates:
 
     def __getattr__(self, name):
         """Return the states."""
-        return _wrap_state(
-            self._hass.states.get('{}.{}'.format(self._domain, name)))
+        entity_id = '{}.{}'.format(self._domain, name)
+        _collect_entity(self._hass, entity_id)
+        return _wrap_state(self._hass.states.get(entity_id))
 
     def __iter__(self):
         """Return the iteration over all the states."""
-        return iter(sorted(
-            (_wrap_state(state) for state in self._hass.states.async_all()
-             if state.domain == self._domain),
-            key=lambda state: state.entity_id))
+        _collect_domain(self._hass, self._domain)
+        return iter(_wrap_state(state) for state in
+                    self._hass.states.async_all_sorted(self._domain))
 
     def __len__(self):
         """Return number of states."""
-        return len(self._hass.states.async_entity_ids(self._domain))
+        _collect_domain(self._hass, self._domain)
+        return self._hass.states.async_entity_ids_count(self._domain)
 
 
 class TemplateState(State):
@@ -360,8 +592,9 @@ class TemplateMethods:
                 gr_entity_id = str(entities)
 
             group = self._hass.components.group
+            _collect_entity(self._hass, gr_entity_id)
 
-            states = [self._hass.states.get(entity_id) for entity_id
+            states = [self._get_state(entity_id) for entity_id
                       in group.expand_entity_ids([gr_entity_id])]
 
         return _wrap_state(loc_helper.closest(latitude, longitude, states))
@@ -421,6 +654,11 @@ class TemplateMethods:
         return self._hass.config.units.length(
             loc_util.distance(*locations[0] + locations[1]), 'm')
 
+    def is_state(self, entity_id, state):
+        """Test if a state is a specific value."""
+        state_obj = self._get_state(entity_id)
+        return state_obj is not None and state_obj.state == state
+
     def is_state_attr(self, entity_id, name, value):
         """Test if a state is a specific attribute."""
         state_attr = self.state_attr(entity_id, name)
@@ -428,7 +666,7 @@ class TemplateMethods:
 
     def state_attr(self, entity_id, name):
         """Get a specific attribute from a state."""
-        state_obj = self._hass.states.get(entity_id)
+        state_obj = self._get_state(entity_id)
         if state_obj is not None:
             return state_obj.attributes.get(name)
         return None
@@ -438,9 +676,14 @@ class TemplateMethods:
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         if isinstance(entity_id_or_state, str):
-            return self._hass.states.get(entity_id_or_state)
+            return self._get_state(entity_id_or_state)
         return None
 
+    def _get_state(self, entity_id):
+        """Return the state of entity_id and record the access."""
+        _collect_entity(self._hass, entity_id)
+        return self._hass.states.get(entity_id)
+
 
 def forgiving_round(value, precision=0):
     """Round accepted strings."""
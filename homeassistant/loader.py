@@ -10,12 +10,15 @@ call get_component(hass, 'switch.your_platform'). In both cases the config
 directory is checked to see if it contains a user provided version. If not
 available it will check the built-in components and platforms.
 """
+import ast
 import functools as ft
 import importlib
 import logging
+import os
+from stat import S_ISREG
 import sys
 from types import ModuleType
-from typing import Optional, Set, TYPE_CHECKING, Callable, Any, TypeVar  # noqa pylint: disable=unused-import
+from typing import Optional, Set, TYPE_CHECKING, Callable, Any, TypeVar, Dict, List, Tuple  # noqa pylint: disable=unused-import
 
 from homeassistant.const import PLATFORM_FORMAT
 from homeassistant.util import OrderedSet
@@ -35,9 +38,13 @@ _LOGGER = logging.getLogger(__name__)
 
 
 DATA_KEY = 'components'
+DATA_MANIFESTS = 'component_manifests'
 PATH_CUSTOM_COMPONENTS = 'custom_components'
 PACKAGE_COMPONENTS = 'homeassistant.components'
 
+MANIFEST_STORAGE_KEY = 'core.component_manifests'
+MANIFEST_STORAGE_VERSION = 1
+
 
 def set_component(hass,  # type: HomeAssistant
                   comp_name: str, component: Optional[ModuleType]) -> None:
@@ -162,6 +169,353 @@ def _load_file(hass,  # type: HomeAssistant
     return None
 
 
+async def async_get_component(hass,  # type: HomeAssistant
+                              comp_or_platform: str) -> Optional[ModuleType]:
+    """Load a component, importing it in the executor if needed.
+
+    This method is a coroutine.
+    """
+    cache = hass.data.get(DATA_KEY)
+    if cache is not None and comp_or_platform in cache:
+        return cache[comp_or_platform]  # type: ignore
+
+    return await hass.async_add_executor_job(
+        get_component, hass, comp_or_platform)
+
+
+async def async_get_platform(hass,  # type: HomeAssistant
+                             domain: str, platform_name: str) \
+                             -> Optional[ModuleType]:
+    """Load a platform, importing it in the executor if needed.
+
+    This method is a coroutine.
+    """
+    cache = hass.data.get(DATA_KEY)
+    platform_path = PLATFORM_FORMAT.format(
+        domain=domain, platform=platform_name)
+    if cache is not None and cache.get(platform_path) is not None:
+        return cache[platform_path]  # type: ignore
+
+    return await hass.async_add_executor_job(
+        get_platform, hass, domain, platform_name)
+
+
+class Manifest:
+    """Metadata of a component or platform.
+
+    The metadata is read from the source of the module, so it is known
+    without importing the module. DEPENDENCIES and REQUIREMENTS are named
+    like the module attributes so a manifest can stand in for its module.
+    """
+
+    def __init__(self, name: str, path: Optional[str],
+                 mtime: Optional[float], dependencies: List[str],
+                 requirements: List[str], config_schema: bool,
+                 platform_schema: bool) -> None:
+        """Initialize the manifest."""
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.DEPENDENCIES = dependencies  # pylint: disable=invalid-name
+        self.REQUIREMENTS = requirements  # pylint: disable=invalid-name
+        self.config_schema = config_schema
+        self.platform_schema = platform_schema
+
+    @classmethod
+    def from_module(cls, name: str, module: ModuleType) -> 'Manifest':
+        """Return the manifest of an imported module."""
+        return cls(
+            name, getattr(module, '__file__', None), None,
+            list(getattr(module, 'DEPENDENCIES', [])),
+            list(getattr(module, 'REQUIREMENTS', [])),
+            hasattr(module, 'CONFIG_SCHEMA'),
+            hasattr(module, 'PLATFORM_SCHEMA'))
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> 'Manifest':
+        """Return a manifest from its dictionary representation."""
+        return cls(name, data['path'], data['mtime'], data['dependencies'],
+                   data['requirements'], data['config_schema'],
+                   data['platform_schema'])
+
+    def as_dict(self) -> Dict:
+        """Return a dictionary representation of the manifest."""
+        return {
+            'path': self.path,
+            'mtime': self.mtime,
+            'dependencies': self.DEPENDENCIES,
+            'requirements': self.REQUIREMENTS,
+            'config_schema': self.config_schema,
+            'platform_schema': self.platform_schema,
+        }
+
+
+class _ManifestCache:
+    """Manifests by component or platform name."""
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self.manifests = {}  # type: Dict[str, Manifest]
+        # Names whose manifest was checked against its source in this run
+        self.checked = set()  # type: Set[str]
+        self.changed = False
+
+
+def _manifest_cache(hass  # type: HomeAssistant
+                    ) -> _ManifestCache:
+    """Return the manifest cache of hass."""
+    cache = hass.data.get(DATA_MANIFESTS)  # type: Optional[_ManifestCache]
+    if cache is None:
+        cache = hass.data[DATA_MANIFESTS] = _ManifestCache()
+    return cache
+
+
+def get_manifest(hass,  # type: HomeAssistant
+                 comp_or_platform: str) -> Optional[Manifest]:
+    """Return the manifest of a component or platform.
+
+    The module is only imported if its metadata cannot be read from its
+    source, like when a dependency is given as a variable. Manifests are
+    cached until the modification time of the source changes.
+
+    This reads from disk, so it must not be called from the event loop.
+    """
+    modules = hass.data.get(DATA_KEY)
+    if modules is not None and comp_or_platform in modules:
+        module = modules[comp_or_platform]
+        if module is None:
+            return None
+        return Manifest.from_module(comp_or_platform, module)
+
+    cache = _manifest_cache(hass)
+    source = _find_source(hass, comp_or_platform)
+
+    if source is not None:
+        path, mtime = source
+        manifest = cache.manifests.get(comp_or_platform)
+
+        if (manifest is not None and manifest.path == path and
+                manifest.mtime == mtime):
+            cache.checked.add(comp_or_platform)
+            return manifest
+
+        manifest = _parse_manifest(comp_or_platform, path, mtime)
+
+        if manifest is not None:
+            cache.manifests[comp_or_platform] = manifest
+            cache.checked.add(comp_or_platform)
+            cache.changed = True
+            return manifest
+
+    module = _load_file(hass, comp_or_platform)
+    if module is None:
+        return None
+
+    return Manifest.from_module(comp_or_platform, module)
+
+
+def get_platform_manifest(hass,  # type: HomeAssistant
+                          domain: str,
+                          platform_name: str) -> Optional[Manifest]:
+    """Return the manifest of the platform that get_platform would load.
+
+    Like get_platform, the {platform}.{domain} layout is tried if there is
+    no {domain}.{platform} module.
+
+    This reads from disk, so it must not be called from the event loop.
+    """
+    modules = hass.data.get(DATA_KEY) or {}
+
+    for platform_path in (
+            PLATFORM_FORMAT.format(domain=domain, platform=platform_name),
+            PLATFORM_FORMAT.format(domain=platform_name, platform=domain)):
+        if (platform_path in modules or
+                _find_source(hass, platform_path) is not None):
+            return get_manifest(hass, platform_path)
+
+    return None
+
+
+def _find_source(hass,  # type: HomeAssistant
+                 comp_or_platform: str) -> Optional[Tuple[str, float]]:
+    """Return path and mtime of the source that _load_file would import."""
+    roots = [os.path.join(os.path.dirname(__file__), 'components')]
+    if hass.config.config_dir is not None:
+        roots.insert(0, os.path.join(
+            hass.config.config_dir, PATH_CUSTOM_COMPONENTS))
+
+    parts = comp_or_platform.split('.')
+
+    for root in roots:
+        base = os.path.join(root, *parts)
+        for path in (base + '.py', os.path.join(base, '__init__.py')):
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            if S_ISREG(info.st_mode):
+                return path, info.st_mtime
+
+    return None
+
+
+def _parse_manifest(comp_or_platform: str, path: str,
+                    mtime: float) -> Optional[Manifest]:
+    """Read the manifest from the source of a module.
+
+    Returns None if DEPENDENCIES or REQUIREMENTS are not literal lists
+    assigned at the top level of the module.
+    """
+    try:
+        with open(path, encoding='utf-8') as source:
+            tree = ast.parse(source.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    values = {}  # type: Dict[str, List[str]]
+    names = set()  # type: Set[str]
+
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            names.update(alias.asname or alias.name for alias in node.names)
+            continue
+
+        if not isinstance(node, ast.Assign):
+            continue
+
+        for target in node.targets:
+            if not isinstance(target, ast.Name):
+                continue
+
+            names.add(target.id)
+
+            if target.id not in ('DEPENDENCIES', 'REQUIREMENTS'):
+                continue
+
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                return None
+
+            if not isinstance(value, (list, tuple)) or \
+                    not all(isinstance(item, str) for item in value):
+                return None
+
+            values[target.id] = list(value)
+
+    # Values that are changed anywhere else cannot be known from the source
+    top_level = set(id(target) for node in tree.body
+                    if isinstance(node, ast.Assign)
+                    for target in node.targets)
+
+    for child in ast.walk(tree):
+        if (isinstance(child, ast.Name) and
+                child.id in ('DEPENDENCIES', 'REQUIREMENTS') and
+                not isinstance(child.ctx, ast.Load) and
+                id(child) not in top_level):
+            return None
+
+    return Manifest(
+        comp_or_platform, path, mtime, values.get('DEPENDENCIES', []),
+        values.get('REQUIREMENTS', []), 'CONFIG_SCHEMA' in names,
+        'PLATFORM_SCHEMA' in names)
+
+
+def _cached_manifest(hass,  # type: HomeAssistant
+                     comp_or_platform: str) -> Tuple[bool, Optional[Manifest]]:
+    """Return if the manifest is known without reading from disk, and it.
+
+    Async friendly.
+    """
+    modules = hass.data.get(DATA_KEY)
+    if modules is not None and comp_or_platform in modules:
+        module = modules[comp_or_platform]
+        if module is None:
+            return True, None
+        return True, Manifest.from_module(comp_or_platform, module)
+
+    cache = _manifest_cache(hass)
+    if comp_or_platform in cache.checked:
+        return True, cache.manifests[comp_or_platform]
+
+    return False, None
+
+
+async def async_get_manifest(hass,  # type: HomeAssistant
+                             comp_or_platform: str) -> Optional[Manifest]:
+    """Return the manifest of a component or platform.
+
+    The manifest is read in the executor unless it is cached already.
+
+    This method is a coroutine.
+    """
+    found, manifest = _cached_manifest(hass, comp_or_platform)
+    if found:
+        return manifest
+
+    return await hass.async_add_executor_job(
+        get_manifest, hass, comp_or_platform)
+
+
+async def async_get_platform_manifest(hass,  # type: HomeAssistant
+                                      domain: str, platform_name: str) \
+                                      -> Optional[Manifest]:
+    """Return the manifest of the platform that get_platform would load.
+
+    The manifest is read in the executor unless it is cached already.
+
+    This method is a coroutine.
+    """
+    found, manifest = _cached_manifest(
+        hass, PLATFORM_FORMAT.format(domain=domain, platform=platform_name))
+    if found and manifest is not None:
+        return manifest
+
+    return await hass.async_add_executor_job(
+        get_platform_manifest, hass, domain, platform_name)
+
+
+async def async_load_manifests(hass  # type: HomeAssistant
+                               ) -> None:
+    """Load the manifests cached on disk.
+
+    This method is a coroutine.
+    """
+    from homeassistant.helpers.storage import Store
+
+    data = await Store(hass, MANIFEST_STORAGE_VERSION,
+                       MANIFEST_STORAGE_KEY).async_load()
+
+    if not isinstance(data, dict):
+        return
+
+    manifests = _manifest_cache(hass).manifests
+    for name, manifest in data.items():
+        if name not in manifests:
+            manifests[name] = Manifest.from_dict(name, manifest)
+
+
+async def async_save_manifests(hass  # type: HomeAssistant
+                               ) -> None:
+    """Save the manifests to disk if any changed.
+
+    This method is a coroutine.
+    """
+    from homeassistant.helpers.storage import Store
+
+    cache = _manifest_cache(hass)
+    if not cache.changed:
+        return
+
+    cache.changed = False
+    # Manifests are added from executor threads, so iterate over a copy
+    manifests = list(cache.manifests.items())
+    await Store(hass, MANIFEST_STORAGE_VERSION,
+                MANIFEST_STORAGE_KEY).async_save({
+                    name: manifest.as_dict()
+                    for name, manifest in manifests})
+
+
 class ModuleWrapper:
     """Class to wrap a Python module and auto fill in hass argument."""
 
@@ -236,27 +590,37 @@ def load_order_component(hass,  # type: HomeAssistant
     or the component could not be loaded. In both cases, the error is
     logged.
 
-    Async friendly.
+    This reads manifests from disk, so it must not be called from the
+    event loop.
     """
     return _load_order_component(hass, comp_name, OrderedSet(), set())
 
 
+async def async_load_order_component(hass,  # type: HomeAssistant
+                                     comp_name: str) -> OrderedSet:
+    """Return an OrderedSet of components in the correct order of loading.
+
+    The whole dependency tree is resolved in a single executor job.
+
+    This method is a coroutine.
+    """
+    return await hass.async_add_executor_job(
+        load_order_component, hass, comp_name)
+
+
 def _load_order_component(hass,  # type: HomeAssistant
                           comp_name: str, load_order: OrderedSet,
                           loading: Set) -> OrderedSet:
-    """Recursive function to get load order of components.
-
-    Async friendly.
-    """
-    component = get_component(hass, comp_name)
+    """Recursive function to get load order of components."""
+    manifest = get_manifest(hass, comp_name)
 
-    # If None it does not exist, error already thrown by get_component.
-    if component is None:
+    if manifest is None:
+        _LOGGER.error("Unable to find component %s", comp_name)
         return OrderedSet()
 
     loading.add(comp_name)
 
-    for dependency in getattr(component, 'DEPENDENCIES', []):
+    for dependency in manifest.DEPENDENCIES:
         # Check not already loaded
         if dependency in load_order:
             continue
@@ -2,7 +2,7 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from timeit import default_timer as timer
 
@@ -67,11 +67,13 @@ async def async_million_events(hass):
 
     hass.bus.async_listen(event_name, listener)
 
+    # Firing is timed as well, it is where listeners are looked up and
+    # their jobs are scheduled.
+    start = timer()
+
     for _ in range(10**6):
         hass.bus.async_fire(event_name)
 
-    start = timer()
-
     await event.wait()
 
     return timer() - start
@@ -107,6 +109,43 @@ async def async_million_time_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_time_changed_pending_timers(hass):
+    """Measure the cost of a timer tick as pending timers scale."""
+    ticks = 10**4
+    total = 0
+    now = datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
+    event_data = {ATTR_NOW: now}
+
+    @core.callback
+    def listener(_):
+        """Handle timer."""
+
+    for pending in (10, 100, 1000, 10000, 100000):
+        unsubs = [
+            hass.helpers.event.async_track_point_in_utc_time(
+                listener, now + timedelta(days=1, seconds=idx))
+            for idx in range(pending)
+        ]
+
+        start = timer()
+
+        for _ in range(ticks):
+            hass.bus.async_fire(EVENT_TIME_CHANGED, event_data)
+
+        await hass.async_block_till_done()
+
+        runtime = timer() - start
+        total += runtime
+        print('{} pending timers: {:.2f}us per tick'.format(
+            pending, runtime / ticks * 10**6))
+
+        for unsub in unsubs:
+            unsub()
+
+    return total
+
+
 @benchmark
 async def async_million_state_changed_helper(hass):
     """Run a million events through state changed helper."""
@@ -141,6 +180,248 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_state_changed_helper_scaling(hass):
+    """Run state changes with a growing number of state trackers."""
+    entity_id = 'light.kitchen'
+    events = 10**5
+    total = 0
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+
+    event_data = {
+        'entity_id': entity_id,
+        'old_state': core.State(entity_id, 'off'),
+        'new_state': core.State(entity_id, 'on'),
+    }
+
+    for trackers in (10, 100, 1000, 10000):
+        unsubs = [
+            hass.helpers.event.async_track_state_change(
+                'light.tracked_{}'.format(idx), listener)
+            for idx in range(trackers)
+        ]
+        unsubs.append(hass.helpers.event.async_track_state_change(
+            entity_id, listener))
+
+        start = timer()
+
+        for _ in range(events):
+            hass.bus.async_fire(EVENT_STATE_CHANGED, event_data)
+
+        await hass.async_block_till_done()
+
+        runtime = timer() - start
+        total += runtime
+        print('{} trackers: {:.0f} state changes/s'.format(
+            trackers, events / runtime))
+
+        for unsub in unsubs:
+            unsub()
+
+    return total
+
+
+@benchmark
+async def async_state_writes_100k(hass):
+    """Write 100k states to the state machine and measure their memory."""
+    import tracemalloc
+
+    writes = 10**5
+    entity_ids = ['sensor.power_{}'.format(idx) for idx in range(1000)]
+
+    def write_states(offset):
+        """Write the states, like entities that rebuild their attributes."""
+        for idx in range(writes):
+            hass.states.async_set(
+                entity_ids[idx % len(entity_ids)], offset + idx, {
+                    'unit_of_measurement': 'W',
+                    'friendly_name': 'Power',
+                })
+
+    start = timer()
+    write_states(0)
+    await hass.async_block_till_done()
+    runtime = timer() - start
+
+    # Memory is traced in a second run, tracing slows down the writes
+    tracemalloc.start()
+    write_states(writes)
+    await hass.async_block_till_done()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('{:.0f} state writes/s'.format(writes / runtime))
+    print('Memory: {:.0f} KiB allocated, {:.0f} KiB peak'.format(
+        current / 1024, peak / 1024))
+
+    return runtime
+
+
+@benchmark
+async def async_event_json_fan_out(hass):
+    """Encode state changes for a growing number of subscribed clients."""
+    from homeassistant.helpers.json import JSON_DUMP, JSONCache
+
+    entity_id = 'light.kitchen'
+    changes = 10**4
+    total = 0
+
+    for connections in (1, 5, 15, 50):
+        for shared in (False, True):
+            encode = JSONCache().event_json if shared else JSON_DUMP
+
+            @core.callback
+            def listener(event, encode=encode):
+                """Encode the event for a client."""
+                encode(event)
+
+            unsubs = [
+                hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+                for _ in range(connections)
+            ]
+
+            start = timer()
+
+            for idx in range(changes):
+                hass.states.async_set(
+                    entity_id, 'on' if idx % 2 else 'off',
+                    {'brightness': idx % 256, 'friendly_name': 'Kitchen'})
+
+            await hass.async_block_till_done()
+
+            runtime = timer() - start
+            total += runtime
+            print('{} connections, {}: {:.0f} state changes/s'.format(
+                connections, 'shared' if shared else 'per connection',
+                changes / runtime))
+
+            for unsub in unsubs:
+                unsub()
+
+    return total
+
+
+@benchmark
+async def get_states_3000(hass):
+    """Encode all states for clients loading a dashboard."""
+    from homeassistant.helpers.json import JSON_DUMP
+
+    entities = 3000
+    loads = 100
+
+    for idx in range(entities):
+        hass.states.async_set(
+            'sensor.sensor_{}'.format(idx), idx,
+            {'unit_of_measurement': 'W', 'friendly_name': 'Sensor {}'.format(
+                idx)})
+
+    states = hass.states.async_all()
+
+    start = timer()
+    for _ in range(loads):
+        JSON_DUMP(states)
+    print('Whole state machine: {:.1f} loads/s'.format(
+        loads / (timer() - start)))
+
+    start = timer()
+    for _ in range(loads):
+        '[{}]'.format(', '.join(state.as_json() for state in states))
+    runtime = timer() - start
+    print('Cached state JSON: {:.1f} loads/s'.format(loads / runtime))
+
+    return runtime
+
+
+@benchmark
+async def mqtt_message_routing(hass):
+    """Route MQTT messages with a growing number of subscriptions."""
+    from paho.mqtt.client import MQTTMessage
+    from homeassistant.components import mqtt
+
+    messages = 10**4
+    total = 0
+    client = mqtt.MQTT(hass, 'localhost', 1883, None, None, None, None,
+                       None, None, None, None, None, None, None, None)
+
+    async def perform_subscription(topic, qos):
+        """Skip subscribing at the broker."""
+
+    # pylint: disable=protected-access
+    client._async_perform_subscription = perform_subscription
+
+    @core.callback
+    def msg_callback(topic, payload, qos):
+        """Handle message."""
+
+    subscribed = 0
+    for subscriptions in (10, 100, 800, 5000):
+        while subscribed < subscriptions:
+            await client.async_subscribe(
+                'home/device_{}/state'.format(subscribed), msg_callback,
+                0, 'utf-8')
+            subscribed += 1
+
+        msgs = []
+        for idx in range(messages):
+            msg = MQTTMessage(topic='home/device_{}/state'.format(
+                idx % subscriptions).encode())
+            msg.payload = b'ON'
+            msgs.append(msg)
+
+        start = timer()
+
+        for msg in msgs:
+            client._mqtt_handle_message(msg)
+
+        runtime = timer() - start
+        total += runtime
+        print('{} subscriptions: {:.0f} messages/s'.format(
+            subscriptions, messages / runtime))
+
+    return total
+
+
+@benchmark
+async def auth_refresh_token_lookup(hass):
+    """Look up refresh tokens by token and by id among 10k tokens."""
+    import tempfile
+    from homeassistant.auth import auth_store
+
+    tokens = 10**4
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        store = auth_store.AuthStore(hass)
+        await store.async_get_users()
+        user = await store.async_create_user('Benchmark')
+
+        refresh_tokens = []
+        for idx in range(tokens):
+            refresh_tokens.append(await store.async_create_refresh_token(
+                user, 'http://localhost:{}/'.format(idx)))
+
+        start = timer()
+
+        for refresh_token in refresh_tokens:
+            await store.async_get_refresh_token_by_token(refresh_token.token)
+
+        by_token = timer() - start
+        print('By token: {:.0f} lookups/s'.format(tokens / by_token))
+
+        start = timer()
+
+        for refresh_token in refresh_tokens:
+            await store.async_get_refresh_token(refresh_token.id)
+
+        by_id = timer() - start
+        print('By id: {:.0f} lookups/s'.format(tokens / by_id))
+
+    return by_token + by_id
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
@@ -185,7 +466,8 @@ def _logbook_filtering(hass, last_changed, last_updated):
     start = timer()
 
     # pylint: disable=protected-access
-    events = logbook._exclude_events(events, {})
+    events = logbook._exclude_events(
+        events, logbook._generate_filter_from_config({}))
     list(logbook.humanify(None, events))
 
     return timer() - start
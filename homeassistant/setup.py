@@ -1,10 +1,11 @@
 """All methods needed to bootstrap a Home Assistant instance."""
 import asyncio
+from collections import OrderedDict
 import logging.handlers
 from timeit import default_timer as timer
 
 from types import ModuleType
-from typing import Awaitable, Callable, Optional, Dict, List
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Union
 
 from homeassistant import requirements, core, loader, config as conf_util
 from homeassistant.config import async_notify_setup_error
@@ -19,9 +20,161 @@ ATTR_COMPONENT = 'component'
 
 DATA_SETUP = 'setup_tasks'
 DATA_DEPS_REQS = 'deps_reqs_processed'
+DATA_SETUP_TIMELINE = 'setup_timeline'
 
 SLOW_SETUP_WARNING = 10
 
+PHASE_DEPENDENCIES = 'dependencies'
+PHASE_REQUIREMENTS = 'requirements'
+PHASE_IMPORT = 'import'
+PHASE_SETUP = 'setup'
+PHASE_ENTITIES = 'entities'
+
+
+class SetupTiming:
+    """Time spent setting up one component or platform."""
+
+    __slots__ = ('name', 'start', 'end', 'phases', 'executor', 'coroutine',
+                 'dependencies')
+
+    def __init__(self, name: str, start: float) -> None:
+        """Initialize a timing that starts at start."""
+        self.name = name
+        self.start = start
+        self.end = start
+        self.phases = OrderedDict()  # type: Dict[str, float]
+        # Seconds spent in executor jobs and awaiting coroutines. Both are
+        # wall time, awaiting includes the time the loop ran other tasks.
+        self.executor = 0.0
+        self.coroutine = 0.0
+        self.dependencies = []  # type: List[str]
+
+    def as_dict(self, origin: float) -> Dict[str, Any]:
+        """Return a dictionary with times relative to origin."""
+        return {
+            'name': self.name,
+            'start': round(self.start - origin, 4),
+            'end': round(self.end - origin, 4),
+            'duration': round(self.end - self.start, 4),
+            'phases': {phase: round(duration, 4)
+                       for phase, duration in self.phases.items()},
+            'executor': round(self.executor, 4),
+            'coroutine': round(self.coroutine, 4),
+            'dependencies': self.dependencies,
+        }
+
+
+class SetupTimeline:
+    """Record when components and platforms are set up.
+
+    Every setup is split in phases: waiting for its dependencies, checking
+    its requirements, importing it, running its setup and, for platforms,
+    adding its entities. The critical path is the chain of setups that
+    decided when the last setup finished.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a timeline that starts now."""
+        self.origin = timer()
+        self.startup_time = None  # type: Optional[float]
+        self.timings = OrderedDict()  # type: Dict[str, SetupTiming]
+
+    @core.callback
+    def async_start(self, name: str) -> SetupTiming:
+        """Return the timing of name, which starts now if it is new."""
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = SetupTiming(name, timer())
+        return timing
+
+    @core.callback
+    def async_finish(self, name: str) -> None:
+        """Mark the setup of name as finished now."""
+        timing = self.async_start(name)
+        timing.end = max(timing.end, timer())
+
+    @core.callback
+    def async_add(self, name: str, phase: str, duration: float,
+                  executor: Optional[bool] = None) -> None:
+        """Add a phase of duration seconds that just finished.
+
+        Executor tells if the phase was an executor job or an awaited
+        coroutine, None if it was only waiting.
+        """
+        now = timer()
+        timing = self.async_start(name)
+        timing.start = min(timing.start, now - duration)
+        timing.end = max(timing.end, now)
+        timing.phases[phase] = timing.phases.get(phase, 0) + duration
+
+        if executor is True:
+            timing.executor += duration
+        elif executor is False:
+            timing.coroutine += duration
+
+    @core.callback
+    def async_add_dependencies(self, name: str,
+                               dependencies: List[str]) -> None:
+        """Record the setups that name waited for."""
+        timing = self.async_start(name)
+        for dependency in dependencies:
+            if dependency not in timing.dependencies:
+                timing.dependencies.append(dependency)
+
+    @core.callback
+    def async_startup_done(self) -> None:
+        """Mark the startup of Home Assistant as finished."""
+        self.startup_time = timer() - self.origin
+
+    def critical_path(self) -> List[str]:
+        """Return the chain of setups that finished last, first to last.
+
+        A setup is preceded by the dependency or, for a component, the
+        platform that finished last before it.
+        """
+        if not self.timings:
+            return []
+
+        timing = max(self.timings.values(), key=lambda item: item.end)
+        path = [timing.name]
+
+        while True:
+            prefix = timing.name + '.'
+            before = [
+                item for name, item in self.timings.items()
+                if item.end <= timing.end and item is not timing and
+                (name in timing.dependencies or name.startswith(prefix))]
+
+            if not before:
+                break
+
+            timing = max(before, key=lambda item: item.end)
+            path.append(timing.name)
+
+        path.reverse()
+        return path
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a dictionary representation of the timeline."""
+        startup_time = self.startup_time
+        return {
+            'startup_time': None if startup_time is None else round(
+                startup_time, 4),
+            'setups': [timing.as_dict(self.origin) for timing in sorted(
+                self.timings.values(), key=lambda item: item.start)],
+            'critical_path': self.critical_path(),
+        }
+
+
+@core.callback
+def async_get_setup_timeline(hass: core.HomeAssistant) -> SetupTimeline:
+    """Return the setup timeline of hass."""
+    timeline = hass.data.get(
+        DATA_SETUP_TIMELINE)  # type: Optional[SetupTimeline]
+    if timeline is None:
+        timeline = hass.data[DATA_SETUP_TIMELINE] = SetupTimeline()
+    return timeline
+
 
 def setup_component(hass: core.HomeAssistant, domain: str,
                     config: Optional[Dict] = None) -> bool:
@@ -50,8 +203,12 @@ async def async_setup_component(hass: core.HomeAssistant, domain: str,
     if setup_tasks is None:
         setup_tasks = hass.data[DATA_SETUP] = {}
 
+    timeline = async_get_setup_timeline(hass)
+    timeline.async_start(domain)
+
     task = setup_tasks[domain] = hass.async_create_task(
         _async_setup_component(hass, domain, config))
+    task.add_done_callback(lambda _: timeline.async_finish(domain))
 
     return await task  # type: ignore
 
@@ -100,20 +257,29 @@ async def _async_setup_component(hass: core.HomeAssistant,
         _LOGGER.error("Setup failed for %s: %s", domain, msg)
         async_notify_setup_error(hass, domain, link)
 
-    component = loader.get_component(hass, domain)
-
-    if not component:
+    if await loader.async_get_manifest(hass, domain) is None:
         log_error("Component not found.", False)
         return False
 
-    # Validate no circular dependencies
-    components = loader.load_order_component(hass, domain)
+    # Validate no circular dependencies. The dependencies are resolved from
+    # their manifests, so they are not imported before they are set up.
+    components = await loader.async_load_order_component(hass, domain)
 
     # OrderedSet is empty if component or dependencies could not be resolved
     if not components:
         log_error("Unable to resolve component or dependencies.")
         return False
 
+    timeline = async_get_setup_timeline(hass)
+
+    start = timer()
+    component = await loader.async_get_component(hass, domain)
+    timeline.async_add(domain, PHASE_IMPORT, timer() - start, True)
+
+    if not component:
+        log_error("Component not found.", False)
+        return False
+
     processed_config = \
         conf_util.async_process_component_config(hass, config, domain)
 
@@ -139,8 +305,10 @@ async def _async_setup_component(hass: core.HomeAssistant,
             "Setup of %s is taking over %s seconds.",
             domain, SLOW_SETUP_WARNING)
 
+    in_executor = not hasattr(component, 'async_setup')
+
     try:
-        if hasattr(component, 'async_setup'):
+        if not in_executor:
             result = await component.async_setup(  # type: ignore
                 hass, processed_config)
         else:
@@ -152,6 +320,7 @@ async def _async_setup_component(hass: core.HomeAssistant,
         return False
     finally:
         end = timer()
+        timeline.async_add(domain, PHASE_SETUP, end - start, in_executor)
         if warn_task:
             warn_task.cancel()
     _LOGGER.info("Setup of domain %s took %.1f seconds.", domain, end - start)
@@ -199,7 +368,23 @@ async def async_prepare_setup_platform(hass: core.HomeAssistant, config: Dict,
                       platform_path, msg)
         async_notify_setup_error(hass, platform_path)
 
-    platform = loader.get_platform(hass, domain, platform_name)
+    # Process dependencies and requirements from the manifest, so the
+    # requirements are installed before the platform is imported.
+    manifest = await loader.async_get_platform_manifest(
+        hass, domain, platform_name)
+
+    if manifest is not None and platform_path not in hass.config.components:
+        try:
+            await async_process_deps_reqs(
+                hass, config, platform_path, manifest)
+        except HomeAssistantError as err:
+            log_error(str(err))
+            return None
+
+    start = timer()
+    platform = await loader.async_get_platform(hass, domain, platform_name)
+    async_get_setup_timeline(hass).async_add(
+        platform_path, PHASE_IMPORT, timer() - start, True)
 
     # Not found
     if platform is None:
@@ -222,10 +407,11 @@ async def async_prepare_setup_platform(hass: core.HomeAssistant, config: Dict,
 
 async def async_process_deps_reqs(
         hass: core.HomeAssistant, config: Dict, name: str,
-        module: ModuleType) -> None:
+        module: Union[ModuleType, loader.Manifest]) -> None:
     """Process all dependencies and requirements for a module.
 
-    Module is a Python module of either a component or platform.
+    Module is a Python module of either a component or platform, or its
+    loader.Manifest.
     """
     processed = hass.data.get(DATA_DEPS_REQS)
 
@@ -234,16 +420,27 @@ async def async_process_deps_reqs(
     elif name in processed:
         return
 
+    timeline = async_get_setup_timeline(hass)
+
     if hasattr(module, 'DEPENDENCIES'):
+        start = timer()
         dep_success = await _async_process_dependencies(
             hass, config, name, module.DEPENDENCIES)  # type: ignore
+        if module.DEPENDENCIES:  # type: ignore
+            timeline.async_add(name, PHASE_DEPENDENCIES, timer() - start)
+            timeline.async_add_dependencies(
+                name, module.DEPENDENCIES)  # type: ignore
 
         if not dep_success:
             raise HomeAssistantError("Could not set up all dependencies.")
 
     if not hass.config.skip_pip and hasattr(module, 'REQUIREMENTS'):
+        start = timer()
         req_success = await requirements.async_process_requirements(
             hass, name, module.REQUIREMENTS)  # type: ignore
+        if module.REQUIREMENTS:  # type: ignore
+            timeline.async_add(
+                name, PHASE_REQUIREMENTS, timer() - start, True)
 
         if not req_success:
             raise HomeAssistantError("Could not install all requirements.")
@@ -1,5 +1,6 @@
 """Helper methods for various modules."""
 import asyncio
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from itertools import chain
 import threading
@@ -231,6 +232,58 @@ class OrderedSet(MutableSet[T]):
         return set(self) == set(other)
 
 
+class LRUCache:
+    """Thread-safe mapping that keeps the most recently used items.
+
+    Lookups are counted as hits and misses.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize the cache."""
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the value for key and mark it as recently used."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """Store a value and evict the least recently used items."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Return the number of cached items."""
+        return len(self._data)
+
+    def clear(self) -> None:
+        """Remove all items."""
+        with self._lock:
+            self._data.clear()
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return the size and the counters of the cache."""
+        return {
+            'size': self.size,
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
 class Throttle:
     """A class for throttling the execution of tasks.
 
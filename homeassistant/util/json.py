@@ -75,3 +75,48 @@ def save_json(filename: str, data: Union[List, Dict],
                 # If we are cleaning up then something else went wrong, so
                 # we should suppress likely follow-on errors in the cleanup
                 _LOGGER.error("JSON replacement cleanup failed: %s", err)
+
+
+def append_json_lines(filename: str, lines: List[str],
+                      private: bool = False) -> None:
+    """Append encoded JSON values to a file, one per line.
+
+    The lines are flushed to disk before returning.
+    """
+    try:
+        fdesc = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                        0o600 if private else 0o644)
+        with open(fdesc, 'a', encoding='utf-8') as log:
+            log.write(''.join(line + '\n' for line in lines))
+            log.flush()
+            os.fsync(log.fileno())
+    except OSError as error:
+        _LOGGER.exception('Appending to JSON file failed: %s', filename)
+        raise WriteError(error)
+
+
+def load_json_lines(filename: str) -> List:
+    """Load the JSON values of a file, one per line.
+
+    Lines that can't be parsed, for example a line that was only partially
+    written before a crash, are skipped. Returns an empty list if the file
+    is not found.
+    """
+    values = []
+
+    try:
+        with open(filename, encoding='utf-8') as fdesc:
+            for line in fdesc:
+                try:
+                    values.append(json.loads(line))
+                except ValueError:
+                    _LOGGER.warning('Skipping invalid JSON line in %s',
+                                    filename)
+    except FileNotFoundError:
+        # This is not a fatal error
+        _LOGGER.debug('JSON file not found: %s', filename)
+    except OSError as error:
+        _LOGGER.exception('JSON file reading failed: %s', filename)
+        raise HomeAssistantError(error)
+
+    return values
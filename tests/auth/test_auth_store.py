@@ -218,3 +218,61 @@ async def test_system_groups_store_id_and_name(hass, hass_storage):
             'name': auth_store.GROUP_NAME_READ_ONLY,
         },
     ]
+
+
+async def test_refresh_token_index(hass, hass_storage):
+    """Test the refresh token lookups follow loads, creates and removes."""
+    hass_storage[auth_store.STORAGE_KEY] = {
+        'version': 1,
+        'data': {
+            'credentials': [],
+            'users': [
+                {
+                    "id": "user-id",
+                    "is_active": True,
+                    "is_owner": True,
+                    "name": "Paulus",
+                    "system_generated": False,
+                },
+            ],
+            "refresh_tokens": [
+                {
+                    "access_token_expiration": 1800.0,
+                    "client_id": "http://localhost:8123/",
+                    "created_at": "2018-10-03T13:43:19.774637+00:00",
+                    "id": "user-token-id",
+                    "jwt_key": "some-key",
+                    "last_used_at": "2018-10-03T13:43:19.774712+00:00",
+                    "token": "some-token",
+                    "user_id": "user-id"
+                },
+            ]
+        }
+    }
+
+    store = auth_store.AuthStore(hass)
+    loaded = await store.async_get_refresh_token('user-token-id')
+    assert loaded is not None
+    assert await store.async_get_refresh_token_by_token('some-token') \
+        is loaded
+    assert await store.async_get_refresh_token_by_token('some-toke') is None
+    assert await store.async_get_refresh_token('unknown-id') is None
+
+    user = await store.async_get_user('user-id')
+    created = await store.async_create_refresh_token(
+        user, 'http://localhost:8123/')
+    assert await store.async_get_refresh_token(created.id) is created
+    assert await store.async_get_refresh_token_by_token(created.token) \
+        is created
+
+    await store.async_remove_refresh_token(created)
+    assert await store.async_get_refresh_token(created.id) is None
+    assert await store.async_get_refresh_token_by_token(created.token) \
+        is None
+    assert await store.async_get_refresh_token_by_token('some-token') \
+        is loaded
+
+    await store.async_remove_user(user)
+    assert await store.async_get_refresh_token('user-token-id') is None
+    assert await store.async_get_refresh_token_by_token('some-token') \
+        is None
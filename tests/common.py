@@ -124,6 +124,7 @@ async def async_test_home_assistant(loop):
     INSTANCES.append(hass)
 
     orig_async_add_job = hass.async_add_job
+    orig_async_add_hass_job = hass.async_add_hass_job
     orig_async_add_executor_job = hass.async_add_executor_job
     orig_async_create_task = hass.async_create_task
 
@@ -133,6 +134,12 @@ async def async_test_home_assistant(loop):
             return mock_coro(target(*args))
         return orig_async_add_job(target, *args)
 
+    def async_add_hass_job(hassjob, *args):
+        """Add job of which the job type is known."""
+        if isinstance(hassjob.target, Mock):
+            return mock_coro(hassjob.target(*args))
+        return orig_async_add_hass_job(hassjob, *args)
+
     def async_add_executor_job(target, *args):
         """Add executor job."""
         if isinstance(target, Mock):
@@ -146,6 +153,7 @@ async def async_test_home_assistant(loop):
         return orig_async_create_task(coroutine)
 
     hass.async_add_job = async_add_job
+    hass.async_add_hass_job = async_add_hass_job
     hass.async_add_executor_job = async_add_executor_job
     hass.async_create_task = async_create_task
 
@@ -705,6 +713,7 @@ def init_recorder_component(hass, add_config=None):
     """Initialize the recorder."""
     config = dict(add_config) if add_config else {}
     config[recorder.CONF_DB_URL] = 'sqlite://'  # In memory DB
+    config.setdefault(recorder.CONF_COMMIT_INTERVAL, 0)
 
     with patch('homeassistant.components.recorder.migration.migrate_schema'):
         assert setup_component(hass, recorder.DOMAIN,
@@ -823,7 +832,8 @@ class MockEntity(entity.Entity):
 def mock_storage(data=None):
     """Mock storage.
 
-    Data is a dict {'key': {'version': version, 'data': data}}
+    Data is a dict {'key': {'version': version, 'data': data}}. Entries
+    appended to the log of a store are kept in a list under 'log'.
 
     Written data will be converted to JSON to ensure JSON parsing works.
     """
@@ -859,10 +869,28 @@ def mock_storage(data=None):
         data[store.key] = json.loads(json.dumps(
             data_to_write, cls=store._encoder))
 
+    def mock_write_log(store, path, lines):
+        """Mock version of write log."""
+        _LOGGER.info('Appending to log of %s: %s', store.key, lines)
+        stored = data.setdefault(store.key, {
+            'version': store.version,
+            'key': store.key,
+            'data': None,
+        })
+        stored.setdefault('log', []).extend(json.loads(line) for line in lines)
+
+    async def mock_async_load_log(store):
+        """Mock version of load log."""
+        return list(data.get(store.key, {}).get('log', []))
+
     with patch('homeassistant.helpers.storage.Store._async_load',
                side_effect=mock_async_load, autospec=True), \
         patch('homeassistant.helpers.storage.Store._write_data',
-              side_effect=mock_write_data, autospec=True):
+              side_effect=mock_write_data, autospec=True), \
+        patch('homeassistant.helpers.storage.Store._write_log',
+              side_effect=mock_write_log, autospec=True), \
+        patch('homeassistant.helpers.storage.Store.async_load_log',
+              side_effect=mock_async_load_log, autospec=True):
         yield data
 
 
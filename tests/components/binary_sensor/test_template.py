@@ -370,67 +370,89 @@ async def test_template_delay_off(hass):
     assert state.state == 'on'
 
 
-async def test_no_update_template_match_all(hass, caplog):
-    """Test that we do not update sensors that match on all."""
+async def test_templates_track_rendered_states(hass, caplog):
+    """Test binary sensors track the states accessed by their templates."""
     hass.states.async_set('binary_sensor.test_sensor', 'true')
 
     await setup.async_setup_component(hass, 'binary_sensor', {
         'binary_sensor': {
             'platform': 'template',
             'sensors': {
-                'all_state': {
+                'no_states': {
                     'value_template': '{{ "true" }}',
                 },
-                'all_icon': {
+                'icon': {
                     'value_template':
                         '{{ states.binary_sensor.test_sensor.state }}',
                     'icon_template': '{{ 1 + 1 }}',
                 },
-                'all_entity_picture': {
+                'domain': {
                     'value_template':
-                        '{{ states.binary_sensor.test_sensor.state }}',
-                    'entity_picture_template': '{{ 1 + 1 }}',
+                        '{{ states.light | selectattr("state", "eq", "on") '
+                        '| list | count > 0 }}',
                 },
             }
         }
     })
     await hass.async_block_till_done()
-    assert len(hass.states.async_all()) == 4
-    assert ('Template binary sensor all_state has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the value template') in caplog.text
-    assert ('Template binary sensor all_icon has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the icon template') in caplog.text
-    assert ('Template binary sensor all_entity_picture has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the entity_picture template') in caplog.text
-
-    assert hass.states.get('binary_sensor.all_state').state == 'off'
-    assert hass.states.get('binary_sensor.all_icon').state == 'off'
-    assert hass.states.get('binary_sensor.all_entity_picture').state == 'off'
 
     hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
     await hass.async_block_till_done()
 
-    assert hass.states.get('binary_sensor.all_state').state == 'on'
-    assert hass.states.get('binary_sensor.all_icon').state == 'on'
-    assert hass.states.get('binary_sensor.all_entity_picture').state == 'on'
+    assert hass.states.get('binary_sensor.no_states').state == 'on'
+    assert hass.states.get('binary_sensor.icon').state == 'on'
+    assert hass.states.get('binary_sensor.domain').state == 'off'
+
+    assert ('Template binary sensor no_states has no entity ids configured '
+            'to track nor were we able to extract the entities to track '
+            'from the value template') in caplog.text
+    assert ('Template binary sensor icon has no entity ids configured to '
+            'track nor were we able to extract the entities to track from '
+            'the icon template') in caplog.text
+    assert 'Template binary sensor domain has no entity ids' \
+        not in caplog.text
+
+    with mock.patch('homeassistant.helpers.template.Template.async_render',
+                    side_effect=template_hlpr.Template.async_render,
+                    autospec=True) as mock_render:
+        hass.states.async_set('binary_sensor.test_sensor', 'false')
+        await hass.async_block_till_done()
+
+        assert hass.states.get('binary_sensor.icon').state == 'off'
+        # Only the templates of binary_sensor.icon are rendered again
+        assert mock_render.call_count == 2
+
+        hass.states.async_set('light.kitchen', 'on')
+        await hass.async_block_till_done()
 
-    hass.states.async_set('binary_sensor.test_sensor', 'false')
+        assert hass.states.get('binary_sensor.domain').state == 'on'
+        assert mock_render.call_count == 3
+
+
+async def test_no_tracking_after_removal(hass):
+    """Test a removed binary sensor does not track its templates."""
+    hass.states.async_set('binary_sensor.test_sensor', 'true')
+
+    await setup.async_setup_component(hass, 'binary_sensor', {
+        'binary_sensor': {
+            'platform': 'template',
+            'sensors': {
+                'removed': {
+                    'value_template':
+                        '{{ states.binary_sensor.test_sensor.state }}',
+                },
+            }
+        }
+    })
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
     await hass.async_block_till_done()
 
-    assert hass.states.get('binary_sensor.all_state').state == 'on'
-    assert hass.states.get('binary_sensor.all_icon').state == 'on'
-    assert hass.states.get('binary_sensor.all_entity_picture').state == 'on'
+    entity = hass.data['binary_sensor'].get_entity('binary_sensor.removed')
+    await entity.async_remove()
 
-    await hass.helpers.entity_component.async_update_entity(
-        'binary_sensor.all_state')
-    await hass.helpers.entity_component.async_update_entity(
-        'binary_sensor.all_icon')
-    await hass.helpers.entity_component.async_update_entity(
-        'binary_sensor.all_entity_picture')
+    with mock.patch('homeassistant.components.binary_sensor.template.'
+                    'async_track_render_info') as mock_track:
+        await entity.async_update()
 
-    assert hass.states.get('binary_sensor.all_state').state == 'on'
-    assert hass.states.get('binary_sensor.all_icon').state == 'off'
-    assert hass.states.get('binary_sensor.all_entity_picture').state == 'off'
+    assert not mock_track.called
+    assert entity._remove_listener is None
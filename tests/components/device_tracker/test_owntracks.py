@@ -308,6 +308,7 @@ async def setup_owntracks(hass, config,
             patch.object(owntracks, 'OwnTracksContext', ctx_cls):
         assert await async_setup_component(
             hass, 'owntracks', {'owntracks': config})
+        await hass.async_block_till_done()
 
 
 @pytest.fixture
@@ -3,13 +3,14 @@
 import asyncio
 from collections import OrderedDict
 import unittest
-from unittest.mock import patch
+from unittest.mock import PropertyMock, patch
 
 from homeassistant.setup import setup_component, async_setup_component
 from homeassistant.const import (
     STATE_ON, STATE_OFF, STATE_HOME, STATE_UNKNOWN, ATTR_ICON, ATTR_HIDDEN,
     ATTR_ASSUMED_STATE, STATE_NOT_HOME, ATTR_FRIENDLY_NAME)
 import homeassistant.components.group as group
+from homeassistant.helpers.event import DATA_STATE_CHANGE_LISTENERS
 
 from tests.common import get_test_home_assistant, assert_setup_component
 from tests.components.group import common
@@ -382,7 +383,7 @@ class TestComponentsGroup(unittest.TestCase):
         assert sorted(self.hass.states.entity_ids()) == \
             ['group.all_tests', 'group.empty_group', 'group.second_group',
              'group.test_group']
-        assert self.hass.bus.listeners['state_changed'] == 3
+        assert self._state_change_listener_count() == 3
 
         with patch('homeassistant.config.load_yaml_config_file', return_value={
             'group': {
@@ -398,7 +399,13 @@ class TestComponentsGroup(unittest.TestCase):
 
         assert sorted(self.hass.states.entity_ids()) == \
             ['group.all_tests', 'group.hello']
-        assert self.hass.bus.listeners['state_changed'] == 2
+        assert self._state_change_listener_count() == 2
+
+    def _state_change_listener_count(self):
+        """Return the number of registered state change trackers."""
+        listeners = self.hass.data.get(DATA_STATE_CHANGE_LISTENERS, {})
+        return len(set(
+            listener for bucket in listeners.values() for listener in bucket))
 
     def test_changing_group_visibility(self):
         """Test that a group can be hidden and shown."""
@@ -509,3 +516,84 @@ def test_service_group_set_group_remove_group(hass):
 
     group_state = hass.states.get('group.user_test_group')
     assert group_state is None
+
+
+async def test_group_updated_from_changed_member_only(hass):
+    """Test a member change does not look up the other members."""
+    for idx in range(10):
+        hass.states.async_set('light.bulb_{}'.format(idx), STATE_OFF)
+
+    test_group = await group.Group.async_create_group(
+        hass, 'bulbs', ['light.bulb_{}'.format(idx) for idx in range(10)])
+    assert hass.states.get(test_group.entity_id).state == STATE_OFF
+
+    with patch.object(group.Group, '_tracking_states',
+                      new_callable=PropertyMock) as mock_states:
+        hass.states.async_set('light.bulb_3', STATE_ON,
+                              {ATTR_ASSUMED_STATE: True})
+        await hass.async_block_till_done()
+
+        state = hass.states.get(test_group.entity_id)
+        assert state.state == STATE_ON
+        assert state.attributes[ATTR_ASSUMED_STATE]
+
+        hass.states.async_set('light.bulb_3', STATE_OFF)
+        await hass.async_block_till_done()
+
+        state = hass.states.get(test_group.entity_id)
+        assert state.state == STATE_OFF
+        assert not state.attributes.get(ATTR_ASSUMED_STATE)
+
+        hass.states.async_set('light.bulb_5', STATE_ON)
+        hass.states.async_remove('light.bulb_5')
+        await hass.async_block_till_done()
+
+        assert hass.states.get(test_group.entity_id).state == STATE_OFF
+
+    assert not mock_states.called
+
+
+async def test_nested_group_state_propagates(hass):
+    """Test changes of members propagate up nested groups."""
+    hass.states.async_set('light.bowl', STATE_OFF)
+    hass.states.async_set('light.ceiling', STATE_OFF)
+
+    await group.Group.async_create_group(hass, 'inner', ['light.bowl'])
+    await group.Group.async_create_group(
+        hass, 'middle', ['group.inner', 'light.ceiling'])
+    await group.Group.async_create_group(
+        hass, 'outer', ['group.middle'], mode=True)
+    assert hass.states.get('group.outer').state == STATE_OFF
+
+    hass.states.async_set('light.bowl', STATE_ON)
+    await hass.async_block_till_done()
+
+    assert hass.states.get('group.inner').state == STATE_ON
+    assert hass.states.get('group.middle').state == STATE_ON
+    assert hass.states.get('group.outer').state == STATE_ON
+
+
+async def test_expand_entity_ids_cached(hass):
+    """Test expansions are cached until the membership changes."""
+    inner = await group.Group.async_create_group(
+        hass, 'inner', ['light.bowl', 'light.ceiling'])
+    outer = await group.Group.async_create_group(
+        hass, 'outer', ['group.inner', 'switch.ac'])
+
+    assert group.expand_entity_ids(hass, ['group.outer']) == \
+        ['light.bowl', 'light.ceiling', 'switch.ac']
+    cached = hass.data[group.DATA_EXPANDED]['group.outer']
+
+    # Member states changing keeps the expansion
+    hass.states.async_set('light.bowl', STATE_ON)
+    await hass.async_block_till_done()
+    assert group.expand_entity_ids(hass, ['group.outer']) == \
+        ['light.bowl', 'light.ceiling', 'switch.ac']
+    assert hass.data[group.DATA_EXPANDED]['group.outer'] is cached
+
+    await inner.async_update_tracked_entity_ids(['light.kitchen'])
+    assert group.expand_entity_ids(hass, ['group.outer']) == \
+        ['light.kitchen', 'switch.ac']
+
+    await outer.async_update_tracked_entity_ids(['switch.ac'])
+    assert group.expand_entity_ids(hass, ['group.outer']) == ['switch.ac']
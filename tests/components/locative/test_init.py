@@ -41,6 +41,7 @@ async def webhook_id(hass, locative_client):
     result = await hass.config_entries.flow.async_configure(
         result['flow_id'], {})
     assert result['type'] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    await hass.async_block_till_done()
 
     return result['result'].data['webhook_id']
 
@@ -767,3 +767,161 @@ async def test_message_callback_exception_gets_logged(hass, caplog):
     assert \
         "Exception in bad_handler when handling msg on 'test-topic':" \
         " 'test'" in caplog.text
+
+
+@pytest.mark.parametrize('topic', [
+    'sport', 'sport/tennis', 'sport/tennis/player1',
+    'sport/tennis/player1/ranking', 'sport/golf/player1', '/finance',
+    'finance', '$SYS/broker', '$SYS', 'sport/', '',
+])
+def test_subscription_trie_matches_paho(topic):
+    """Test the subscription trie matches topics like paho's matcher."""
+    from paho.mqtt.matcher import MQTTMatcher
+
+    subscriptions = [
+        'sport', 'sport/#', 'sport/tennis/+', 'sport/+/player1', '+/+',
+        '+', '#', '/+', '+/tennis/#', '$SYS/#', '$SYS/+', 'sport/+',
+        'sport/tennis/player1/ranking',
+    ]
+    trie = mqtt.SubscriptionTrie()
+    for sub in subscriptions:
+        trie.add(mqtt.Subscription(sub, None))
+
+    expected = set()
+    for sub in subscriptions:
+        matcher = MQTTMatcher()
+        matcher[sub] = sub
+        if any(True for _ in matcher.iter_match(topic)):
+            expected.add(sub)
+
+    assert sorted(sub.topic for sub in trie.matches(topic)) == \
+        sorted(expected)
+
+
+def test_subscription_trie_remove():
+    """Test subscriptions are removed from the trie."""
+    trie = mqtt.SubscriptionTrie()
+    first = mqtt.Subscription('home/+/state', None, 0)
+    second = mqtt.Subscription('home/+/state', None, 1)
+    other = mqtt.Subscription('home/#', None)
+
+    for sub in (first, second, other):
+        trie.add(sub)
+
+    trie.remove(first)
+    assert trie.matches('home/kitchen/state') == [other, second]
+
+    trie.remove(second)
+    assert trie.matches('home/kitchen/state') == [other]
+
+    trie.remove(other)
+    assert trie.matches('home/kitchen/state') == []
+    assert trie._root.children == {}
+
+
+async def test_payload_decoded_once_per_encoding(hass):
+    """Test a payload is decoded once for subscriptions sharing encoding."""
+    calls = []
+
+    @callback
+    def record_calls(topic, payload, qos):
+        """Record the payload."""
+        calls.append(payload)
+
+    await async_mock_mqtt_client(hass)
+    for _ in range(3):
+        await mqtt.async_subscribe(hass, 'test-topic', record_calls)
+    await mqtt.async_subscribe(hass, 'test-topic', record_calls,
+                               encoding=None)
+
+    payload = mock.MagicMock()
+    payload.decode.return_value = 'decoded'
+    msg = mock.Mock(topic='test-topic', payload=payload, qos=0)
+    hass.data['mqtt']._mqtt_handle_message(msg)
+    await hass.async_block_till_done()
+
+    assert payload.decode.call_count == 1
+    assert sorted(calls, key=str) == [payload] + ['decoded'] * 3
+
+
+async def test_message_buffer_drains_in_batches(hass):
+    """Test messages received in a burst are handled in one drain."""
+    handled = []
+    buffer = mqtt.MessageBuffer(hass.loop, handled.append)
+
+    with mock.patch.object(hass.loop, 'call_soon_threadsafe',
+                           wraps=hass.loop.call_soon_threadsafe) as wakeup:
+        for i in range(5):
+            buffer.put(mqtt.Message('test-topic', i))
+        assert buffer.depth == 5
+        await hass.async_block_till_done()
+
+        assert wakeup.call_count == 1
+        assert [msg.payload for msg in handled] == list(range(5))
+        assert buffer.depth == 0
+
+        buffer.put(mqtt.Message('test-topic', 5))
+        await hass.async_block_till_done()
+
+        assert wakeup.call_count == 2
+        assert len(handled) == 6
+
+    info = buffer.as_dict()
+    assert info['drains'] == 2
+    assert info['messages'] == 6
+    assert info['peak_depth'] == 5
+    assert info['dropped'] == 0
+    assert info['max_drain_latency'] >= info['last_drain_latency'] >= 0
+
+
+async def test_message_buffer_drops_oldest(hass, caplog):
+    """Test the oldest messages are dropped when the buffer is full."""
+    handled = []
+    buffer = mqtt.MessageBuffer(hass.loop, handled.append, size=3)
+
+    for i in range(5):
+        buffer.put(mqtt.Message('test-topic', i))
+    await hass.async_block_till_done()
+
+    assert [msg.payload for msg in handled] == [2, 3, 4]
+    assert buffer.dropped == 2
+    assert buffer.peak_depth == 3
+    assert 'dropped 2 oldest messages' in caplog.text
+
+
+async def test_message_buffer_handler_error(hass, caplog):
+    """Test an error handling a message does not abort the batch."""
+    handled = []
+
+    def handler(msg):
+        """Fail on the first message."""
+        if msg.payload == 0:
+            raise ValueError
+        handled.append(msg)
+
+    buffer = mqtt.MessageBuffer(hass.loop, handler)
+    for i in range(3):
+        buffer.put(mqtt.Message('test-topic', i))
+    await hass.async_block_till_done()
+
+    assert [msg.payload for msg in handled] == [1, 2]
+    assert 'Error handling message on test-topic' in caplog.text
+
+
+async def test_websocket_message_buffer(hass, hass_ws_client):
+    """Test the state of the message buffer is exposed over websocket."""
+    await async_mock_mqtt_client(hass)
+    async_fire_mqtt_message(hass, 'test-topic', 'test-payload')
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json({
+        'id': 5,
+        'type': mqtt.WS_TYPE_MESSAGE_BUFFER,
+    })
+    msg = await client.receive_json()
+
+    assert msg['success']
+    assert msg['result']['size'] == mqtt.MESSAGE_BUFFER_SIZE
+    assert msg['result']['depth'] == 0
+    assert msg['result']['messages'] == 1
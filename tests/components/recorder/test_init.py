@@ -5,12 +5,16 @@ from unittest.mock import patch
 
 import pytest
 
-from homeassistant.core import callback
-from homeassistant.const import MATCH_ALL
-from homeassistant.components.recorder import Recorder
+from homeassistant.core import Event, State, callback
+from homeassistant.const import EVENT_STATE_CHANGED, MATCH_ALL
+from homeassistant.components.recorder import (
+    OVERFLOW_DROP_EVENT_TYPES, OVERFLOW_JOURNAL, Recorder)
+from homeassistant.components.recorder import journal
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.util.async_ import run_callback_threadsafe
+from homeassistant.components.recorder.models import (
+    Events, StateAttributes, States)
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +206,228 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_saving_batch(hass_recorder):
+    """Test events are committed in batches."""
+    hass = hass_recorder({'commit_interval': 0.5})
+    instance = hass.data[DATA_INSTANCE]
+
+    for idx in range(5):
+        hass.states.set('test.recorder', 'state{}'.format(idx))
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.commit_size == 5
+
+    # A full batch is committed without waiting for the commit interval
+    instance.max_batch = 2
+    for idx in range(5, 8):
+        hass.states.set('test.recorder', 'state{}'.format(idx))
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.commit_size == 1
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        db_events = {event.event_id for event in session.query(Events)}
+
+        assert len(db_states) == 8
+        assert len({state.event_id for state in db_states}) == 8
+        assert all(state.event_id in db_events for state in db_states)
+
+
+def _queued_event_types(recorder):
+    """Return the event types waiting in the recorder queue."""
+    return [event.event_type for event in recorder.queue.queue]
+
+
+def test_queue_overflow_drop_oldest():
+    """Test the oldest events are dropped when the queue is full."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={}, max_queue_size=2)
+
+    for event_type in ('one', 'two', 'three'):
+        rec.event_listener(Event(event_type))
+
+    assert _queued_event_types(rec) == ['two', 'three']
+    assert rec.dropped_events == 1
+    assert rec.queue.unfinished_tasks == 2
+
+    hass.stop()
+
+
+def test_queue_overflow_drop_event_types():
+    """Test overflow event types are dropped first when the queue is full."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={}, max_queue_size=2,
+                   queue_overflow=OVERFLOW_DROP_EVENT_TYPES,
+                   overflow_event_types=['noisy'])
+
+    for event_type in ('one', 'noisy', 'two', 'noisy', 'three'):
+        rec.event_listener(Event(event_type))
+
+    assert _queued_event_types(rec) == ['two', 'three']
+    assert rec.dropped_events == 3
+
+    hass.stop()
+
+
+def test_queue_filters_before_enqueue():
+    """Test excluded events never enter the queue."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={'domains': ['test'],
+                                        'event_types': ['excluded']})
+
+    rec.event_listener(Event('excluded'))
+    rec.event_listener(Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'test.recorder'}))
+    rec.event_listener(Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'test2.recorder'}))
+
+    assert rec.queue.qsize() == 1
+
+    hass.stop()
+
+
+def test_queue_overflow_journal(tmpdir):
+    """Test events are spilled to a journal and replayed."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={}, max_queue_size=1,
+                   queue_overflow=OVERFLOW_JOURNAL)
+    rec.journal_path = str(tmpdir.join('journal'))
+    new_state = State('test.recorder', 'on', {'attr': 1})
+
+    events = [
+        Event('one'),
+        Event('two', {'value': 2}),
+        Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'test.recorder',
+            'old_state': None,
+            'new_state': new_state,
+        }),
+    ]
+
+    @callback
+    def fire_events():
+        """Pass the events to the recorder."""
+        for event in events:
+            rec.event_listener(event)
+
+    run_callback_threadsafe(hass.loop, fire_events).result()
+    hass.block_till_done()
+
+    assert _queued_event_types(rec) == ['one']
+    assert rec.journaled_events == 2
+    assert tmpdir.join('journal').check()
+
+    written = []
+
+    def write_batch(batch):
+        """Collect the replayed events."""
+        written.extend(batch)
+        return True
+
+    with patch.object(rec, '_write_batch', side_effect=write_batch):
+        rec._replay_journal()
+
+    assert [event.event_type for event in written] == [
+        'two', EVENT_STATE_CHANGED]
+    assert written[0].data == {'value': 2}
+    assert written[1].data['old_state'] is None
+    assert written[1].data['new_state'] == new_state
+    assert not tmpdir.listdir()
+
+    hass.stop()
+
+
+def test_replay_journal_keeps_unwritten_events(tmpdir):
+    """Test a failed replay only keeps the events that were not written."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={}, max_batch=2)
+    rec.journal_path = str(tmpdir.join('journal'))
+
+    with open(rec.journal_path, 'w', encoding='utf-8') as journal_file:
+        journal.append_events(journal_file, [
+            Event(event_type) for event_type in (
+                'one', 'two', 'three', 'four', 'five')])
+
+    written = []
+
+    def write_batch(batch):
+        """Fail to write the second batch."""
+        if written:
+            return False
+        written.extend(batch)
+        return True
+
+    with patch.object(rec, '_write_batch', side_effect=write_batch):
+        rec._replay_journal()
+
+    assert [event.event_type for event in written] == ['one', 'two']
+    assert rec._journal_pending
+    assert tmpdir.join('journal.replay').check()
+
+    with patch.object(rec, '_write_batch', return_value=True) as mock_write:
+        rec._replay_journal()
+
+    assert [event.event_type for call in mock_write.mock_calls
+            for event in call[1][0]] == ['three', 'four', 'five']
+    assert not tmpdir.listdir()
+
+    hass.stop()
+
+
+def test_queue_overflow_journal_buffer_bounded(tmpdir):
+    """Test the journal buffer drops its oldest events when full."""
+    hass = get_test_home_assistant()
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={}, max_queue_size=1,
+                   queue_overflow=OVERFLOW_JOURNAL)
+    rec.journal_path = str(tmpdir.join('journal'))
+
+    with patch('homeassistant.components.recorder.JOURNAL_BUFFER_SIZE', 2), \
+            patch.object(rec.hass, 'async_add_executor_job') as mock_job:
+        for event_type in ('one', 'two', 'three', 'four'):
+            rec.event_listener(Event(event_type))
+
+    assert len(mock_job.mock_calls) == 1
+    assert [event.event_type for event in rec._journal_buffer] == [
+        'three', 'four']
+    assert rec.journaled_events == 2
+    assert rec.dropped_events == 1
+
+    rec._write_journal()
+    rec._close_journal()
+    assert tmpdir.join('journal').check()
+    assert not rec._journal_buffer
+
+    hass.stop()
+
+
+def test_saving_state_shares_attributes(hass_recorder):
+    """Test states with identical attributes share one attributes row."""
+    hass = hass_recorder()
+    attributes = {'unit_of_measurement': 'W', 'friendly_name': 'Power'}
+
+    for idx in range(3):
+        hass.states.set('sensor.power', idx, attributes)
+    hass.states.set('sensor.power', 3, {'friendly_name': 'Other'})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States).order_by(States.state_id))
+        assert len(db_states) == 4
+        assert session.query(StateAttributes).count() == 2
+        assert len({state.attributes_id for state in db_states[:3]}) == 1
+        assert all(state.attributes is None for state in db_states)
+        assert db_states[0].to_native().attributes == attributes
+        assert db_states[3].to_native().attributes == {
+            'friendly_name': 'Other'}
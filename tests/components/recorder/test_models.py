@@ -1,4 +1,5 @@
 """The tests for the Recorder component."""
+import json
 import unittest
 from datetime import datetime
 
@@ -7,6 +8,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 
 import homeassistant.core as ha
 from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util import dt
 from homeassistant.components.recorder.models import (
     Base, Events, States, RecorderRuns)
@@ -47,6 +49,20 @@ class TestEvents(unittest.TestCase):
         })
         assert event == Events.from_event(event).to_native()
 
+    def test_from_state_changed_event(self):
+        """Test the data of a state change reuses the JSON of its states."""
+        state = ha.State('sensor.temperature', '18')
+        event = ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'sensor.temperature',
+            'old_state': None,
+            'new_state': state,
+        })
+        event_data = Events.from_event(event).event_data
+
+        assert state.as_json() in event_data
+        assert json.loads(event_data) == json.loads(
+            json.dumps(event.data, cls=JSONEncoder))
+
 
 class TestStates(unittest.TestCase):
     """Test States model."""
@@ -7,8 +7,10 @@ from unittest.mock import patch
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    Events, StateAttributes, States, Statistics, StatisticsShortTerm)
 from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
 from tests.common import get_test_home_assistant, init_recorder_component
 
 
@@ -170,5 +172,181 @@ class TestRecorderPurge(unittest.TestCase):
                                         service_data=service_data)
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
-                assert mock_logger.debug.mock_calls[4][1][0] == \
+                assert mock_logger.debug.mock_calls[6][1][0] == \
                     "Vacuuming SQLite to free space"
+
+    def test_purge_unused_state_attributes(self):
+        """Test attributes no longer used by any state are purged."""
+        instance = self.hass.data[DATA_INSTANCE]
+        old = datetime.now() - timedelta(days=11)
+
+        self.hass.states.set('sensor.old', 'on', {'old': True})
+        self.hass.states.set('sensor.new', 'on', {'new': True})
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            session.query(States).filter_by(entity_id='sensor.old').update(
+                {'last_updated': old})
+
+        purge_old_data(instance, 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            shared_attrs = [attr.shared_attrs
+                            for attr in session.query(StateAttributes)]
+            assert shared_attrs == ['{"new": true}']
+
+    def test_purge_unused_state_attributes_in_batches(self):
+        """Test unused attributes are purged in batches of limited size."""
+        instance = self.hass.data[DATA_INSTANCE]
+        old = datetime.now() - timedelta(days=11)
+
+        for idx in range(5):
+            self.hass.states.set('sensor.old', 'on', {'idx': idx})
+        self.hass.states.set('sensor.new', 'on', {'new': True})
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            session.query(States).filter_by(entity_id='sensor.old').update(
+                {'last_updated': old})
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_BATCH_SIZE', 3), \
+                session_scope(hass=self.hass) as session:
+            attributes = session.query(StateAttributes)
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert attributes.count() == 6
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert attributes.count() == 3
+
+            assert purge_old_data(instance, 4, repack=False)
+            assert [attr.shared_attrs for attr in attributes] == [
+                '{"new": true}']
+
+    def test_purge_in_batches(self):
+        """Test old data is purged in batches of limited size."""
+        instance = self.hass.data[DATA_INSTANCE]
+        self._add_test_states()
+        self._add_test_events()
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_BATCH_SIZE', 3), \
+                session_scope(hass=self.hass) as session:
+            states = session.query(States)
+            events = session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%"))
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 3
+            assert events.count() == 6
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+            assert events.count() == 3
+
+            assert purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+            assert events.count() == 2
+
+    def test_purge_service_in_batches(self):
+        """Test the purge service runs until all old data is purged."""
+        self._add_test_states()
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_BATCH_SIZE', 1), \
+                patch('homeassistant.components.recorder.'
+                      'PURGE_PROGRESS_BATCHES', 2), \
+                patch('homeassistant.components.recorder._LOGGER') \
+                as mock_logger:
+            self.hass.services.call('recorder', 'purge',
+                                    service_data={'keep_days': 4})
+            self.hass.block_till_done()
+            self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            assert session.query(States).count() == 2
+
+        instance = self.hass.data[DATA_INSTANCE]
+        assert instance.purged_rows == 4
+        assert not instance.purge_running
+        messages = [call[1][0] % call[1][1:]
+                    for call in mock_logger.info.mock_calls]
+        assert "Purging old data, deleted 2 rows so far and more remain" \
+            in messages
+        assert "Purged 4 rows of old data in 5 batches" in messages
+
+    def test_purge_keep_days_overrides(self):
+        """Test entities and domains can keep data for longer."""
+        instance = self.hass.data[DATA_INSTANCE]
+        instance.keep_days_overrides = {
+            'sensor': 7,
+            'sensor.long': 20,
+            'light.short': 2,
+        }
+        now = datetime.now()
+
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for entity_id in ('sensor.long', 'sensor.domain', 'light.short',
+                              'switch.default'):
+                for days in (1, 3, 5, 9, 25):
+                    timestamp = now - timedelta(days=days)
+                    session.add(States(
+                        entity_id=entity_id,
+                        domain=entity_id.split('.')[0],
+                        state=str(days),
+                        attributes='{}',
+                        last_changed=timestamp,
+                        last_updated=timestamp,
+                        created=timestamp,
+                    ))
+
+        purge_old_data(instance, 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            kept = {}
+            for state in session.query(States).filter(
+                    States.state.in_(['1', '3', '5', '9', '25'])):
+                kept.setdefault(state.entity_id, []).append(int(state.state))
+
+        assert sorted(kept['sensor.long']) == [1, 3, 5, 9]
+        assert sorted(kept['sensor.domain']) == [1, 3, 5]
+        assert sorted(kept['light.short']) == [1]
+        assert sorted(kept['switch.default']) == [1, 3]
+
+    def test_purge_statistics(self):
+        """Test statistics are purged after their own number of days."""
+        instance = self.hass.data[DATA_INSTANCE]
+        instance.statistics_keep_days = 30
+        now = dt_util.utcnow()
+
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for model in (StatisticsShortTerm, Statistics):
+                for days in (1, 5, 40):
+                    session.add(model(
+                        entity_id='sensor.temperature', domain='sensor',
+                        start=now - timedelta(days=days), mean=days,
+                        min=days, max=days, last=days, count=1))
+
+        assert purge_old_data(instance, 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            assert [row.mean for row in
+                    session.query(StatisticsShortTerm)] == [1]
+            assert sorted(row.mean for row in
+                          session.query(Statistics)) == [1, 5]
+
+        instance.statistics_keep_days = None
+        assert purge_old_data(instance, 0, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            assert session.query(StatisticsShortTerm).count() == 0
+            assert session.query(Statistics).count() == 2
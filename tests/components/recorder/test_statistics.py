@@ -0,0 +1,137 @@
+"""The tests for the recorder statistics."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import (
+    Statistics, StatisticsShortTerm)
+from homeassistant.components.recorder.statistics import (
+    StatisticsCompiler, numeric_value, period_start)
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.core import State
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+START = datetime(2019, 1, 1, 12, tzinfo=dt_util.UTC)
+
+
+def _state(value, minutes, entity_id='sensor.power'):
+    """Return a state of a numeric sensor."""
+    last_updated = START + timedelta(minutes=minutes)
+    return State(entity_id, value, {'unit_of_measurement': 'W'},
+                 last_updated, last_updated)
+
+
+def test_period_start():
+    """Test the start of the period containing a timestamp."""
+    point = START + timedelta(minutes=67, seconds=30)
+    assert period_start(StatisticsShortTerm, point) == \
+        START + timedelta(minutes=65)
+    assert period_start(Statistics, point) == START + timedelta(hours=1)
+
+
+def test_numeric_value():
+    """Test only finite numbers with a unit have statistics."""
+    assert numeric_value(_state('1.5', 0)) == 1.5
+    assert numeric_value(_state('on', 0)) is None
+    assert numeric_value(_state('nan', 0)) is None
+    assert numeric_value(State('sensor.count', '3')) is None
+
+
+def test_compile_buckets():
+    """Test a bucket is finished when a state of the next period arrives."""
+    compiler = StatisticsCompiler()
+
+    assert compiler.add_state(_state('10', 0)) == []
+    assert compiler.add_state(_state('20', 2)) == []
+    assert compiler.add_state(_state('on', 7)) == []
+
+    finished = compiler.add_state(_state('30', 7))
+    assert [(model, entity_id) for model, entity_id, _ in finished] == \
+        [(StatisticsShortTerm, 'sensor.power')]
+    bucket = finished[0][2]
+    assert (bucket.start, bucket.min, bucket.max, bucket.total,
+            bucket.count, bucket.last) == (START, 10, 20, 30, 2, 20)
+
+    # Nothing ended yet
+    assert compiler.flush(START + timedelta(minutes=9)) == []
+
+    finished = compiler.flush(START + timedelta(minutes=10))
+    assert [(model, bucket.start) for model, _, bucket in finished] == \
+        [(StatisticsShortTerm, START + timedelta(minutes=5))]
+
+    finished = compiler.flush()
+    assert [(model, bucket.count) for model, _, bucket in finished] == \
+        [(Statistics, 3)]
+    assert compiler.flush() == []
+
+
+class TestRecorderStatistics:
+    """Test the statistics written by the recorder."""
+
+    def setup_method(self, method):
+        """Set up things to be run when tests are started."""
+        self.hass = get_test_home_assistant()
+        init_recorder_component(self.hass)
+        self.hass.start()
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+    def teardown_method(self, method):
+        """Stop everything that was started."""
+        self.hass.stop()
+
+    def test_write_merges_rows(self):
+        """Test a period written twice is merged into one row."""
+        compiler = StatisticsCompiler()
+        compiler.add_state(_state('10', 0))
+        compiler.add_state(_state('20', 1))
+        first = [item for item in compiler.flush()
+                 if item[0] is StatisticsShortTerm]
+        compiler.add_state(_state('60', 2))
+        second = [item for item in compiler.flush()
+                  if item[0] is StatisticsShortTerm]
+
+        with session_scope(hass=self.hass) as session:
+            compiler.write(session, first)
+        with session_scope(hass=self.hass) as session:
+            compiler.write(session, second)
+
+        with session_scope(hass=self.hass) as session:
+            rows = [(row.entity_id, row.domain, row.mean, row.min, row.max,
+                     row.last, row.count)
+                    for row in session.query(StatisticsShortTerm)]
+
+        assert rows == [('sensor.power', 'sensor', 30, 10, 60, 60, 3)]
+
+    def test_recorder_compiles_statistics(self):
+        """Test the recorder writes statistics of numeric sensors."""
+        instance = self.hass.data[DATA_INSTANCE]
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        self.hass.states.set('sensor.power', '10',
+                             {'unit_of_measurement': 'W'})
+        self.hass.states.set('sensor.power', '20',
+                             {'unit_of_measurement': 'W'})
+        self.hass.states.set('sensor.text', 'on')
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            assert session.query(Statistics).count() == 0
+
+        # Periods that ended are written with the next batch
+        later = dt_util.utcnow() + timedelta(hours=2)
+        with patch('homeassistant.components.recorder.dt_util.utcnow',
+                   return_value=later):
+            self.hass.bus.fire('test_event')
+            self.hass.block_till_done()
+            instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for model in (StatisticsShortTerm, Statistics):
+                rows = [(row.entity_id, row.mean, row.count)
+                        for row in session.query(model)]
+                assert rows == [('sensor.power', 15, 2)]
@@ -1,5 +1,8 @@
 """The test for the Template sensor platform."""
+from unittest.mock import patch
+
 from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.helpers import template
 from homeassistant.setup import setup_component, async_setup_component
 
 from tests.common import get_test_home_assistant, assert_setup_component
@@ -315,81 +318,93 @@ class TestTemplateSensor:
         assert 'device_class' not in state.attributes
 
 
-async def test_no_template_match_all(hass, caplog):
-    """Test that we do not allow sensors that match on all."""
+async def test_templates_track_rendered_states(hass, caplog):
+    """Test sensors track the states accessed by their templates."""
     hass.states.async_set('sensor.test_sensor', 'startup')
 
     await async_setup_component(hass, 'sensor', {
         'sensor': {
             'platform': 'template',
             'sensors': {
-                'invalid_state': {
+                'no_states': {
                     'value_template': '{{ 1 + 1 }}',
                 },
-                'invalid_icon': {
+                'icon': {
                     'value_template':
                         '{{ states.sensor.test_sensor.state }}',
                     'icon_template': '{{ 1 + 1 }}',
                 },
-                'invalid_entity_picture': {
+                'domain': {
                     'value_template':
-                        '{{ states.sensor.test_sensor.state }}',
-                    'entity_picture_template': '{{ 1 + 1 }}',
-                },
-                'invalid_friendly_name': {
-                    'value_template':
-                        '{{ states.sensor.test_sensor.state }}',
-                    'friendly_name_template': '{{ 1 + 1 }}',
+                        '{{ states.light | map(attribute="state") | '
+                        'join(",") }}',
                 },
             }
         }
     })
     await hass.async_block_till_done()
-    assert len(hass.states.async_all()) == 5
-    assert ('Template sensor invalid_state has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the value template') in caplog.text
-    assert ('Template sensor invalid_icon has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the icon template') in caplog.text
-    assert ('Template sensor invalid_entity_picture has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the entity_picture template') in caplog.text
-    assert ('Template sensor invalid_friendly_name has no entity ids '
-            'configured to track nor were we able to extract the entities to '
-            'track from the friendly_name template') in caplog.text
-
-    assert hass.states.get('sensor.invalid_state').state == 'unknown'
-    assert hass.states.get('sensor.invalid_icon').state == 'unknown'
-    assert hass.states.get('sensor.invalid_entity_picture').state == 'unknown'
-    assert hass.states.get('sensor.invalid_friendly_name').state == 'unknown'
+
+    assert hass.states.get('sensor.no_states').state == 'unknown'
+    assert hass.states.get('sensor.icon').state == 'unknown'
 
     hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
     await hass.async_block_till_done()
 
-    assert hass.states.get('sensor.invalid_state').state == '2'
-    assert hass.states.get('sensor.invalid_icon').state == 'startup'
-    assert hass.states.get('sensor.invalid_entity_picture').state == 'startup'
-    assert hass.states.get('sensor.invalid_friendly_name').state == 'startup'
+    assert hass.states.get('sensor.no_states').state == '2'
+    assert hass.states.get('sensor.icon').state == 'startup'
+    assert hass.states.get('sensor.icon').attributes['icon'] == '2'
+
+    assert ('Template sensor no_states has no entity ids configured to '
+            'track nor were we able to extract the entities to track from '
+            'the value template') in caplog.text
+    assert ('Template sensor icon has no entity ids configured to track '
+            'nor were we able to extract the entities to track from the '
+            'icon template') in caplog.text
+    assert 'Template sensor domain has no entity ids' not in caplog.text
+
+    with patch('homeassistant.helpers.template.Template.async_render',
+               side_effect=template.Template.async_render,
+               autospec=True) as mock_render:
+        hass.states.async_set('sensor.test_sensor', 'hello')
+        await hass.async_block_till_done()
+
+        assert hass.states.get('sensor.icon').state == 'hello'
+        # Only the templates of sensor.icon are rendered again
+        assert mock_render.call_count == 2
+
+        hass.states.async_set('light.kitchen', 'on')
+        await hass.async_block_till_done()
+
+        assert hass.states.get('sensor.domain').state == 'on'
+        assert mock_render.call_count == 3
+
+    assert hass.states.get('sensor.no_states').state == '2'
+
+
+async def test_no_tracking_after_removal(hass):
+    """Test a removed sensor does not track the states of its templates."""
+    hass.states.async_set('sensor.test_sensor', 'startup')
 
-    hass.states.async_set('sensor.test_sensor', 'hello')
+    await async_setup_component(hass, 'sensor', {
+        'sensor': {
+            'platform': 'template',
+            'sensors': {
+                'removed': {
+                    'value_template':
+                        '{{ states.sensor.test_sensor.state }}',
+                },
+            }
+        }
+    })
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
     await hass.async_block_till_done()
 
-    assert hass.states.get('sensor.invalid_state').state == '2'
-    assert hass.states.get('sensor.invalid_icon').state == 'startup'
-    assert hass.states.get('sensor.invalid_entity_picture').state == 'startup'
-    assert hass.states.get('sensor.invalid_friendly_name').state == 'startup'
-
-    await hass.helpers.entity_component.async_update_entity(
-        'sensor.invalid_state')
-    await hass.helpers.entity_component.async_update_entity(
-        'sensor.invalid_icon')
-    await hass.helpers.entity_component.async_update_entity(
-        'sensor.invalid_entity_picture')
-    await hass.helpers.entity_component.async_update_entity(
-        'sensor.invalid_friendly_name')
-
-    assert hass.states.get('sensor.invalid_state').state == '2'
-    assert hass.states.get('sensor.invalid_icon').state == 'hello'
-    assert hass.states.get('sensor.invalid_entity_picture').state == 'hello'
-    assert hass.states.get('sensor.invalid_friendly_name').state == 'hello'
+    entity = hass.data['sensor'].get_entity('sensor.removed')
+    await entity.async_remove()
+
+    with patch('homeassistant.components.sensor.template.'
+               'async_track_render_info') as mock_track:
+        await entity.async_update()
+
+    assert not mock_track.called
+    assert entity._remove_listener is None
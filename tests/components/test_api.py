@@ -35,6 +35,13 @@ def test_api_list_state_entities(hass, mock_api_client):
     assert remote_data == hass.states.async_all()
 
 
+async def test_api_list_state_entities_invalid(hass, mock_api_client):
+    """Test listing states that can't be encoded is an error."""
+    hass.states.async_set('test.entity', 'hello', {'value': float('nan')})
+    resp = await mock_api_client.get(const.URL_API_STATES)
+    assert resp.status == 500
+
+
 @asyncio.coroutine
 def test_api_get_state(hass, mock_api_client):
     """Test if the debug interface allows us to get a state."""
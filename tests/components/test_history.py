@@ -1,13 +1,19 @@
 """The tests the History component."""
 # pylint: disable=protected-access,invalid-name
 from datetime import timedelta
+import json
 import unittest
 from unittest.mock import patch, sentinel
 
+import aiohttp
+import pytest
+
+
 from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.core as ha
 import homeassistant.util.dt as dt_util
 from homeassistant.components import history, recorder
+from homeassistant.helpers.json import JSONEncoder
 
 from tests.common import (
     init_recorder_component, mock_state_change_event, get_test_home_assistant)
@@ -444,6 +450,103 @@ class TestComponentHistory(unittest.TestCase):
             self.hass, zero, four, filters=filters)
         assert states == hist
 
+    def test_get_significant_states_from_statistics(self):
+        """Test long periods are served from statistics."""
+        from homeassistant.components.recorder.models import (
+            StatisticsShortTerm)
+        from homeassistant.components.recorder.statistics import (
+            period_start)
+
+        self.init_recorder()
+        entity_id = 'sensor.power'
+        attributes = {'unit_of_measurement': 'W'}
+        now = dt_util.utcnow()
+        three_days_ago = period_start(
+            StatisticsShortTerm, now - timedelta(days=3))
+        two_days_ago = period_start(
+            StatisticsShortTerm, now - timedelta(days=2))
+
+        def set_state(state, point_in_time):
+            """Set the state at a point in time."""
+            with patch('homeassistant.components.recorder.dt_util.utcnow',
+                       return_value=point_in_time):
+                self.hass.states.set(entity_id, state, attributes)
+                self.wait_recording_done()
+            return self.hass.states.get(entity_id)
+
+        set_state('10', three_days_ago)
+        set_state('20', three_days_ago + timedelta(minutes=1))
+        set_state('30', two_days_ago)
+        recent = set_state('40', now - timedelta(minutes=10))
+
+        hist = history.get_significant_states(
+            self.hass, now - timedelta(days=4), now,
+            include_start_time_state=False)
+
+        assert [(state.state, state.last_updated)
+                for state in hist[entity_id]] == [
+                    ('15.0', three_days_ago),
+                    ('30.0', two_days_ago),
+                    ('40', recent.last_updated),
+                ]
+        assert hist[entity_id][0].attributes == attributes
+
+        chunks = []
+        history.stream_significant_states(
+            self.hass, chunks.append, now - timedelta(days=4), now,
+            include_start_time_state=False)
+        assert [state['state'] for state in json.loads(''.join(chunks))[0]] \
+            == ['15.0', '30.0', '40']
+
+        # Short periods are served from the recorded states
+        hist = history.get_significant_states(
+            self.hass, two_days_ago - timedelta(hours=1),
+            two_days_ago + timedelta(hours=1),
+            include_start_time_state=False)
+
+        assert [state.state for state in hist[entity_id]] == ['30']
+
+    def test_stream_significant_states(self):
+        """Test streamed states match the significant states."""
+        zero, four, _ = self.record_states()
+        filters = history.Filters()
+        chunks = []
+
+        with patch('homeassistant.components.history.STREAM_CHUNK_SIZE', 10):
+            history.stream_significant_states(
+                self.hass, chunks.append, zero, four, filters=filters)
+
+        assert len(chunks) > 1
+        hist = history.get_significant_states(
+            self.hass, zero, four, filters=filters)
+        expected = json.loads(json.dumps(
+            [hist[entity_id] for entity_id in sorted(hist)],
+            cls=JSONEncoder))
+        assert json.loads(''.join(chunks)) == expected
+
+    def test_stream_significant_states_columnar(self):
+        """Test streaming states in the columnar format."""
+        zero, four, states = self.record_states()
+        chunks = []
+
+        history.stream_significant_states(
+            self.hass, chunks.append, zero, four,
+            entity_ids=['thermostat.test'], filters=history.Filters(),
+            columnar=True)
+
+        therm = states['thermostat.test']
+        assert json.loads(''.join(chunks)) == [{
+            'entity_id': 'thermostat.test',
+            'last_changed': [state.last_changed.isoformat()
+                             for state in therm],
+            'states': ['20', '21', '21'],
+            'attributes': [
+                [0, {'current_temperature': 19.5}],
+                [1, {'current_temperature': 19.8}],
+                [2, {'current_temperature': 20}],
+            ],
+        }]
+
     def record_states(self):
         """Record some test states.
 
@@ -524,3 +627,55 @@ async def test_fetch_period_api(hass, hass_client):
     response = await client.get(
         '/api/history/period/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_fetch_period_api_columnar(hass, hass_client):
+    """Test the fetch period view streams the columnar format."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    start = dt_util.utcnow()
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+    await hass.async_block_till_done()
+    hass.states.async_set('light.kitchen', 'off', {'brightness': 100})
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+
+    response = await client.get(
+        '/api/history/period/{}'.format(start.isoformat()),
+        params={'format': 'columnar', 'skip_initial_state': ''})
+    assert response.status == 200
+    result = await response.json()
+    assert len(result) == 1
+    assert result[0]['entity_id'] == 'light.kitchen'
+    assert result[0]['states'] == ['on', 'off']
+    assert result[0]['attributes'] == [[0, {'brightness': 100}]]
+
+    response = await client.get(
+        '/api/history/period/{}'.format(start.isoformat()),
+        params={'format': 'xml'})
+    assert response.status == 400
+
+
+async def test_fetch_period_api_stream_error(hass, hass_client, caplog):
+    """Test a failing stream does not end like a complete response."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    client = await hass_client()
+
+    def stream_error(hass, write, *args):
+        """Write the start of the response and fail."""
+        write('[')
+        raise ValueError('Broken row')
+
+    with patch('homeassistant.components.history.stream_significant_states',
+               new=stream_error):
+        response = await client.get(
+            '/api/history/period/{}'.format(dt_util.utcnow().isoformat()),
+            params={'format': 'stream'})
+        assert response.status == 200
+
+        with pytest.raises(aiohttp.ClientPayloadError):
+            await response.read()
+
+    assert 'Error streaming the history' in caplog.text
@@ -433,6 +433,43 @@ class TestComponentLogbook(unittest.TestCase):
         self.assert_entry(entries[4], pointB, 'blu', domain='sensor',
                           entity_id=entity_id2)
 
+    def test_get_events_sql_filter(self):
+        """Test entities are filtered in the query like in the config."""
+        entity_ids = ['switch.a', 'switch.b', 'light.a', 'light.b']
+        for entity_id in entity_ids:
+            self.hass.states.set(entity_id, STATE_OFF)
+            self.hass.states.set(entity_id, STATE_ON)
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        configs = [
+            {},
+            {logbook.CONF_INCLUDE: {logbook.CONF_DOMAINS: ['switch'],
+                                    logbook.CONF_ENTITIES: ['light.a']}},
+            {logbook.CONF_EXCLUDE: {logbook.CONF_DOMAINS: ['switch'],
+                                    logbook.CONF_ENTITIES: ['light.a']}},
+            {logbook.CONF_INCLUDE: {logbook.CONF_DOMAINS: ['switch']},
+             logbook.CONF_EXCLUDE: {logbook.CONF_ENTITIES: ['switch.b']}},
+            {logbook.CONF_INCLUDE: {logbook.CONF_ENTITIES: ['switch.a']},
+             logbook.CONF_EXCLUDE: {logbook.CONF_DOMAINS: ['switch']}},
+            {logbook.CONF_INCLUDE: {logbook.CONF_ENTITIES: ['switch.a']},
+             logbook.CONF_EXCLUDE: {logbook.CONF_ENTITIES: ['light.a']}},
+        ]
+
+        for config in configs:
+            config = logbook.CONFIG_SCHEMA({logbook.DOMAIN: config})[
+                logbook.DOMAIN]
+            entities_filter = logbook._generate_filter_from_config(config)
+
+            entries = logbook._get_events(
+                self.hass, config, dt_util.utcnow() - timedelta(hours=1),
+                dt_util.utcnow() + timedelta(hours=1))
+
+            assert [entry['entity_id'] for entry in entries
+                    if 'entity_id' in entry] == \
+                [entity_id for entity_id in entity_ids
+                 if entities_filter(entity_id)]
+
     def test_exclude_auto_groups(self):
         """Test if events of automatically generated groups are filtered."""
         entity_id = 'switch.bla'
@@ -717,6 +754,37 @@ async def test_logbook_view_period_entity(hass, hass_client):
     assert json[0]['entity_id'] == entity_id_test
 
 
+async def test_logbook_view_limit(hass, hass_client):
+    """Test the logbook view returns a limited number of entries."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'logbook', {})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    for entity_id in ('switch.first', 'switch.second', 'switch.third'):
+        hass.states.async_set(entity_id, STATE_OFF)
+        hass.states.async_set(entity_id, STATE_ON)
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    start = (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+
+    response = await client.get(
+        '/api/logbook/{}'.format(start), params={'limit': '2'})
+    assert response.status == 200
+    json = await response.json()
+    assert [entry['entity_id'] for entry in json] == \
+        ['switch.first', 'switch.second']
+
+    response = await client.get(
+        '/api/logbook/{}'.format(start), params={'limit': 'all'})
+    assert response.status == 400
+
+    response = await client.get(
+        '/api/logbook/{}'.format(start), params={'limit': '-1'})
+    assert response.status == 400
+
+
 async def test_humanify_alexa_event(hass):
     """Test humanifying Alexa event."""
     hass.states.async_set('light.kitchen', 'on', {
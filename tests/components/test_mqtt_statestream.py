@@ -157,6 +157,31 @@ class TestMqttStateStream:
         mock_pub.assert_has_calls(calls, any_order=True)
         assert mock_pub.called
 
+    @patch('homeassistant.components.mqtt.async_publish')
+    def test_state_changed_reuses_encoded_attr(self, mock_pub):
+        """Test unchanged attributes are encoded once."""
+        e_id = 'fake.entity'
+        assert self.add_statestream(base_topic='pub',
+                                    publish_attributes=True)
+        self.hass.block_till_done()
+        mock_pub.reset_mock()
+
+        state = State(e_id, 'off', attributes={'testing': 'YES'})
+        with patch('homeassistant.components.mqtt_statestream.json.dumps',
+                   return_value='"YES"') as mock_dumps:
+            mock_state_change_event(self.hass, state)
+            mock_state_change_event(
+                self.hass, State(e_id, 'on', state.attributes), state)
+            self.hass.block_till_done()
+
+        assert mock_dumps.call_count == 1
+        mock_pub.assert_has_calls([
+            call.async_publish(self.hass, 'pub/fake/entity/state', 'on', 1,
+                               True),
+            call.async_publish(self.hass, 'pub/fake/entity/testing', '"YES"',
+                               1, True),
+        ])
+
     @patch('homeassistant.components.mqtt.async_publish')
     @patch('homeassistant.core.dt_util.utcnow')
     def test_state_changed_event_include_domain(self, mock_utcnow, mock_pub):
@@ -1,15 +1,20 @@
 """Tests for WebSocket API commands."""
+import logging
+from unittest.mock import patch
+
 from async_timeout import timeout
 
 from homeassistant.core import callback
+from homeassistant.helpers.entity_component import EntityComponent
 from homeassistant.components.websocket_api.const import URL
 from homeassistant.components.websocket_api.auth import (
     TYPE_AUTH, TYPE_AUTH_OK, TYPE_AUTH_REQUIRED
 )
 from homeassistant.components.websocket_api import const, commands
+from homeassistant.helpers.json import JSON_DUMP
 from homeassistant.setup import async_setup_component
 
-from tests.common import async_mock_service
+from tests.common import async_mock_service, MockEntity
 
 from . import API_PASSWORD
 
@@ -174,6 +179,63 @@ async def test_get_config(hass, websocket_client):
     assert msg['result'] == hass.config.as_dict()
 
 
+async def test_get_template_cache_info(hass, websocket_client):
+    """Test get_template_cache_info command."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_GET_TEMPLATE_CACHE_INFO,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == const.TYPE_RESULT
+    assert msg['success']
+    assert set(msg['result']) == {'compiled', 'json', 'render'}
+    assert set(msg['result']['compiled']) == {
+        'size', 'entries', 'hits', 'misses'}
+
+
+async def test_get_polling_stats(hass, websocket_client):
+    """Test get_polling_stats command."""
+    component = EntityComponent(logging.getLogger(__name__), 'test', hass)
+    await component.async_add_entities([
+        MockEntity(name='poll', should_poll=True),
+        MockEntity(name='push', should_poll=False),
+    ])
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_GET_POLLING_STATS,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == const.TYPE_RESULT
+    assert msg['success']
+    assert len(msg['result']) == 1
+    stats = msg['result'][0]
+    assert stats['domain'] == 'test'
+    assert stats['entities'] == 1
+    assert stats['latency']['count'] == 0
+
+
+async def test_get_startup_timeline(hass, websocket_client):
+    """Test get_startup_timeline command."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_GET_STARTUP_TIMELINE,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == const.TYPE_RESULT
+    assert msg['success']
+    setups = {item['name']: item for item in msg['result']['setups']}
+    assert 'websocket_api' in setups
+    assert 'setup' in setups['websocket_api']['phases']
+    assert msg['result']['critical_path']
+
+
 async def test_ping(websocket_client):
     """Test get_panels command."""
     await websocket_client.send_json({
@@ -287,3 +349,49 @@ async def test_get_states_not_allows_nan(hass, websocket_client):
     msg = await websocket_client.receive_json()
     assert not msg['success']
     assert msg['error']['code'] == const.ERR_UNKNOWN_ERROR
+
+
+async def test_subscribe_events_shares_json(hass, websocket_client):
+    """Test an event is encoded once for all subscriptions."""
+    for iden in (5, 6):
+        await websocket_client.send_json({
+            'id': iden,
+            'type': commands.TYPE_SUBSCRIBE_EVENTS,
+            'event_type': 'test_event'
+        })
+        msg = await websocket_client.receive_json()
+        assert msg['success']
+
+    with patch('homeassistant.helpers.json.JSON_DUMP',
+               side_effect=JSON_DUMP) as mock_dump:
+        hass.bus.async_fire('test_event', {'hello': 'world'})
+
+        with timeout(3, loop=hass.loop):
+            messages = [await websocket_client.receive_json()
+                        for _ in range(2)]
+
+    assert len(mock_dump.mock_calls) == 1
+    assert sorted(msg['id'] for msg in messages) == [5, 6]
+    for msg in messages:
+        assert msg['type'] == commands.TYPE_EVENT
+        assert msg['event']['data'] == {'hello': 'world'}
+
+
+async def test_subscribe_events_not_allows_nan(hass, websocket_client):
+    """Test events with NaN floats are reported as errors."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUBSCRIBE_EVENTS,
+        'event_type': 'test_event'
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    hass.bus.async_fire('test_event', {'hello': float("NaN")})
+
+    with timeout(3, loop=hass.loop):
+        msg = await websocket_client.receive_json()
+
+    assert msg['id'] == 5
+    assert not msg['success']
+    assert msg['error']['code'] == const.ERR_UNKNOWN_ERROR
@@ -140,7 +140,7 @@ class TestHelpersEntityComponent(unittest.TestCase):
             mock_setup.call_args[0]
 
     @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
+           'async_track_point_in_utc_time')
     def test_set_scan_interval_via_config(self, mock_track):
         """Test the setting of the scan interval via configuration."""
         def platform_setup(hass, config, add_entities, discovery_info=None):
@@ -161,7 +161,10 @@ class TestHelpersEntityComponent(unittest.TestCase):
 
         self.hass.block_till_done()
         assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        # The first polling entity of a platform is due after a full interval
+        due = mock_track.call_args[0][2]
+        now = dt_util.utcnow()
+        assert now + timedelta(seconds=29) < due <= now + timedelta(seconds=30)
 
     def test_set_entity_namespace_via_config(self):
         """Test setting an entity namespace."""
@@ -296,6 +299,25 @@ def test_extract_from_service_filter_out_non_existing_entities(hass):
             in component.async_extract_from_service(call)]
 
 
+async def test_entity_index(hass):
+    """Test the entity index follows the entities of all platforms."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    entity_1 = MockEntity(name='test_1')
+    entity_2 = MockEntity(name='test_2')
+    await component.async_add_entities([entity_1, entity_2])
+
+    assert component.get_entity('test_domain.test_1') is entity_1
+    assert component.get_entity('test_domain.test_3') is None
+
+    await component.async_remove_entity('test_domain.test_1')
+    assert component.get_entity('test_domain.test_1') is None
+
+    call = ha.ServiceCall('test', 'service', {
+        'entity_id': ['test_domain.test_1', 'test_domain.test_2']
+    })
+    assert component.async_extract_from_service(call) == [entity_2]
+
+
 @asyncio.coroutine
 def test_extract_from_service_no_group_expand(hass):
     """Test not expanding a group."""
@@ -7,18 +7,20 @@ from datetime import timedelta
 
 import pytest
 
+from homeassistant.const import STATE_UNAVAILABLE
 from homeassistant.exceptions import PlatformNotReady
 import homeassistant.loader as loader
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.helpers.entity_component import (
     EntityComponent, DEFAULT_SCAN_INTERVAL)
 from homeassistant.helpers import entity_platform, entity_registry
+from homeassistant.setup import async_get_setup_timeline
 
 import homeassistant.util.dt as dt_util
 
 from tests.common import (
     get_test_home_assistant, MockPlatform, fire_time_changed, mock_registry,
-    MockEntity, MockEntityPlatform, MockConfigEntry)
+    MockEntity, MockEntityPlatform, MockConfigEntry, async_fire_time_changed)
 
 _LOGGER = logging.getLogger(__name__)
 DOMAIN = "test_domain"
@@ -139,7 +141,7 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         assert not ent.update.called
 
     @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
+           'async_track_point_in_utc_time')
     def test_set_scan_interval_via_platform(self, mock_track):
         """Test the setting of the scan interval via platform."""
         def platform_setup(hass, config, add_entities, discovery_info=None):
@@ -161,7 +163,10 @@ class TestHelpersEntityPlatform(unittest.TestCase):
 
         self.hass.block_till_done()
         assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        # The first polling entity of a platform is due after a full interval
+        due = mock_track.call_args[0][2]
+        now = dt_util.utcnow()
+        assert now + timedelta(seconds=29) < due <= now + timedelta(seconds=30)
 
     def test_adding_entities_with_generator_and_thread_callback(self):
         """Test generator in add_entities that calls thread method.
@@ -772,3 +777,194 @@ async def test_device_info_not_overrides(hass):
     assert device.id == device2.id
     assert device2.manufacturer == 'test-manufacturer'
     assert device2.model == 'test-model'
+
+
+async def test_polling_spreads_entity_updates(hass):
+    """Test polling entities get their own phase within the interval."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=20))
+    now = dt_util.utcnow()
+    updates = []
+
+    entities = []
+    for idx in range(4):
+        entity = MockEntity(name='poll_{}'.format(idx), should_poll=True)
+        entity.update = Mock(side_effect=lambda idx=idx: updates.append(idx))
+        entities.append(entity)
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        await platform.async_add_entities(entities)
+
+    offsets = sorted((poll.due - now).total_seconds()
+                     for poll in platform._polls.values())
+    assert len(set(offsets)) == 4
+    assert 0 < offsets[0] < 5
+    assert offsets[-1] == 20
+
+    async_fire_time_changed(hass, now + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(updates) == 1
+
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert sorted(updates) == [0, 1, 2, 3]
+
+    stats = platform.async_polling_stats()
+    assert stats['entities'] == 4
+    assert stats['backoff'] == 0
+    assert stats['latency']['count'] == 4
+    assert stats['latency']['buckets']['0.1'] == 4
+
+
+async def test_polling_backs_off_failing_entity(hass):
+    """Test polling backs off while the update of an entity fails."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    now = dt_util.utcnow()
+    fail = True
+    updates = []
+
+    def update():
+        """Update the entity."""
+        updates.append(None)
+        if fail:
+            raise AssertionError("Fake error update")
+
+    entity = MockEntity(name='poll', should_poll=True)
+    entity.update = update
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        await platform.async_add_entities([entity])
+
+    poll = platform._polls[entity.entity_id]
+    assert poll.due == now + timedelta(seconds=10)
+
+    async_fire_time_changed(hass, poll.due)
+    await hass.async_block_till_done()
+    assert len(updates) == 1
+    assert poll.failures == 1
+    assert poll.due == now + timedelta(seconds=30)
+    assert platform.async_polling_stats()['backoff'] == 1
+
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert len(updates) == 1
+
+    async_fire_time_changed(hass, now + timedelta(seconds=30))
+    await hass.async_block_till_done()
+    assert len(updates) == 2
+    assert poll.failures == 2
+    assert poll.due == now + timedelta(seconds=70)
+
+    fail = False
+    async_fire_time_changed(hass, now + timedelta(seconds=70))
+    await hass.async_block_till_done()
+    assert len(updates) == 3
+    assert poll.failures == 0
+    assert poll.due == now + timedelta(seconds=80)
+
+
+async def test_polling_slow_entity_backs_off(hass):
+    """Test an update that takes longer than the interval counts as failed."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    entity = MockEntity(name='poll', should_poll=True)
+    entity.update = Mock()
+
+    await platform.async_add_entities([entity])
+    poll = platform._polls[entity.entity_id]
+    due = poll.due
+
+    with patch('homeassistant.helpers.entity_platform.timer',
+               side_effect=[0, 11]):
+        async_fire_time_changed(hass, due)
+        await hass.async_block_till_done()
+
+    assert poll.failures == 1
+    assert poll.due == due + timedelta(seconds=20)
+    assert platform.update_latency.counts[-2] == 1
+
+
+async def test_polling_slow_entity_writes_state(hass):
+    """Test a slow update that succeeds still writes the new state."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    entity = MockEntity(name='poll', should_poll=True)
+
+    def update():
+        """Update the entity."""
+        entity._values['available'] = False
+
+    entity.update = update
+
+    await platform.async_add_entities([entity])
+    poll = platform._polls[entity.entity_id]
+
+    with patch('homeassistant.helpers.entity_platform.timer',
+               side_effect=[0, 11]):
+        async_fire_time_changed(hass, poll.due)
+        await hass.async_block_till_done()
+
+    assert poll.failures == 1
+    assert hass.states.get(entity.entity_id).state == STATE_UNAVAILABLE
+
+
+async def test_polling_stops_for_removed_entity(hass):
+    """Test a removed entity is no longer polled."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    entity = MockEntity(name='poll', should_poll=True)
+    entity.update = Mock()
+
+    await platform.async_add_entities([entity])
+    due = platform._polls[entity.entity_id].due
+
+    await platform.async_remove_entity(entity.entity_id)
+    assert platform._polls == {}
+
+    async_fire_time_changed(hass, due)
+    await hass.async_block_till_done()
+    assert not entity.update.called
+
+
+async def test_parallel_updates_shared_by_platform_module(hass):
+    """Test platforms of the same module share the parallel updates."""
+    platform = MockPlatform(setup_platform=lambda *args: None)
+    platform.PARALLEL_UPDATES = 2
+
+    handle1 = MockEntityPlatform(hass, platform=platform)
+    handle2 = MockEntityPlatform(hass, platform=platform)
+    handle3 = MockEntityPlatform(
+        hass, platform=platform, platform_name='other_platform')
+
+    assert handle1.parallel_updates is handle2.parallel_updates
+    assert handle1.parallel_updates is not handle3.parallel_updates
+
+
+async def test_setup_timeline(hass):
+    """Test the setup of platforms is recorded in the setup timeline."""
+    def setup_platform(hass, config, add_entities, discovery_info=None):
+        """Set up a sync platform."""
+        add_entities([MockEntity(name='sync')])
+
+    async def async_setup_platform(hass, config, async_add_entities,
+                                   discovery_info=None):
+        """Set up an async platform."""
+        async_add_entities([MockEntity(name='async')])
+
+    loader.set_component(hass, 'test_domain.sync_platform',
+                         MockPlatform(setup_platform=setup_platform))
+    loader.set_component(hass, 'test_domain.async_platform',
+                         MockPlatform(
+                             async_setup_platform=async_setup_platform))
+
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    await component.async_setup({
+        DOMAIN: [{'platform': 'sync_platform'},
+                 {'platform': 'async_platform'}],
+    })
+
+    timings = async_get_setup_timeline(hass).timings
+    sync = timings['test_domain.sync_platform']
+    assert set(sync.phases) == {'import', 'setup', 'entities'}
+    assert sync.coroutine == 0
+    assert sync.executor >= sync.phases['setup']
+
+    async_timing = timings['test_domain.async_platform']
+    assert set(async_timing.phases) == {'import', 'setup', 'entities'}
+    assert async_timing.coroutine == async_timing.phases['setup']
@@ -771,3 +771,115 @@ def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+async def test_async_track_state_change_shared_listener(hass):
+    """Test state trackers share one bus listener dispatched by entity."""
+    init_count = sum(hass.bus.async_listeners().values())
+    kitchen_runs = []
+    all_runs = []
+
+    unsub_kitchen = hass.helpers.event.async_track_state_change(
+        ['light.Kitchen', 'light.kitchen'],
+        callback(lambda *args: kitchen_runs.append(args)))
+    unsub_all = hass.helpers.event.async_track_state_change(
+        MATCH_ALL, callback(lambda *args: all_runs.append(args)))
+
+    assert sum(hass.bus.async_listeners().values()) == init_count + 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.bedroom', 'on')
+    await hass.async_block_till_done()
+
+    assert len(kitchen_runs) == 1
+    assert kitchen_runs[0][0] == 'light.kitchen'
+    assert len(all_runs) == 2
+
+    unsub_kitchen()
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+
+    assert len(kitchen_runs) == 1
+    assert len(all_runs) == 3
+
+    unsub_all()
+    assert sum(hass.bus.async_listeners().values()) == init_count
+
+
+async def test_async_track_state_change_listener_error(hass):
+    """Test an error in one state tracker does not block the others."""
+    runs = []
+
+    @callback
+    def failing_listener(entity_id, old_state, new_state):
+        raise ValueError
+
+    hass.helpers.event.async_track_state_change(
+        'light.kitchen', failing_listener)
+    hass.helpers.event.async_track_state_change(
+        'light.kitchen', callback(lambda *args: runs.append(args)))
+
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+
+    assert len(runs) == 1
+
+
+async def test_async_track_template_follows_rendered_states(hass):
+    """Test a template is only checked for the states its render accessed."""
+    hass.states.async_set('input_boolean.use_b', 'off')
+    runs = []
+    tpl = Template(
+        "{% if is_state('input_boolean.use_b', 'on') %}"
+        "{{ is_state('switch.b', 'on') }}"
+        "{% else %}{{ is_state('switch.a', 'on') }}{% endif %}", hass)
+
+    with patch('homeassistant.helpers.template.Template.async_render',
+               side_effect=Template.async_render,
+               autospec=True) as mock_render:
+        unsub = hass.helpers.event.async_track_template(
+            tpl, callback(lambda *args: runs.append(args)))
+        assert mock_render.call_count == 1
+
+        hass.states.async_set('switch.b', 'on')
+        hass.states.async_set('sensor.other', 'on')
+        await hass.async_block_till_done()
+        assert mock_render.call_count == 1
+        assert len(runs) == 0
+
+        hass.states.async_set('switch.a', 'on')
+        await hass.async_block_till_done()
+        assert mock_render.call_count == 2
+        assert len(runs) == 1
+
+        hass.states.async_set('input_boolean.use_b', 'on')
+        hass.states.async_set('switch.a', 'off')
+        await hass.async_block_till_done()
+        assert mock_render.call_count == 3
+
+        hass.states.async_set('switch.b', 'off')
+        await hass.async_block_till_done()
+        assert mock_render.call_count == 4
+        assert len(runs) == 1
+
+        unsub()
+        hass.states.async_set('input_boolean.use_b', 'off')
+        await hass.async_block_till_done()
+        assert mock_render.call_count == 4
+
+
+async def test_async_track_render_info_domain(hass):
+    """Test renders iterating a domain track all entities of the domain."""
+    runs = []
+    info = Template('{{ states.light | list | count }}',
+                    hass).async_render_to_info()
+
+    unsub = hass.helpers.event.async_track_render_info(
+        [info], callback(lambda *args: runs.append(args)))
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('switch.kitchen', 'on')
+    await hass.async_block_till_done()
+
+    assert [run[0] for run in runs] == ['light.kitchen']
+    unsub()
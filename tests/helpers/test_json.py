@@ -1,8 +1,12 @@
 """Test Home Assistant remote methods and classes."""
+import json
+from math import nan as NAN
+
 import pytest
 
 from homeassistant import core
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers.json import JSONCache, JSONEncoder
 from homeassistant.util import dt as dt_util
 
 
@@ -19,3 +23,69 @@ def test_json_encoder(hass):
 
     now = dt_util.utcnow()
     assert ha_json_enc.default(now) == now.isoformat()
+
+
+def test_json_cache_event():
+    """Test the cached JSON of events matches the encoder."""
+    cache = JSONCache()
+    old_state = core.State('light.kitchen', 'off')
+    new_state = core.State('light.kitchen', 'on', {'brightness': 100})
+    event = core.Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'light.kitchen',
+        'old_state': old_state,
+        'new_state': new_state,
+    })
+    other_event = core.Event('test_event', {'when': dt_util.utcnow()})
+
+    for evt in (event, other_event):
+        text = cache.event_json(evt)
+        assert json.loads(text) == json.loads(
+            json.dumps(evt, cls=JSONEncoder))
+        assert cache.event_json(evt) is text
+
+    # States are encoded once
+    assert new_state.as_json() in cache.event_json(event)
+    assert old_state.as_json() is old_state.as_json()
+
+    event = core.Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'light.kitchen',
+        'old_state': None,
+        'new_state': new_state,
+    })
+    assert json.loads(cache.event_json(event))['data']['old_state'] is None
+
+    event = core.Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'light.kitchen',
+        'old_state': None,
+        'new_state': new_state.as_dict(),
+    })
+    assert json.loads(cache.event_json(event)) == json.loads(
+        json.dumps(event, cls=JSONEncoder))
+
+
+def test_json_cache_size():
+    """Test the least recently used objects are dropped from the cache."""
+    cache = JSONCache(event_size=2)
+    events = [core.Event('test_event', {'idx': idx}) for idx in range(3)]
+    texts = [cache.event_json(event) for event in events[:2]]
+
+    # Use the first event, so the second event is dropped
+    assert cache.event_json(events[0]) is texts[0]
+    cache.event_json(events[2])
+
+    assert cache.event_json(events[0]) is texts[0]
+    assert cache.event_json(events[1]) is not texts[1]
+    assert cache.event_json(events[1]) == texts[1]
+
+
+def test_json_cache_invalid():
+    """Test values that are not valid JSON raise."""
+    cache = JSONCache()
+    event = core.Event(EVENT_STATE_CHANGED, {
+        'entity_id': 'sensor.nan',
+        'old_state': None,
+        'new_state': core.State('sensor.nan', 'on', {'value': NAN}),
+    })
+
+    with pytest.raises(ValueError):
+        cache.event_json(event)
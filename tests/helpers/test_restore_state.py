@@ -1,5 +1,6 @@
 """The tests for the Restore component."""
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
 
 from homeassistant.const import EVENT_HOMEASSISTANT_START
 from homeassistant.core import CoreState, State
@@ -250,3 +251,88 @@ async def test_restoring_invalid_entity_id(hass, hass_storage):
 
     state = await entity.async_get_last_state()
     assert state is None
+
+
+async def test_dump_changes(hass, hass_storage):
+    """Test only the changed states are appended to the saved states."""
+    for entity_id in ('input_boolean.b0', 'input_boolean.b1'):
+        entity = RestoreEntity()
+        entity.hass = hass
+        entity.entity_id = entity_id
+        await entity.async_added_to_hass()
+        hass.states.async_set(entity_id, 'on')
+
+    data = await RestoreStateData.async_get_instance(hass)
+    await data.async_dump_states()
+    assert len(hass_storage[STORAGE_KEY]['data']) == 2
+
+    # Nothing changed
+    await data.async_dump_changes()
+    assert 'log' not in hass_storage[STORAGE_KEY]
+
+    hass.states.async_set('input_boolean.b1', 'off')
+    await data.async_dump_changes()
+    await data.async_dump_changes()
+
+    log = hass_storage[STORAGE_KEY]['log']
+    assert len(log) == 1
+    assert log[0]['state']['entity_id'] == 'input_boolean.b1'
+    assert log[0]['state']['state'] == 'off'
+
+    # Emulate a fresh load
+    hass.data[DATA_RESTORE_STATE_TASK] = None
+    with patch('homeassistant.helpers.restore_state.Store.async_save'):
+        data = await RestoreStateData.async_get_instance(hass)
+
+    assert data.last_states['input_boolean.b0'].state.state == 'on'
+    assert data.last_states['input_boolean.b1'].state.state == 'off'
+
+
+async def test_dump_periodically_compacts(hass, hass_storage):
+    """Test all states are saved once the changes outnumber them."""
+    entity = RestoreEntity()
+    entity.hass = hass
+    entity.entity_id = 'input_boolean.b0'
+    await entity.async_added_to_hass()
+    hass.states.async_set('input_boolean.b0', 'on')
+
+    data = await RestoreStateData.async_get_instance(hass)
+    await data.async_dump_states()
+
+    hass.states.async_set('input_boolean.b0', 'off')
+    await data.async_dump_changes()
+    assert len(hass_storage[STORAGE_KEY]['log']) == 1
+
+    hass.states.async_set('input_boolean.b0', 'on')
+    await data.async_dump_periodically()
+
+    assert 'log' not in hass_storage[STORAGE_KEY]
+    written_states = hass_storage[STORAGE_KEY]['data']
+    assert len(written_states) == 1
+    assert written_states[0]['state']['state'] == 'on'
+
+
+async def test_load_skips_older_changes(hass, hass_storage):
+    """Test changes older than the saved states don't replace them."""
+    now = dt_util.utcnow()
+    older = StoredState(State('input_boolean.b0', 'off', last_updated=now -
+                              timedelta(minutes=1)), now)
+    hass_storage[STORAGE_KEY] = {
+        'version': 1,
+        'key': STORAGE_KEY,
+        'data': [
+            StoredState(State('input_boolean.b0', 'on', last_updated=now),
+                        now).as_dict(),
+        ],
+        'log': [
+            json.loads(older.as_json()),
+            json.loads(StoredState(State('input_boolean.b1', 'on'),
+                                   now).as_json()),
+        ],
+    }
+
+    with patch('homeassistant.helpers.restore_state.Store.async_save'):
+        data = await RestoreStateData.async_get_instance(hass)
+
+    assert data.last_states['input_boolean.b0'].state.state == 'on'
+    assert data.last_states['input_boolean.b1'].state.state == 'on'
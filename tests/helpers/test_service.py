@@ -338,3 +338,28 @@ async def test_call_with_omit_entity_id(hass, mock_service_platform_call,
         mock_entities['light.kitchen'], mock_entities['light.living_room']]
     assert ('Not passing an entity ID to a service to target '
             'all entities is deprecated') in caplog.text
+
+
+async def test_call_with_entity_index(hass, mock_service_platform_call):
+    """Check targeted entities are looked up and grouped per platform."""
+    platform_1 = Mock(entities={})
+    platform_2 = Mock(entities={})
+    entity_index = {
+        'light.kitchen': (platform_1, Mock(entity_id='light.kitchen')),
+        'light.hallway': (platform_2, Mock(entity_id='light.hallway')),
+        'light.bedroom': (platform_1, Mock(entity_id='light.bedroom')),
+        'light.attic': (platform_2, Mock(entity_id='light.attic')),
+    }
+
+    await service.entity_service_call(hass, [
+        platform_1, platform_2
+    ], Mock(), ha.ServiceCall('test_domain', 'test_service', {
+        'entity_id': ['light.kitchen', 'light.hallway', 'light.bedroom',
+                      'light.kitchen', 'light.non-existing']
+    }), entity_index)
+
+    assert len(mock_service_platform_call.mock_calls) == 2
+    calls = sorted(
+        [entity.entity_id for entity in mock_call[1][2]]
+        for mock_call in mock_service_platform_call.mock_calls)
+    assert calls == [['light.hallway'], ['light.kitchen', 'light.bedroom']]
@@ -1,14 +1,16 @@
 """Tests for the storage helper."""
 import asyncio
 from datetime import timedelta
+from functools import partial
 import json
+import os
 from unittest.mock import patch, Mock
 
 import pytest
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.helpers import storage
-from homeassistant.util import dt
+from homeassistant.util import dt, json as json_util
 
 from tests.common import async_fire_time_changed, mock_coro
 
@@ -143,6 +145,33 @@ async def test_writing_while_writing_delay(hass, store, hass_storage):
     assert data == {'delay': 'no'}
 
 
+async def test_appending_log(hass, store, hass_storage):
+    """Test entries are appended to the log until the data is saved."""
+    await store.async_save(MOCK_DATA)
+    await store.async_append_log([MOCK_DATA2, {'bad': object()}], json.dumps)
+    await store.async_append_log([MOCK_DATA], json.dumps)
+
+    assert await store.async_load() == MOCK_DATA
+    assert await store.async_load_log() == [MOCK_DATA2, MOCK_DATA]
+
+    await store.async_save(MOCK_DATA2)
+    assert await store.async_load_log() == []
+
+
+def test_saving_removes_log(loop, tmpdir):
+    """Test writing the data removes the log of changes."""
+    hass = Mock(loop=loop)
+    hass.config.path = partial(os.path.join, str(tmpdir))
+    store = storage.Store(hass, MOCK_VERSION, MOCK_KEY)
+
+    store._append_log(store.log_path, [MOCK_DATA], json.dumps)
+    assert json_util.load_json_lines(store.log_path) == [MOCK_DATA]
+
+    store._write_data(store.path, {'data': MOCK_DATA2})
+    assert json_util.load_json_lines(store.log_path) == []
+    assert not os.path.exists(store.log_path)
+
+
 async def test_migrator_no_existing_config(hass, store, hass_storage):
     """Test migrator with no existing config."""
     with patch('os.path.isfile', return_value=False), \
@@ -1065,3 +1065,165 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+async def test_render_to_info_entities(hass):
+    """Test the entities accessed by a render are recorded."""
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+    hass.states.async_set('zone.home', 'zoning', {
+        'latitude': hass.config.latitude,
+        'longitude': hass.config.longitude,
+    })
+
+    tpl = template.Template(
+        '{{ states.light.kitchen.state }} {{ states("sensor.Temp") }} '
+        '{{ is_state("switch.a", "on") }} '
+        '{{ state_attr("light.kitchen", "brightness") }} '
+        '{{ is_state_attr("cover.b", "position", 50) }} '
+        '{{ distance(states.zone.home) }} {{ distance("device.c") }}', hass)
+    info = tpl.async_render_to_info()
+
+    assert info.exception is None
+    assert info.result.startswith('on unknown False 100 False')
+    assert info.entities == {
+        'light.kitchen', 'sensor.temp', 'switch.a', 'cover.b', 'zone.home',
+        'device.c'}
+    assert info.domains == set()
+    assert not info.all_states
+    assert info.matches('light.kitchen')
+    assert not info.matches('light.bedroom')
+
+
+async def test_render_to_info_domains_and_all_states(hass):
+    """Test iterating domains and all states is recorded."""
+    hass.states.async_set('sensor.test', '23')
+
+    info = template.Template(
+        '{{ states.sensor | length }} {{ states.light | list }}',
+        hass).async_render_to_info()
+    assert info.result == '1 []'
+    assert info.domains == {'sensor', 'light'}
+    assert not info.all_states
+    assert info.matches('light.new')
+    assert not info.matches('switch.new')
+
+    info = template.Template(
+        '{% for state in states %}{{ state.state }}{% endfor %}',
+        hass).async_render_to_info()
+    assert info.result == '23'
+    assert info.all_states
+    assert info.matches('switch.new')
+
+
+async def test_render_to_info_error(hass):
+    """Test render errors are stored in the render info."""
+    info = template.Template(
+        '{{ states.sensor.missing.state.foo() }}', hass).async_render_to_info()
+
+    assert info.result is None
+    assert isinstance(info.exception, TemplateError)
+    assert info.entities == {'sensor.missing'}
+    assert hass.data.get(template._RENDER_INFO) is None
+
+
+async def test_render_without_info_records_nothing(hass):
+    """Test a plain render does not need a render info."""
+    tpl = template.Template('{{ states.sensor.test.state }}', hass)
+
+    assert tpl.async_render() == ''
+    assert hass.data.get(template._RENDER_INFO) is None
+
+
+async def test_compiled_code_shared(hass):
+    """Test templates with the same source share their compiled code."""
+    source = '{{ states("sensor.shared_compile_test") }}'
+    first = template.Template(source, hass)
+    second = template.Template(source, hass)
+    hits = template.cache_info()['compiled']['hits']
+
+    first.ensure_valid()
+    second.ensure_valid()
+
+    assert first._compiled_code is second._compiled_code
+    assert template.cache_info()['compiled']['hits'] == hits + 1
+
+
+async def test_render_memoized(hass):
+    """Test renders are reused while variables and read states are equal."""
+    hass.config.template_memoize = True
+    hass.states.async_set('sensor.memo', '1')
+    tpl = template.Template(
+        '{{ states("sensor.memo") }} {{ suffix }}', hass)
+
+    with patch.object(template.jinja2.Template, 'render',
+                      autospec=True,
+                      side_effect=template.jinja2.Template.render) as render:
+        assert tpl.async_render(suffix='a') == '1 a'
+        assert tpl.async_render(suffix='a') == '1 a'
+        assert render.call_count == 1
+
+        info = tpl.async_render_to_info(suffix='a')
+        assert info.result == '1 a'
+        assert info.entities == {'sensor.memo'}
+        assert render.call_count == 1
+
+        assert tpl.async_render(suffix='b') == '1 b'
+        assert render.call_count == 2
+
+        hass.states.async_set('sensor.memo', '1')
+        assert tpl.async_render(suffix='b') == '1 b'
+        assert render.call_count == 2
+
+        hass.states.async_set('sensor.memo', '2')
+        assert tpl.async_render(suffix='b') == '2 b'
+        assert render.call_count == 3
+
+        tpl.memoize = False
+        assert tpl.async_render(suffix='b') == '2 b'
+        assert render.call_count == 4
+
+        tpl.memoize = True
+        hass.config.template_memoize = False
+        assert tpl.async_render(suffix='b') == '2 b'
+        assert tpl.async_render(suffix='b') == '2 b'
+        assert render.call_count == 6
+
+
+@pytest.mark.parametrize('source', [
+    '{{ now() }}',
+    '{{ lipsum(1) }}',
+    '{{ states.sensor | count }}',
+    '{{ [1, 2] | random }}',
+    '{{ 0 | timestamp_local }}',
+])
+async def test_render_not_memoized(hass, source):
+    """Test renders depending on more than the read states are repeated."""
+    hass.config.template_memoize = True
+    tpl = template.Template(source, hass)
+
+    with patch.object(template.jinja2.Template, 'render',
+                      autospec=True,
+                      side_effect=template.jinja2.Template.render) as render:
+        tpl.async_render()
+        tpl.async_render()
+
+    assert render.call_count == 2
+
+
+async def test_json_value_parsed_once(hass):
+    """Test templates rendering the same JSON value share the parsed value."""
+    first = template.Template('{{ value_json.a }}', hass)
+    second = template.Template('{{ value_json.b }}', hass)
+    value = '{"a": "first", "b": "second", "json_parse_test": true}'
+
+    with patch('homeassistant.helpers.template.json.loads',
+               side_effect=template.json.loads) as loads:
+        assert first.async_render_with_possible_json_value(value) == 'first'
+        assert second.async_render_with_possible_json_value(value) == \
+            'second'
+        assert first.async_render_with_possible_json_value(
+            'no json', '') == ''
+        assert first.async_render_with_possible_json_value(
+            'no json', '') == ''
+
+    assert loads.call_count == 2
@@ -416,6 +416,7 @@ class TestConfig(unittest.TestCase):
                 CONF_UNIT_SYSTEM: CONF_UNIT_SYSTEM_IMPERIAL,
                 'time_zone': 'America/New_York',
                 'whitelist_external_dirs': '/tmp',
+                'template_memoize': True,
             }), self.hass.loop).result()
 
         assert self.hass.config.latitude == 60
@@ -426,6 +427,7 @@ class TestConfig(unittest.TestCase):
         assert self.hass.config.time_zone.zone == 'America/New_York'
         assert len(self.hass.config.whitelist_external_dirs) == 2
         assert '/tmp' in self.hass.config.whitelist_external_dirs
+        assert self.hass.config.template_memoize is True
 
     def test_loading_configuration_temperature_unit(self):
         """Test backward compatibility when loading core config."""
@@ -531,6 +533,7 @@ class TestConfig(unittest.TestCase):
         assert self.hass.config.time_zone == blankConfig.time_zone
         assert len(self.hass.config.whitelist_external_dirs) == 1
         assert "/test/config/www" in self.hass.config.whitelist_external_dirs
+        assert self.hass.config.template_memoize is False
 
     @mock.patch('homeassistant.scripts.check_config.check_ha_config_file')
     def test_check_ha_config_file_correct(self, mock_check):
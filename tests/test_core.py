@@ -2,9 +2,13 @@
 # pylint: disable=protected-access
 import asyncio
 import functools
+import json
 import logging
 import os
+import threading
+import time
 import unittest
+import uuid
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 from tempfile import TemporaryDirectory
@@ -14,16 +18,19 @@ import pytz
 import pytest
 
 import homeassistant.core as ha
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.exceptions import (InvalidEntityFormatError,
                                       InvalidStateError)
-from homeassistant.util.async_ import run_coroutine_threadsafe
+from homeassistant.util.async_ import (
+    run_callback_threadsafe, run_coroutine_threadsafe)
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import (METRIC_SYSTEM)
 from homeassistant.const import (
     __version__, EVENT_STATE_CHANGED, ATTR_FRIENDLY_NAME, CONF_UNIT_SYSTEM,
     ATTR_NOW, EVENT_TIME_CHANGED, EVENT_TIMER_OUT_OF_SYNC, ATTR_SECONDS,
     EVENT_HOMEASSISTANT_STOP, EVENT_HOMEASSISTANT_CLOSE,
-    EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED, EVENT_CALL_SERVICE)
+    EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED, EVENT_CALL_SERVICE,
+    MATCH_ALL)
 
 from tests.common import get_test_home_assistant, async_mock_service
 
@@ -98,6 +105,65 @@ def test_async_add_job_add_threaded_job_to_pool():
     assert len(hass.loop.run_in_executor.mock_calls) == 1
 
 
+def test_hass_job_type():
+    """Test the job type is determined when the job is created."""
+    job = MagicMock()
+
+    async def coro_job():
+        pass
+
+    assert ha.HassJob(ha.callback(job)).job_type == ha.HassJobType.callback
+    assert ha.HassJob(functools.partial(ha.callback(job))).job_type == \
+        ha.HassJobType.callback
+    assert ha.HassJob(coro_job).job_type == \
+        ha.HassJobType.coroutinefunction
+    assert ha.HassJob(functools.partial(coro_job)).job_type == \
+        ha.HassJobType.coroutinefunction
+    assert ha.HassJob(lambda: None).job_type == ha.HassJobType.executor
+
+    coro = coro_job()
+    with pytest.raises(ValueError):
+        ha.HassJob(coro)
+    coro.close()
+
+
+def test_async_add_hass_job_schedule_callback():
+    """Test that we schedule callbacks from a job."""
+    hass = MagicMock()
+    job = ha.HassJob(ha.callback(MagicMock()))
+
+    assert ha.HomeAssistant.async_add_hass_job(hass, job) is None
+    assert len(hass.loop.call_soon.mock_calls) == 1
+    assert len(hass.loop.create_task.mock_calls) == 0
+    assert len(hass.loop.run_in_executor.mock_calls) == 0
+
+
+def test_async_add_hass_job_schedule_coroutinefunction():
+    """Test that we create tasks from a coroutine function job."""
+    hass = MagicMock()
+
+    async def job():
+        pass
+
+    ha.HomeAssistant.async_add_hass_job(hass, ha.HassJob(job))
+    assert len(hass.loop.call_soon.mock_calls) == 0
+    assert len(hass.loop.create_task.mock_calls) == 1
+    assert len(hass.loop.run_in_executor.mock_calls) == 0
+
+
+def test_async_add_hass_job_add_threaded_job_to_pool():
+    """Test that we add other jobs to the job pool."""
+    hass = MagicMock()
+
+    def job():
+        pass
+
+    ha.HomeAssistant.async_add_hass_job(hass, ha.HassJob(job))
+    assert len(hass.loop.call_soon.mock_calls) == 0
+    assert len(hass.loop.create_task.mock_calls) == 0
+    assert len(hass.loop.run_in_executor.mock_calls) == 1
+
+
 def test_async_create_task_schedule_coroutine():
     """Test that we schedule coroutines and add jobs to the job pool."""
     hass = MagicMock()
@@ -498,6 +564,15 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         assert state == ha.State.from_dict(state.as_dict())
 
+    def test_json_conversion(self):
+        """Test the JSON of a state is encoded once."""
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        text = state.as_json()
+        assert json.loads(text) == json.loads(
+            json.dumps(state.as_dict(), cls=JSONEncoder))
+        assert state.as_json() is text
+        assert state.attributes_json() in text
+
     def test_dict_conversion_with_wrong_data(self):
         """Test conversion with wrong data."""
         assert ha.State.from_dict(None) is None
@@ -555,6 +630,49 @@ class TestStateMachine(unittest.TestCase):
         states = sorted(state.entity_id for state in self.states.all())
         assert ['light.bowl', 'switch.ac'] == states
 
+        states = [state.entity_id for state in self.states.all('Light')]
+        assert ['light.bowl'] == states
+        assert [] == self.states.all('sensor')
+
+    def test_domain_index(self):
+        """Test the per domain index follows added and removed states."""
+        self.states.set('light.kitchen', 'on')
+        self.states.set('light_group.all', 'on')
+        self.states.set('light.attic', 'on')
+        self.states.set('light.attic', 'off')
+
+        def sorted_ids(domain_filter=None):
+            return [state.entity_id for state in run_callback_threadsafe(
+                self.hass.loop, self.states.async_all_sorted, domain_filter
+            ).result()]
+
+        def count(domain_filter=None):
+            return run_callback_threadsafe(
+                self.hass.loop, self.states.async_entity_ids_count,
+                domain_filter).result()
+
+        assert sorted_ids() == ['light.attic', 'light.bowl', 'light.kitchen',
+                                'light_group.all', 'switch.ac']
+        assert sorted_ids('light') == [
+            'light.attic', 'light.bowl', 'light.kitchen']
+        assert self.states.get('light.attic').state == 'off'
+        assert sorted_ids('light')[0] == 'light.attic'
+        assert self.states.all('light')[0].entity_id == 'light.bowl'
+        assert count() == 5
+        assert count('light') == 3
+        assert count('sensor') == 0
+
+        self.states.remove('light.bowl')
+        self.states.remove('switch.ac')
+
+        assert sorted_ids() == [
+            'light.attic', 'light.kitchen', 'light_group.all']
+        assert self.states.entity_ids('light') == [
+            'light.kitchen', 'light.attic']
+        assert self.states.entity_ids('switch') == []
+        assert count('light') == 2
+        assert count('switch') == 0
+
     def test_remove(self):
         """Test remove method."""
         events = []
@@ -1055,3 +1173,153 @@ async def test_service_call_event_contains_original_data(hass):
     assert events[0].data['service_data']['number'] == '23'
     assert len(calls) == 1
     assert calls[0].data['number'] == 23
+
+
+async def test_scheduler_runs_due_jobs_in_order(hass):
+    """Test the scheduler runs due jobs ordered by point in time."""
+    runs = []
+    now = datetime(2018, 10, 10, 12, 0, 0, tzinfo=dt_util.UTC)
+
+    for offset in (3, 1, 2):
+        hass.scheduler.async_schedule(
+            now + timedelta(seconds=offset),
+            ha.callback(lambda fired, offset=offset: runs.append(
+                (offset, fired))))
+
+    assert hass.scheduler.pending == 3
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == 1
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {
+        ATTR_NOW: now + timedelta(seconds=2)})
+    await hass.async_block_till_done()
+
+    assert runs == [
+        (1, now + timedelta(seconds=2)),
+        (2, now + timedelta(seconds=2)),
+    ]
+    assert hass.scheduler.pending == 1
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {
+        ATTR_NOW: now + timedelta(seconds=5)})
+    await hass.async_block_till_done()
+
+    assert [offset for offset, _ in runs] == [1, 2, 3]
+    assert hass.scheduler.pending == 0
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_scheduler_cancel(hass):
+    """Test cancelling scheduled jobs."""
+    runs = []
+    now = datetime(2018, 10, 10, 12, 0, 0, tzinfo=dt_util.UTC)
+
+    cancel = hass.scheduler.async_schedule(
+        now, ha.callback(lambda fired: runs.append(fired)))
+    keep = hass.scheduler.async_schedule(
+        now, ha.callback(lambda fired: runs.append(fired)))
+
+    cancel()
+    cancel()
+    assert hass.scheduler.pending == 1
+
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+    await hass.async_block_till_done()
+
+    assert len(runs) == 1
+    assert hass.scheduler.pending == 0
+
+    # Cancelling a job that already ran is a no-op
+    keep()
+    assert hass.scheduler.pending == 0
+
+
+async def test_bus_match_all_listeners(hass):
+    """Test match all listeners get events before the event listeners."""
+    calls = []
+
+    @ha.callback
+    def match_all_listener(event):
+        """Record events of all types."""
+        calls.append(('all', event.event_type))
+
+    @ha.callback
+    def test_listener(event):
+        """Record test events."""
+        calls.append(('test', event.event_type))
+
+    hass.bus.async_listen('test_event', test_listener)
+    unsub = hass.bus.async_listen(MATCH_ALL, match_all_listener)
+
+    hass.bus.async_fire('test_event')
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert calls == [('all', 'test_event'), ('test', 'test_event')]
+
+    unsub()
+    hass.bus.async_fire('test_event')
+    await hass.async_block_till_done()
+
+    assert calls[2:] == [('test', 'test_event')]
+
+
+def test_context_id_generated_lazily():
+    """Test the id of a context is only generated when it is used."""
+    context = ha.Context(user_id='abcd')
+    assert context._id is None
+
+    context_id = context.id
+    assert len(context_id) == 32
+    assert context.id == context_id
+    assert context.as_dict() == {'id': context_id, 'user_id': 'abcd'}
+
+    assert ha.Context(id='1234') == ha.Context(id='1234')
+    assert ha.Context(id='1234') != ha.Context(id='1234', user_id='abcd')
+    assert ha.Context() != ha.Context()
+    assert len({ha.Context(id='1234'), ha.Context(id='1234')}) == 1
+
+
+def test_context_id_same_in_threads():
+    """Test threads reading a new context id get the same id."""
+    context = ha.Context()
+    ids = []
+    real_uuid4 = uuid.uuid4
+
+    def slow_uuid4():
+        """Give the other threads time to read the id as well."""
+        time.sleep(0.01)
+        return real_uuid4()
+
+    with patch('homeassistant.core.uuid.uuid4', side_effect=slow_uuid4):
+        threads = [threading.Thread(target=lambda: ids.append(context.id))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(ids) == 5
+    assert set(ids) == {context.id}
+
+
+def test_state_keeps_attributes_mapping():
+    """Test a state does not wrap attributes that are read-only."""
+    state = ha.State('light.bowl', 'on', {'brightness': 144})
+    assert ha.State('light.bowl', 'off', state.attributes).attributes \
+        is state.attributes
+
+
+async def test_async_set_reuses_unchanged_attributes(hass):
+    """Test unchanged attributes keep the mapping of the previous state."""
+    hass.states.async_set('light.bowl', 'on', {'brightness': 144})
+    state = hass.states.get('light.bowl')
+    attributes_json = state.attributes_json()
+
+    hass.states.async_set('light.bowl', 'off', {'brightness': 144})
+    new_state = hass.states.get('light.bowl')
+    assert new_state.state == 'off'
+    assert new_state.attributes is state.attributes
+    assert new_state.attributes_json() is attributes_json
+
+    hass.states.async_set('light.bowl', 'off', {'brightness': 200})
+    assert hass.states.get('light.bowl').attributes == {'brightness': 200}
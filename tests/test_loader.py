@@ -1,7 +1,10 @@
 """Test to verify that we can load components."""
 # pylint: disable=protected-access
 import asyncio
+import os
+import sys
 import unittest
+from unittest.mock import patch
 
 import pytest
 
@@ -132,3 +135,131 @@ async def test_log_warning_custom_component(hass, caplog):
 
     loader.get_component(hass, 'light.test')
     assert 'You are using a custom component for light.test' in caplog.text
+
+
+def _write_component(tmpdir, name, source):
+    """Write the source of a custom component and return its path."""
+    path = tmpdir.join(loader.PATH_CUSTOM_COMPONENTS, name + '.py')
+    path.write(source, ensure=True)
+    return str(path)
+
+
+async def test_manifest_from_source(hass, tmpdir):
+    """Test the manifest is read from the source without importing it."""
+    hass.config.config_dir = str(tmpdir)
+    path = _write_component(tmpdir, 'manifest_comp', "\n".join([
+        "import voluptuous as vol",
+        "DEPENDENCIES = ['http']",
+        "REQUIREMENTS = ['some-package==1.0']",
+        "CONFIG_SCHEMA = vol.Schema({})",
+    ]))
+
+    manifest = loader.get_manifest(hass, 'manifest_comp')
+    assert manifest.path == path
+    assert manifest.DEPENDENCIES == ['http']
+    assert manifest.REQUIREMENTS == ['some-package==1.0']
+    assert manifest.config_schema
+    assert not manifest.platform_schema
+    assert 'custom_components.manifest_comp' not in sys.modules
+    assert loader.get_manifest(hass, 'manifest_comp') is manifest
+
+    _write_component(tmpdir, 'manifest_comp', "DEPENDENCIES = ['api']")
+    os.utime(path, (manifest.mtime + 10, manifest.mtime + 10))
+
+    manifest = loader.get_manifest(hass, 'manifest_comp')
+    assert manifest.DEPENDENCIES == ['api']
+    assert manifest.REQUIREMENTS == []
+    assert not manifest.config_schema
+
+
+async def test_platform_manifest_from_source(hass, tmpdir):
+    """Test the manifest of a platform is read in both layouts."""
+    hass.config.config_dir = str(tmpdir)
+    path = _write_component(tmpdir, 'light/manifest_a',
+                            "REQUIREMENTS = ['a==1.0']")
+    manifest = loader.get_platform_manifest(hass, 'light', 'manifest_a')
+    assert manifest.path == path
+    assert manifest.REQUIREMENTS == ['a==1.0']
+
+    path = _write_component(tmpdir, 'manifest_b/light',
+                            "REQUIREMENTS = ['b==1.0']")
+    with patch('homeassistant.loader._load_file') as mock_load:
+        manifest = loader.get_platform_manifest(hass, 'light', 'manifest_b')
+    assert manifest.path == path
+    assert manifest.REQUIREMENTS == ['b==1.0']
+    assert not mock_load.called
+
+    with patch('homeassistant.loader._load_file') as mock_load:
+        assert loader.get_platform_manifest(
+            hass, 'light', 'manifest_c') is None
+    assert not mock_load.called
+
+
+async def test_load_order_from_manifests(hass, tmpdir):
+    """Test dependencies are resolved without importing them."""
+    hass.config.config_dir = str(tmpdir)
+    _write_component(tmpdir, 'manifest_a', "DEPENDENCIES = ['manifest_b']")
+    _write_component(tmpdir, 'manifest_b', "DEPENDENCIES = []")
+
+    assert ['manifest_b', 'manifest_a'] == \
+        loader.load_order_component(hass, 'manifest_a')
+    assert 'custom_components.manifest_a' not in sys.modules
+    assert 'custom_components.manifest_b' not in sys.modules
+
+
+def test_parse_manifest_not_literal(tmpdir):
+    """Test manifests are not read from sources with computed values."""
+    for source in (
+            "DOMAIN = 'x'\nDEPENDENCIES = [DOMAIN]",
+            "DEPENDENCIES = ['a']\nDEPENDENCIES += ['b']",
+            "REQUIREMENTS = ['a']\nif True:\n    REQUIREMENTS = ['b']",
+            "DEPENDENCIES = 'http'",
+    ):
+        path = _write_component(tmpdir, 'not_literal', source)
+        assert loader._parse_manifest('not_literal', path, 0) is None
+
+
+def test_manifest_of_loaded_module(hass):
+    """Test the manifest of a module that is loaded already."""
+    loader.set_component(hass, 'mod1', MockModule('mod1', ['mod2']))
+    manifest = loader.get_manifest(hass, 'mod1')
+    assert manifest.DEPENDENCIES == ['mod2']
+
+    loader.set_component(hass, 'mod1', None)
+    assert loader.get_manifest(hass, 'mod1') is None
+
+
+async def test_manifests_stored(hass, hass_storage):
+    """Test manifests are stored and loaded again."""
+    manifest = loader.get_manifest(hass, 'http')
+    await loader.async_save_manifests(hass)
+
+    data = hass_storage[loader.MANIFEST_STORAGE_KEY]['data']
+    assert data['http'] == manifest.as_dict()
+
+    hass.data.pop(loader.DATA_MANIFESTS)
+    await loader.async_load_manifests(hass)
+
+    loaded = hass.data[loader.DATA_MANIFESTS].manifests['http']
+    assert loaded.as_dict() == manifest.as_dict()
+    assert loader.get_manifest(hass, 'http') is loaded
+
+
+async def test_async_get_manifest(hass, tmpdir):
+    """Test manifests are read in the executor unless checked already."""
+    hass.config.config_dir = str(tmpdir)
+    _write_component(tmpdir, 'manifest_comp', "DEPENDENCIES = ['http']")
+
+    with patch('homeassistant.loader._parse_manifest',
+               wraps=loader._parse_manifest) as mock_parse:
+        manifest = await loader.async_get_manifest(hass, 'manifest_comp')
+    assert manifest.DEPENDENCIES == ['http']
+    assert len(mock_parse.mock_calls) == 1
+
+    with patch('homeassistant.loader._find_source') as mock_find:
+        assert await loader.async_get_manifest(
+            hass, 'manifest_comp') is manifest
+    assert not mock_find.called
+
+    assert ['http', 'manifest_comp'] == \
+        await loader.async_load_order_component(hass, 'manifest_comp')
@@ -6,6 +6,7 @@ from unittest import mock
 import threading
 import logging
 
+import pytest
 import voluptuous as vol
 
 from homeassistant.core import callback
@@ -492,3 +493,52 @@ async def test_when_setup_already_loaded(hass):
     setup.async_when_setup(hass, 'test', mock_callback)
     await hass.async_block_till_done()
     assert calls == ['test', 'test']
+
+
+async def test_setup_timeline(hass):
+    """Test the phases of setups and the critical path are recorded."""
+    loader.set_component(hass, 'comp_a', MockModule('comp_a'))
+    loader.set_component(hass, 'comp_b', MockModule(
+        'comp_b', dependencies=['comp_a']))
+    loader.set_component(hass, 'comp_c', MockModule(
+        'comp_c', setup=lambda hass, config: True))
+
+    assert await setup.async_setup_component(hass, 'comp_c', {})
+    assert await setup.async_setup_component(hass, 'comp_b', {})
+
+    timeline = setup.async_get_setup_timeline(hass).as_dict()
+    setups = {item['name']: item for item in timeline['setups']}
+
+    assert set(setups) == {'comp_a', 'comp_b', 'comp_c'}
+    assert set(setups['comp_a']['phases']) == {'import', 'setup'}
+    assert set(setups['comp_b']['phases']) == \
+        {'import', 'dependencies', 'setup'}
+    assert setups['comp_b']['dependencies'] == ['comp_a']
+    assert setups['comp_b']['start'] <= setups['comp_a']['start']
+    assert setups['comp_a']['end'] <= setups['comp_b']['end']
+
+    # Sync setups run in the executor, async setups are awaited
+    comp_c = setups['comp_c']
+    assert comp_c['executor'] == pytest.approx(
+        comp_c['phases']['import'] + comp_c['phases']['setup'], abs=1e-3)
+    assert comp_c['coroutine'] == 0
+
+    assert timeline['critical_path'] == ['comp_a', 'comp_b']
+    assert timeline['startup_time'] is None
+
+
+def test_setup_timeline_critical_path_platforms():
+    """Test the critical path goes through the slowest platform."""
+    timeline = setup.SetupTimeline()
+    origin = timeline.origin
+
+    for name, start, end in (('http', 0, 1), ('light', 1, 6),
+                             ('light.hue', 1, 5), ('light.demo', 1, 2),
+                             ('sensor', 2, 3)):
+        timing = timeline.async_start(name)
+        timing.start = origin + start
+        timing.end = origin + end
+
+    timeline.async_add_dependencies('light.hue', ['http'])
+
+    assert timeline.critical_path() == ['http', 'light.hue', 'light']
@@ -298,3 +298,24 @@ async def test_throttle_async():
 
     assert (await test_method2()) is True
     assert (await test_method2()) is None
+
+
+def test_lru_cache():
+    """Test the LRU cache evicts the least recently used item."""
+    cache = util.LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+
+    assert cache.get('a') == 1
+
+    cache['c'] = 3
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.as_dict() == {
+        'size': 2, 'entries': 2, 'hits': 3, 'misses': 1}
+
+    cache.clear()
+    assert len(cache) == 0
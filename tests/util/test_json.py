@@ -6,7 +6,8 @@ import sys
 from tempfile import mkdtemp
 
 from homeassistant.util.json import (
-    SerializationError, load_json, save_json)
+    SerializationError, append_json_lines, load_json, load_json_lines,
+    save_json)
 from homeassistant.exceptions import HomeAssistantError
 import pytest
 
@@ -91,3 +92,12 @@ class TestJSON(unittest.TestCase):
         save_json(fname, Mock(), encoder=MockJSONEncoder)
         data = load_json(fname)
         self.assertEqual(data, "9")
+
+    def test_append_and_load_lines(self):
+        """Test appending JSON lines and loading them back."""
+        fname = self._path_for("test7")
+        assert load_json_lines(fname) == []
+
+        append_json_lines(fname, ['{"a": 1, "B": "two"}'])
+        append_json_lines(fname, ['{"a": "one", "B": 2}', '[1, 2'])
+        assert load_json_lines(fname) == [TEST_JSON_A, TEST_JSON_B]